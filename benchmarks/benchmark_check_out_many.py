@@ -0,0 +1,93 @@
+"""Benchmark that compares Teller.check_out_many with one checkout per cart.
+
+All carts are checked out once with check_out_articles_from_cart per cart and
+once with a single call to check_out_many, which looks up the unit prices of all
+Products of the batch at once, so that Products that appear in many carts are
+only looked up once. Both are run against an in-memory catalog and against an
+SQLite catalog, in which every lookup is a query. The carts per second and the
+speedup of check_out_many are reported.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_check_out_many --carts 5000 --max-lines 50
+"""
+
+import argparse
+import math
+import random
+import time
+from collections.abc import Callable
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from receipt import Receipt
+from sqlite_catalog import SqliteCatalog
+from teller import Teller
+
+
+def _get_best_seconds(function: Callable[[], list[Receipt]], repeat: int) -> float:
+    best_seconds = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return best_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--carts", type=int, default=5000)
+    parser.add_argument("--max-lines", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    memory_catalog, products = create_catalog(rng=rng, product_count=args.products)
+    memory_teller = create_teller(rng=rng, catalog=memory_catalog, products=products)
+    carts = create_carts(
+        rng=rng,
+        catalog=memory_catalog,
+        products=products,
+        cart_count=args.carts,
+        max_line_count=args.max_lines,
+    )
+
+    with SqliteCatalog() as sqlite_catalog:
+        sqlite_catalog.add_products(products_prices_cents=memory_catalog.prices_cents)
+        # the same Offers and Bundles, but with the SQLite catalog
+        sqlite_teller = Teller(catalog=sqlite_catalog)
+        sqlite_teller.promotions = memory_teller.promotions
+
+        print(
+            f"{'catalog':8s} {'per cart (carts/s)':>19s} "
+            f"{'check_out_many (carts/s)':>25s} {'speedup':>8s}"
+        )
+        for name, teller in [("memory", memory_teller), ("sqlite", sqlite_teller)]:
+            assert [
+                teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+                for cart in carts
+            ] == [
+                receipt.get_total_price_cents()
+                for receipt in teller.check_out_many(carts=carts)
+            ]
+            per_cart_seconds = _get_best_seconds(
+                function=lambda: [
+                    teller.check_out_articles_from_cart(cart=cart) for cart in carts
+                ],
+                repeat=args.repeat,
+            )
+            batch_seconds = _get_best_seconds(
+                function=lambda: teller.check_out_many(carts=carts),
+                repeat=args.repeat,
+            )
+            print(
+                f"{name:8s} {args.carts / per_cart_seconds:19.0f} "
+                f"{args.carts / batch_seconds:25.0f} "
+                f"{per_cart_seconds / batch_seconds:7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark for the Discount selection with overlapping Offers and Bundles.
+
+Every Product has several Offers and is part of several Bundles, and the carts
+contain a large share of the catalog, so that almost all Bundles are purchased
+and overlap with each other. For every number of Bundles per Product, the
+throughput and the 50th and 99th percentile of the latency per cart are reported
+for discount_selection.create_best_discounts.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_discount_selection --products 500 --max-lines 500
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_overlapping_teller)
+from discount_selection import create_best_discounts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--carts", type=int, default=200)
+    parser.add_argument("--min-lines", type=int, default=100)
+    parser.add_argument("--max-lines", type=int, default=500)
+    parser.add_argument("--offers-per-product", type=int, default=2)
+    parser.add_argument(
+        "--bundles-per-product", type=int, nargs="+", default=[1, 2, 4, 8]
+    )
+    parser.add_argument("--bundle-size", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(
+        f"{'bundles/product':>15s} {'bundles/cart':>12s} {'carts/s':>10s} "
+        f"{'p50 (us)':>10s} {'p99 (us)':>10s}"
+    )
+    for bundles_per_product in args.bundles_per_product:
+        rng = random.Random(args.seed)
+        catalog, products = create_catalog(rng=rng, product_count=args.products)
+        teller = create_overlapping_teller(
+            rng=rng,
+            catalog=catalog,
+            products=products,
+            offers_per_product=args.offers_per_product,
+            bundles_per_product=bundles_per_product,
+            bundle_size=args.bundle_size,
+        )
+        carts = create_carts(
+            rng=rng,
+            catalog=catalog,
+            products=products,
+            cart_count=args.carts,
+            min_line_count=args.min_lines,
+            max_line_count=args.max_lines,
+        )
+        # everything except the Discount creation and selection is prepared here
+        inputs = []
+        for cart in carts:
+            inputs.append(
+                (
+                    cart.product_quantities,
+                    list(
+                        dict.fromkeys(
+                            bundle
+                            for product in cart.product_quantities
+                            for bundle in teller.product_bundles_map.get(product, [])
+                        )
+                    ),
+                    catalog.get_unit_prices_cents(
+                        products=list(cart.product_quantities)
+                    ),
+                )
+            )
+
+        latencies: list[float] = []
+        for product_quantities_map, bundles, unit_prices_cents in inputs:
+            start = time.perf_counter()
+            create_best_discounts(
+                product_quantities_map=product_quantities_map,
+                product_offers_map=teller.product_offers_map,
+                bundles=bundles,
+                unit_prices_cents=unit_prices_cents,
+                offer_evaluators=teller.offer_evaluators,
+            )
+            latencies.append(time.perf_counter() - start)
+
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        bundles_per_cart = statistics.mean(len(bundles) for _, bundles, _ in inputs)
+        print(
+            f"{bundles_per_product:15d} {bundles_per_cart:12.0f} "
+            f"{len(latencies) / sum(latencies):10.0f} "
+            f"{percentiles[49] * 1e6:10.1f} {percentiles[98] * 1e6:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Benchmark of scanning and checking out weight-heavy baskets.
+
+Most Products in the catalog are sold by weight, and every weighed Product is put
+on the scale several times, so that its quantity in the ShoppingCart is the sum
+of several weights. As a baseline, the scanned kilograms are summed up as floats
+and the line totals are rounded from them, like the ShoppingCart and the Teller
+did before quantities were kept in grams; the same is done with integer grams.
+For both, the scans and line totals per second are reported, as well as the
+number of lines whose total differs from the exact price of the scanned weight,
+rounded to the nearest cent like round(). Finally, the scans and checkouts per
+second of the ShoppingCart and the Teller are reported.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_fixed_point_quantities --carts 5000 --scans 4
+"""
+
+import argparse
+import fractions
+import math
+import random
+import time
+from typing import Union
+
+from benchmarks.synthetic_data import create_catalog, create_teller
+from catalog import SupermarketCatalog
+from model_objects import Product, ProductUnit
+from quantities import QUANTITY_SCALES, get_total_price_cents
+from shopping_cart import ShoppingCart
+
+Scans = list[list[tuple[Product, list[Union[int, float]]]]]
+
+
+def _sum_float_quantities(scans: Scans) -> list[dict[Product, Union[int, float]]]:
+    # the baseline: the scanned kilograms are summed up as floats
+    carts: list[dict[Product, Union[int, float]]] = []
+    for cart_scans in scans:
+        product_quantities: dict[Product, Union[int, float]] = {}
+        for product, quantities in cart_scans:
+            for quantity in quantities:
+                if product in product_quantities:
+                    product_quantities[product] += quantity
+                else:
+                    product_quantities[product] = quantity
+        carts.append(product_quantities)
+    return carts
+
+
+def _sum_fixed_point_quantities(scans: Scans) -> list[dict[Product, int]]:
+    # every scanned weight is rounded to grams, which are summed up exactly
+    carts: list[dict[Product, int]] = []
+    for cart_scans in scans:
+        product_quantities: dict[Product, int] = {}
+        for product, quantities in cart_scans:
+            scale = QUANTITY_SCALES[product.unit]
+            for quantity in quantities:
+                fixed_point_quantity = (
+                    quantity if scale == 1 else round(quantity * scale)
+                )
+                if product in product_quantities:
+                    product_quantities[product] += fixed_point_quantity
+                else:
+                    product_quantities[product] = fixed_point_quantity
+        carts.append(product_quantities)
+    return carts
+
+
+def _get_float_line_totals(
+    carts: list[dict[Product, Union[int, float]]], prices_cents: dict[Product, int]
+) -> list[list[int]]:
+    return [
+        [
+            round(quantity * prices_cents[product])
+            for product, quantity in product_quantities.items()
+        ]
+        for product_quantities in carts
+    ]
+
+
+def _get_fixed_point_line_totals(
+    carts: list[dict[Product, int]], prices_cents: dict[Product, int]
+) -> list[list[int]]:
+    return [
+        [
+            get_total_price_cents(
+                product=product,
+                quantity=quantity,
+                unit_price_cents=prices_cents[product],
+            )
+            for product, quantity in product_quantities.items()
+        ]
+        for product_quantities in carts
+    ]
+
+
+def _count_inexact_lines(
+    scans: Scans, line_totals: list[list[int]], prices_cents: dict[Product, int]
+) -> int:
+    inexact_lines = 0
+    for cart_scans, cart_line_totals in zip(scans, line_totals):
+        for (product, quantities), total_price_cents in zip(
+            cart_scans, cart_line_totals
+        ):
+            # the scanned weights are summed up exactly, in grams
+            exact_price_cents = (
+                fractions.Fraction(
+                    sum(round(quantity * 1000) for quantity in quantities)
+                    if product.unit == ProductUnit.KILO
+                    else sum(quantities)
+                )
+                * prices_cents[product]
+            )
+            if product.unit == ProductUnit.KILO:
+                exact_price_cents /= 1000
+            inexact_lines += total_price_cents != round(exact_price_cents)
+    return inexact_lines
+
+
+def _scan_carts(catalog: SupermarketCatalog, scans: Scans) -> list[ShoppingCart]:
+    carts: list[ShoppingCart] = []
+    for cart_scans in scans:
+        cart = ShoppingCart(catalog=catalog)
+        for product, quantities in cart_scans:
+            for quantity in quantities:
+                cart.add_item_quantity(product=product, quantity=quantity)
+        carts.append(cart)
+    return carts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--carts", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--scans", type=int, default=4)
+    parser.add_argument("--kilo-share", type=float, default=0.9)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog, products = create_catalog(
+        rng=rng, product_count=args.products, kilo_share=args.kilo_share
+    )
+    teller = create_teller(
+        rng=rng, catalog=catalog, products=products, offer_density=0.5
+    )
+    # the scanned weights in kilograms, or the number of items, of every line
+    scans: Scans = [
+        [
+            (
+                product,
+                [
+                    (
+                        rng.randint(50, 1500) / 1000
+                        if product.unit == ProductUnit.KILO
+                        else 1
+                    )
+                    for _ in range(args.scans)
+                ],
+            )
+            for product in rng.sample(products, k=args.lines)
+        ]
+        for _ in range(args.carts)
+    ]
+    scan_count = args.carts * args.lines * args.scans
+    line_count = args.carts * args.lines
+    prices_cents = catalog.prices_cents
+
+    # the best of several runs is reported for every stage
+    print(
+        f"{'quantities':12s} {'scans/s':>10s} {'line totals/s':>14s} "
+        f"{'inexact lines':>14s}"
+    )
+    for name, sum_quantities, get_line_totals in [
+        ("float", _sum_float_quantities, _get_float_line_totals),
+        ("fixed-point", _sum_fixed_point_quantities, _get_fixed_point_line_totals),
+    ]:
+        sum_seconds = line_totals_seconds = math.inf
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            product_quantities = sum_quantities(scans)
+            sum_seconds = min(sum_seconds, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            line_totals = get_line_totals(product_quantities, prices_cents)
+            line_totals_seconds = min(line_totals_seconds, time.perf_counter() - start)
+        inexact_lines = _count_inexact_lines(
+            scans=scans, line_totals=line_totals, prices_cents=prices_cents
+        )
+        print(
+            f"{name:12s} {scan_count / sum_seconds:10.0f} "
+            f"{line_count / line_totals_seconds:14.0f} {inexact_lines:14d}"
+        )
+
+    scan_seconds = checkout_seconds = math.inf
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        carts = _scan_carts(catalog=catalog, scans=scans)
+        scan_seconds = min(scan_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        receipts = [teller.check_out_articles_from_cart(cart=cart) for cart in carts]
+        checkout_seconds = min(checkout_seconds, time.perf_counter() - start)
+
+    inexact_lines = _count_inexact_lines(
+        scans=scans,
+        line_totals=[
+            [item.total_price_cents for item in receipt.items] for receipt in receipts
+        ],
+        prices_cents=prices_cents,
+    )
+
+    print()
+    print(f"ShoppingCart scans: {scan_count / scan_seconds:10.0f} scans/s")
+    print(f"Teller checkouts:   {args.carts / checkout_seconds:10.0f} carts/s")
+    print(f"inexact lines on Receipts: {inexact_lines} of {line_count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark that measures the memory footprint of the model objects.
+
+The slotted model classes are compared with equivalent classes that store their
+attributes in a per-instance __dict__, like the model classes did before.
+Products are measured including their share of the product registry.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_model_memory --count 100000
+"""
+
+import argparse
+import tracemalloc
+from typing import Callable
+
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType)
+from receipt import ReceiptItem
+
+
+class DictProduct:
+    def __init__(self, name: str, unit: ProductUnit):
+        self.name = name
+        self.unit = unit
+
+
+class DictOffer:
+    def __init__(self, offer_type, product, optional_argument, x=None, y=None):
+        self.offer_type = offer_type
+        self.product = product
+        self.optional_argument = optional_argument
+        self.x = x
+        self.y = y
+
+
+class DictDiscount:
+    def __init__(self, product, description, discount_amount_cents):
+        self.product = product
+        self.description = description
+        self.discount_amount_cents = discount_amount_cents
+
+
+class DictBundle:
+    def __init__(self, products, discount_percentage):
+        self.products = products
+        self.discount_percentage = discount_percentage
+
+
+class DictReceiptItem:
+    def __init__(self, product, quantity, price_cents, total_price_cents):
+        self.product = product
+        self.quantity = quantity
+        self.price_cents = price_cents
+        self.total_price_cents = total_price_cents
+
+
+def _measure_bytes_per_object(create_object: Callable[[], object], count: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [create_object() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # subtract the list that holds the objects
+    list_size = objects.__sizeof__()
+    return (after - before - list_size) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    # shared attribute values, so that only the objects themselves are measured
+    name = "toothbrush"
+    products = [Product(name=name, unit=ProductUnit.EACH)]
+    product = products[0]
+    description = "3 for 2"
+    # Products are interned, so every Product needs its own name; the size
+    # of a Product includes its entry in the product registry
+    dict_product_names = iter([f"product {number}" for number in range(args.count)])
+    product_names = iter([f"product {number}" for number in range(args.count)])
+    comparisons = [
+        (
+            "Product",
+            lambda: DictProduct(name=next(dict_product_names), unit=ProductUnit.EACH),
+            lambda: Product(name=next(product_names), unit=ProductUnit.EACH),
+        ),
+        (
+            "Offer",
+            lambda: DictOffer(SpecialOfferType.THREE_FOR_TWO, product, None),
+            lambda: Offer(
+                offer_type=SpecialOfferType.THREE_FOR_TWO,
+                product=product,
+                optional_argument=None,
+            ),
+        ),
+        (
+            "Discount",
+            lambda: DictDiscount(product, description, -99),
+            lambda: Discount(
+                product=product, description=description, discount_amount_cents=-99
+            ),
+        ),
+        (
+            "Bundle",
+            lambda: DictBundle(products, 10),
+            lambda: Bundle(products=products, discount_percentage=10),
+        ),
+        (
+            "ReceiptItem",
+            lambda: DictReceiptItem(product, 3, 99, 297),
+            lambda: ReceiptItem(
+                product=product, quantity=3, price_cents=99, total_price_cents=297
+            ),
+        ),
+    ]
+    print(f"{'class':12s} {'__dict__':>10s} {'__slots__':>10s} {'saved':>8s}")
+    for class_name, create_dict_object, create_slotted_object in comparisons:
+        dict_bytes = _measure_bytes_per_object(
+            create_object=create_dict_object, count=args.count
+        )
+        slotted_bytes = _measure_bytes_per_object(
+            create_object=create_slotted_object, count=args.count
+        )
+        print(
+            f"{class_name:12s} {dict_bytes:9.1f}B {slotted_bytes:9.1f}B "
+            f"{1 - slotted_bytes / dict_bytes:7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
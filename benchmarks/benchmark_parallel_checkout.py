@@ -0,0 +1,71 @@
+"""Benchmark that compares sequential checkouts with parallel_checkout.check_out_in_parallel.
+
+Besides the carts per second, the CPU time of the main process is reported for
+every run. The main process encodes the carts and creates the Receipts from the
+results of the workers, so its share of the sequential checkout time bounds the
+speedup that any number of cores can give: with a main process that needs a
+third of the sequential time, at most three times as many carts per second are
+possible. On a machine with fewer cores than workers, the workers share the cores
+with the main process, and the carts per second don't scale.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_parallel_checkout --carts 20000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import time
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from parallel_checkout import check_out_in_parallel
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--carts", type=int, default=10000)
+    parser.add_argument("--max-lines", type=int, default=100)
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog, products = create_catalog(rng=rng, product_count=args.products)
+    teller = create_teller(rng=rng, catalog=catalog, products=products)
+    carts = create_carts(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        cart_count=args.carts,
+        max_line_count=args.max_lines,
+    )
+
+    start = time.perf_counter()
+    teller.check_out_many(carts=carts)
+    sequential_seconds = time.perf_counter() - start
+    print(f"sequential: {args.carts / sequential_seconds:10.0f} carts/s")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        for _ in check_out_in_parallel(
+            teller=teller, carts=carts, max_workers=workers, chunksize=args.chunksize
+        ):
+            pass
+        seconds = time.perf_counter() - start
+        main_cpu_seconds = time.process_time() - start_cpu
+        print(
+            f"{workers:2d} workers: {args.carts / seconds:10.0f} carts/s "
+            f"(speedup {sequential_seconds / seconds:.2f}x, main process CPU "
+            f"{main_cpu_seconds / sequential_seconds:.0%} of sequential)"
+        )
+
+
+if __name__ == "__main__":
+    main()
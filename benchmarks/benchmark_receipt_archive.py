@@ -0,0 +1,85 @@
+"""Benchmark that compares the columnar Receipt archive with pickled Receipts.
+
+For both formats, the time to write all Receipts, the file size, and the time to
+sum up the revenue per Product from the file are reported. The pickled Receipts
+have to be loaded completely for that, while the archive is scanned column-wise.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_receipt_archive --carts 20000 --max-lines 50
+"""
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from model_objects import Product
+from receipt_archive import ReceiptArchive, write_receipt_archive
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--carts", type=int, default=20000)
+    parser.add_argument("--max-lines", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog, products = create_catalog(rng=rng, product_count=args.products)
+    teller = create_teller(rng=rng, catalog=catalog, products=products)
+    carts = create_carts(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        cart_count=args.carts,
+        max_line_count=args.max_lines,
+    )
+    receipts = teller.check_out_many(carts=carts)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, "receipts.pickle")
+        start = time.perf_counter()
+        with open(pickle_path, "wb") as file:
+            pickle.dump(receipts, file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle_write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(pickle_path, "rb") as file:
+            revenues_cents: dict[Product, int] = {}
+            for receipt in pickle.load(file):
+                for item in receipt.items:
+                    revenues_cents[item.product] = (
+                        revenues_cents.get(item.product, 0) + item.total_price_cents
+                    )
+        pickle_scan_seconds = time.perf_counter() - start
+
+        archive_path = os.path.join(directory, "receipts.archive")
+        start = time.perf_counter()
+        write_receipt_archive(path=archive_path, receipts=receipts)
+        archive_write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ReceiptArchive(path=archive_path) as archive:
+            archive_revenues_cents = archive.get_product_revenues_cents()
+        archive_scan_seconds = time.perf_counter() - start
+        assert revenues_cents == archive_revenues_cents
+
+        print(f"{'format':8s} {'write (s)':>10s} {'size (KiB)':>11s} {'scan (s)':>10s}")
+        for name, path, write_seconds, scan_seconds in [
+            ("pickle", pickle_path, pickle_write_seconds, pickle_scan_seconds),
+            ("archive", archive_path, archive_write_seconds, archive_scan_seconds),
+        ]:
+            print(
+                f"{name:8s} {write_seconds:10.3f} "
+                f"{os.path.getsize(path) / 1024:11.1f} {scan_seconds:10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
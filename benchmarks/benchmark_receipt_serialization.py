@@ -0,0 +1,169 @@
+"""Benchmark that compares the binary Receipt stream format with JSON.
+
+The JSON baseline converts every ReceiptItem and Discount to a dict by hand and
+writes one JSON document per line, with the name and ProductUnit of the Product
+repeated in every item and Discount. For both formats, the serialization and
+deserialization throughput in Receipts per second and the size of the serialized
+Receipts are reported.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_receipt_serialization --carts 20000 --max-lines 50
+"""
+
+import argparse
+import io
+import json
+import math
+import random
+import time
+from collections.abc import Callable
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from model_objects import Discount, Product, ProductUnit
+from receipt import Receipt
+from receipt_serialization import read_receipts, serialize_receipts
+
+
+def _receipt_to_json(receipt: Receipt) -> str:
+    return json.dumps(
+        {
+            "price_version": receipt.price_version,
+            "items": [
+                {
+                    "product": item.product.name,
+                    "unit": item.product.unit.value,
+                    "quantity": item.quantity,
+                    "price_cents": item.price_cents,
+                    "total_price_cents": item.total_price_cents,
+                }
+                for item in receipt.items
+            ],
+            "discounts": [
+                {
+                    "product": discount.product.name,
+                    "unit": discount.product.unit.value,
+                    "description": discount.description,
+                    "discount_amount_cents": discount.discount_amount_cents,
+                }
+                for discount in receipt.discounts
+            ],
+        }
+    )
+
+
+def _receipt_from_json(line: str) -> Receipt:
+    document = json.loads(line)
+    receipt = Receipt(price_version=document["price_version"])
+    for item in document["items"]:
+        receipt.add_product(
+            product=Product(name=item["product"], unit=ProductUnit(item["unit"])),
+            quantity=item["quantity"],
+            price_cents=item["price_cents"],
+            total_price_cents=item["total_price_cents"],
+        )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=Product(
+                    name=discount["product"], unit=ProductUnit(discount["unit"])
+                ),
+                description=discount["description"],
+                discount_amount_cents=discount["discount_amount_cents"],
+            )
+            for discount in document["discounts"]
+        ]
+    )
+    return receipt
+
+
+def _serialize_json(receipts: list[Receipt]) -> bytes:
+    return "".join(
+        _receipt_to_json(receipt=receipt) + "\n" for receipt in receipts
+    ).encode("utf-8")
+
+
+def _deserialize_json(data: bytes) -> list[Receipt]:
+    return [
+        _receipt_from_json(line=line)
+        for line in io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    ]
+
+
+def _deserialize_binary(data: bytes) -> list[Receipt]:
+    return list(read_receipts(file=io.BytesIO(data)))
+
+
+def _get_best_seconds(function: Callable[[], object], repeat: int) -> float:
+    best_seconds = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return best_seconds
+
+
+def _to_tuples(receipt: Receipt) -> tuple:
+    return (
+        receipt.price_version,
+        [
+            (item.product, item.quantity, item.price_cents, item.total_price_cents)
+            for item in receipt.items
+        ],
+        [
+            (discount.product, discount.description, discount.discount_amount_cents)
+            for discount in receipt.discounts
+        ],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--carts", type=int, default=20000)
+    parser.add_argument("--max-lines", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog, products = create_catalog(rng=rng, product_count=args.products)
+    teller = create_teller(rng=rng, catalog=catalog, products=products)
+    carts = create_carts(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        cart_count=args.carts,
+        max_line_count=args.max_lines,
+    )
+    receipts = teller.check_out_many(carts=carts)
+    expected_receipts = [_to_tuples(receipt=receipt) for receipt in receipts]
+
+    print(
+        f"{'format':8s} {'size (KiB)':>11s} {'serialize (receipts/s)':>23s} "
+        f"{'deserialize (receipts/s)':>25s}"
+    )
+    for name, serialize, deserialize in [
+        ("json", _serialize_json, _deserialize_json),
+        ("binary", serialize_receipts, _deserialize_binary),
+    ]:
+        data = serialize(receipts)
+        assert expected_receipts == [
+            _to_tuples(receipt=receipt) for receipt in deserialize(data)
+        ]
+        serialize_seconds = _get_best_seconds(
+            function=lambda: serialize(receipts), repeat=args.repeat
+        )
+        deserialize_seconds = _get_best_seconds(
+            function=lambda: deserialize(data), repeat=args.repeat
+        )
+        print(
+            f"{name:8s} {len(data) / 1024:11.1f} "
+            f"{len(receipts) / serialize_seconds:23.0f} "
+            f"{len(receipts) / deserialize_seconds:25.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark for the SQLite catalog under concurrent checkouts.
+
+A catalog file is filled with synthetic Products via add_products. Then, the
+unit prices of all cart lines are looked up one by one and in batches, and all
+carts are checked out by Tellers in several threads that share the catalog. The
+lookups and carts per second are reported.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.benchmark_sqlite_catalog --products 100000 --threads 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from sqlite_catalog import SqliteCatalog
+from teller import Teller
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--max-lines", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    memory_catalog, products = create_catalog(rng=rng, product_count=args.products)
+    memory_teller = create_teller(rng=rng, catalog=memory_catalog, products=products)
+    carts = create_carts(
+        rng=rng,
+        catalog=memory_catalog,
+        products=products,
+        cart_count=args.carts,
+        max_line_count=args.max_lines,
+    )
+    line_count = sum(len(cart.product_quantities) for cart in carts)
+
+    with tempfile.TemporaryDirectory() as directory, SqliteCatalog(
+        database=os.path.join(directory, "catalog.sqlite"), pool_size=args.pool_size
+    ) as catalog:
+        start = time.perf_counter()
+        catalog.add_products(products_prices_cents=memory_catalog.prices_cents)
+        seconds = time.perf_counter() - start
+        print(f"add_products: {args.products / seconds:10.0f} products/s")
+
+        start = time.perf_counter()
+        for cart in carts:
+            for product in cart.product_quantities:
+                catalog.get_unit_price_cents(product=product)
+        seconds = time.perf_counter() - start
+        print(f"single lookups: {line_count / seconds:10.0f} lookups/s")
+
+        start = time.perf_counter()
+        for cart in carts:
+            catalog.get_unit_prices_cents(products=list(cart.product_quantities))
+        seconds = time.perf_counter() - start
+        print(f"batched lookups: {line_count / seconds:10.0f} lookups/s")
+
+        # the same Offers and Bundles, but with the SQLite catalog
+        teller = Teller(catalog=catalog)
+        teller.promotions = memory_teller.promotions
+        for threads in args.threads:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                for _ in executor.map(teller.check_out_articles_from_cart, carts):
+                    pass
+                seconds = time.perf_counter() - start
+            print(
+                f"{threads:2d} threads: {args.carts / seconds:10.0f} carts/s, "
+                f"{line_count / seconds:10.0f} lookups/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
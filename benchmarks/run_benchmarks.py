@@ -0,0 +1,203 @@
+"""Benchmark suite for the checkout, the Discount creation and the receipt printers.
+
+A synthetic catalog, Teller and set of ShoppingCarts is generated from a fixed seed,
+and every stage is run once per ShoppingCart. For every stage, the throughput,
+the 50th and 99th percentile of the latency per ShoppingCart, and the peak memory
+allocated while processing all ShoppingCarts are reported. The peak memory is
+measured in a separate run, because tracing allocations slows down the stages.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.run_benchmarks --products 100000 --carts 2000 --max-lines 500
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Callable
+
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_teller)
+from discount_creation import OfferDiscountCache
+from discount_selection import create_best_discounts
+from receipt_printer import HtmlReceiptPrinter, TextReceiptPrinter
+from shopping_cart import ShoppingCart
+from teller import Teller
+
+StageResult = namedtuple(
+    "StageResult", "name carts_per_second p50_microseconds p99_microseconds peak_bytes"
+)
+
+
+def _measure_latencies(
+    stage: Callable[[int], object], cart_count: int, repeat: int
+) -> list[float]:
+    latencies: list[float] = []
+    for _ in range(repeat):
+        for cart_index in range(cart_count):
+            start = time.perf_counter()
+            stage(cart_index)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _measure_peak_bytes(stage: Callable[[int], object], cart_count: int) -> int:
+    tracemalloc.start()
+    try:
+        for cart_index in range(cart_count):
+            stage(cart_index)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_bytes
+
+
+def run_stage(
+    name: str, stage: Callable[[int], object], cart_count: int, repeat: int = 1
+) -> StageResult:
+    """Runs a stage for every ShoppingCart and returns its measurements.
+
+    Args:
+        name (str): The name of the stage, used in the report.
+        stage (Callable[[int], object]): The stage, called with the index of the
+        ShoppingCart that is to be processed.
+        cart_count (int): The number of ShoppingCarts.
+        repeat (int): How many times the stage is run for every ShoppingCart.
+
+    Returns:
+        StageResult: The measurements of the stage.
+    """
+
+    latencies = _measure_latencies(stage=stage, cart_count=cart_count, repeat=repeat)
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = percentiles[49], percentiles[98]
+    else:
+        p50 = p99 = latencies[0]
+    return StageResult(
+        name=name,
+        carts_per_second=len(latencies) / sum(latencies),
+        p50_microseconds=p50 * 1e6,
+        p99_microseconds=p99 * 1e6,
+        peak_bytes=_measure_peak_bytes(stage=stage, cart_count=cart_count),
+    )
+
+
+def create_stages(
+    teller: Teller, carts: list[ShoppingCart]
+) -> dict[str, Callable[[int], object]]:
+    """Creates all benchmarked stages for the given Teller and ShoppingCarts.
+
+    Everything that is not part of a stage, like the unit prices for the
+    Discount creation or the Receipts for the printers, is prepared beforehand.
+    """
+
+    catalog = teller.catalog
+    unit_prices_cents = [
+        catalog.get_unit_prices_cents(products=list(cart.product_quantities))
+        for cart in carts
+    ]
+    candidate_bundles = [
+        list(
+            dict.fromkeys(
+                bundle
+                for product in cart.product_quantities
+                for bundle in teller.product_bundles_map.get(product, [])
+            )
+        )
+        for cart in carts
+    ]
+    # the same Offers and Bundles, but with memoized Offer Discounts
+    cached_teller = Teller(catalog=catalog, offer_discount_cache=OfferDiscountCache())
+    cached_teller.promotions = teller.promotions
+    receipts = teller.check_out_many(carts=carts)
+    text_printer = TextReceiptPrinter()
+    html_printer = HtmlReceiptPrinter()
+    return {
+        "catalog lookup": lambda index: catalog.get_unit_prices_cents(
+            products=list(carts[index].product_quantities)
+        ),
+        "discount selection": lambda index: create_best_discounts(
+            product_quantities_map=carts[index].product_quantities,
+            product_offers_map=teller.product_offers_map,
+            offer_evaluators=teller.offer_evaluators,
+            bundles=candidate_bundles[index],
+            unit_prices_cents=unit_prices_cents[index],
+        ),
+        "checkout": lambda index: teller.check_out_articles_from_cart(
+            cart=carts[index]
+        ),
+        "checkout (cached)": lambda index: cached_teller.check_out_articles_from_cart(
+            cart=carts[index]
+        ),
+        "text printer": lambda index: text_printer.print_receipt(
+            receipt=receipts[index]
+        ),
+        "html printer": lambda index: html_printer.print_receipt(
+            receipt=receipts[index]
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--carts", type=int, default=1000)
+    parser.add_argument("--min-lines", type=int, default=1)
+    parser.add_argument("--max-lines", type=int, default=500)
+    parser.add_argument("--offer-density", type=float, default=0.1)
+    parser.add_argument("--bundle-density", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--stages", nargs="+", help="only run the stages with the given names"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    catalog, products = create_catalog(rng=rng, product_count=args.products)
+    teller = create_teller(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        offer_density=args.offer_density,
+        bundle_density=args.bundle_density,
+    )
+    carts = create_carts(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        cart_count=args.carts,
+        min_line_count=args.min_lines,
+        max_line_count=args.max_lines,
+    )
+    print(
+        f"generated {args.products} products and {args.carts} carts with "
+        f"{args.min_lines}-{args.max_lines} lines in "
+        f"{time.perf_counter() - start:.1f}s"
+    )
+
+    stages = create_stages(teller=teller, carts=carts)
+    print(
+        f"{'stage':18s} {'carts/s':>10s} {'p50 (us)':>10s} {'p99 (us)':>10s} "
+        f"{'peak (KiB)':>11s}"
+    )
+    for name, stage in stages.items():
+        if args.stages and name not in args.stages:
+            continue
+        result = run_stage(
+            name=name, stage=stage, cart_count=len(carts), repeat=args.repeat
+        )
+        print(
+            f"{result.name:18s} {result.carts_per_second:10.0f} "
+            f"{result.p50_microseconds:10.1f} {result.p99_microseconds:10.1f} "
+            f"{result.peak_bytes / 1024:11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Module that contains generators for synthetic catalogs, promotions and carts.
+
+All generators take a random.Random instance, so that benchmark runs are reproducible.
+"""
+
+import random
+
+from catalog import SupermarketCatalog
+from model_objects import Bundle, Offer, Product, ProductUnit, SpecialOfferType
+from shopping_cart import ShoppingCart
+from teller import Teller
+
+
+class InMemoryCatalog(SupermarketCatalog):
+    """SupermarketCatalog that keeps all Products and prices in memory."""
+
+    def __init__(self):
+        self.prices_cents: dict[Product, int] = {}
+
+    def add_product(self, product: Product, price_cents: int) -> None:
+        self.prices_cents[product] = price_cents
+
+    def contains_product(self, product: Product) -> bool:
+        return product in self.prices_cents
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        return self.prices_cents[product]
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        return {product: self.prices_cents[product] for product in products}
+
+
+def create_catalog(
+    rng: random.Random, product_count: int, kilo_share: float = 0.2
+) -> tuple[InMemoryCatalog, list[Product]]:
+    catalog = InMemoryCatalog()
+    products: list[Product] = []
+    for product_number in range(product_count):
+        unit = ProductUnit.KILO if rng.random() < kilo_share else ProductUnit.EACH
+        product = Product(name=f"product {product_number}", unit=unit)
+        catalog.add_product(product=product, price_cents=rng.randint(10, 5000))
+        products.append(product)
+    return catalog, products
+
+
+def _create_offer(rng: random.Random, product: Product, unit_price_cents: int) -> Offer:
+    offer_type = rng.choice(list(SpecialOfferType))
+    optional_argument = None
+    x = y = None
+    if offer_type == SpecialOfferType.PERCENT_DISCOUNT:
+        optional_argument = rng.choice([5, 10, 20, 50])
+    elif offer_type == SpecialOfferType.TWO_FOR_AMOUNT:
+        # the amount has to be lower than the regular price of two items
+        optional_argument = rng.randint(1, 2 * unit_price_cents - 1)
+    elif offer_type == SpecialOfferType.FIVE_FOR_AMOUNT:
+        optional_argument = rng.randint(1, 5 * unit_price_cents - 1)
+    elif offer_type == SpecialOfferType.X_FOR_Y:
+        x = rng.randint(2, 10)
+        y = rng.randint(1, x - 1)
+    elif offer_type == SpecialOfferType.X_FOR_AMOUNT:
+        x = rng.randint(2, 10)
+        optional_argument = rng.randint(1, x * unit_price_cents - 1)
+    return Offer(
+        offer_type=offer_type,
+        product=product,
+        optional_argument=optional_argument,
+        x=x,
+        y=y,
+    )
+
+
+def create_teller(
+    rng: random.Random,
+    catalog: SupermarketCatalog,
+    products: list[Product],
+    offer_density: float = 0.1,
+    bundle_density: float = 0.05,
+    bundle_size: int = 2,
+) -> Teller:
+    """Creates a Teller with Offers and Bundles for random Products.
+
+    offer_density and bundle_density are the shares of all Products that get an
+    Offer or are part of a Bundle, respectively. Every Product gets at most one
+    Offer or Bundle, and Bundles only contain Products with ProductUnit.EACH.
+    """
+
+    teller = Teller(catalog=catalog)
+    shuffled_products = products[:]
+    rng.shuffle(shuffled_products)
+    offer_count = int(len(products) * offer_density)
+    for product in shuffled_products[:offer_count]:
+        teller.add_offer(
+            offer=_create_offer(
+                rng=rng,
+                product=product,
+                unit_price_cents=catalog.get_unit_price_cents(product=product),
+            )
+        )
+
+    bundle_candidates = [
+        product
+        for product in shuffled_products[offer_count:]
+        if product.unit == ProductUnit.EACH
+    ]
+    bundle_count = int(len(products) * bundle_density) // bundle_size
+    for bundle_number in range(bundle_count):
+        bundle_products = bundle_candidates[
+            bundle_number * bundle_size : (bundle_number + 1) * bundle_size
+        ]
+        if len(bundle_products) < bundle_size:
+            break
+        teller.add_bundle(
+            bundle=Bundle(
+                products=bundle_products,
+                discount_percentage=rng.choice([5, 10, 20]),
+            )
+        )
+    return teller
+
+
+def create_overlapping_teller(
+    rng: random.Random,
+    catalog: SupermarketCatalog,
+    products: list[Product],
+    offers_per_product: int = 2,
+    bundles_per_product: int = 3,
+    bundle_size: int = 2,
+) -> Teller:
+    """Creates a Teller in which the promotions of all Products overlap.
+
+    Every Product gets offers_per_product Offers, and every Product with
+    ProductUnit.EACH is part of about bundles_per_product Bundles, whose other
+    Products are chosen at random, so that the Bundles form large groups that
+    share Products. This is the worst case for the Discount selection.
+    """
+
+    teller = Teller(catalog=catalog)
+    for product in products:
+        unit_price_cents = catalog.get_unit_price_cents(product=product)
+        for _ in range(offers_per_product):
+            teller.add_offer(
+                offer=_create_offer(
+                    rng=rng, product=product, unit_price_cents=unit_price_cents
+                )
+            )
+
+    bundle_candidates = [
+        product for product in products if product.unit == ProductUnit.EACH
+    ]
+    bundle_count = len(bundle_candidates) * bundles_per_product // bundle_size
+    for _ in range(bundle_count):
+        teller.add_bundle(
+            bundle=Bundle(
+                products=rng.sample(bundle_candidates, k=bundle_size),
+                discount_percentage=rng.choice([5, 10, 20, 30]),
+            )
+        )
+    return teller
+
+
+def create_cart(
+    rng: random.Random,
+    catalog: SupermarketCatalog,
+    products: list[Product],
+    line_count: int,
+) -> ShoppingCart:
+    cart = ShoppingCart(catalog=catalog)
+    for product in rng.sample(products, k=min(line_count, len(products))):
+        if product.unit == ProductUnit.EACH:
+            quantity = rng.randint(1, 6)
+        else:
+            quantity = rng.randint(50, 3000) / 1000
+        cart.add_item_quantity(product=product, quantity=quantity)
+    return cart
+
+
+def create_carts(
+    rng: random.Random,
+    catalog: SupermarketCatalog,
+    products: list[Product],
+    cart_count: int,
+    min_line_count: int = 1,
+    max_line_count: int = 50,
+) -> list[ShoppingCart]:
+    return [
+        create_cart(
+            rng=rng,
+            catalog=catalog,
+            products=products,
+            line_count=rng.randint(min_line_count, max_line_count),
+        )
+        for _ in range(cart_count)
+    ]
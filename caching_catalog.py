@@ -0,0 +1,104 @@
+"""Module that contains a SupermarketCatalog wrapper that caches catalog lookups."""
+
+import time
+from typing import Callable, Optional
+
+from catalog import PriceSnapshot, SupermarketCatalog
+from lru_cache import LruCache
+from model_objects import Product
+
+
+class CachingCatalog(SupermarketCatalog):
+    """Class that represents a read-through cache in front of a SupermarketCatalog.
+
+    Unit prices and catalog memberships are stored in bounded LRU caches whose
+    entries expire after a given time to live. Products that are added through
+    the CachingCatalog are invalidated automatically; changes made directly in the
+    wrapped SupermarketCatalog have to be announced via invalidate().
+    """
+
+    def __init__(
+        self,
+        catalog: SupermarketCatalog,
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.catalog = catalog
+        self._price_cache = LruCache(
+            max_size=max_size, ttl_seconds=ttl_seconds, clock=clock
+        )
+        self._membership_cache = LruCache(
+            max_size=max_size, ttl_seconds=ttl_seconds, clock=clock
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._price_cache.hits + self._membership_cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._price_cache.misses + self._membership_cache.misses
+
+    def invalidate(self, product: Product) -> None:
+        """Removes all cached values for the given Product.
+
+        Args:
+            product (Product): The Product whose cached values are to be removed.
+        """
+
+        self._price_cache.invalidate(key=product)
+        self._membership_cache.invalidate(key=product)
+
+    def clear(self) -> None:
+        self._price_cache.clear()
+        self._membership_cache.clear()
+
+    def add_product(self, product: Product, price_cents: int) -> None:
+        self.catalog.add_product(product=product, price_cents=price_cents)
+        self.invalidate(product=product)
+
+    def get_price_snapshot(self) -> Optional[PriceSnapshot]:
+        # a PriceSnapshot is already in memory and consistent, so it isn't cached
+        return self.catalog.get_price_snapshot()
+
+    def contains_product(self, product: Product) -> bool:
+        # a cached price means that the Product is in the catalog
+        if product in self._price_cache:
+            self._membership_cache.hits += 1
+            return True
+
+        contains_product = self._membership_cache.get(key=product)
+        if contains_product is None:
+            contains_product = self.catalog.contains_product(product=product)
+            self._membership_cache.put(key=product, value=contains_product)
+        return contains_product
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        unit_price_cents = self._price_cache.get(key=product)
+        if unit_price_cents is None:
+            unit_price_cents = self.catalog.get_unit_price_cents(product=product)
+            self._price_cache.put(key=product, value=unit_price_cents)
+        return unit_price_cents
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        unit_prices_cents: dict[Product, int] = {}
+        uncached_products: list[Product] = []
+        for product in products:
+            unit_price_cents = self._price_cache.get(key=product)
+            if unit_price_cents is None:
+                uncached_products.append(product)
+            else:
+                unit_prices_cents[product] = unit_price_cents
+
+        # all Products that are not cached are retrieved with a single lookup
+        if uncached_products:
+            fetched_unit_prices_cents = self.catalog.get_unit_prices_cents(
+                products=uncached_products
+            )
+            for product, unit_price_cents in fetched_unit_prices_cents.items():
+                self._price_cache.put(key=product, value=unit_price_cents)
+            unit_prices_cents.update(fetched_unit_prices_cents)
+
+        # keep the order of the given Products
+        return {product: unit_prices_cents[product] for product in products}
@@ -1,6 +1,83 @@
+import asyncio
+from typing import Optional
+
 from model_objects import Product
 
 
+class PriceSnapshot:
+    """Class that represents the unit prices of a catalog at one point in time.
+
+    Snapshots are immutable, so they can be read by any number of threads without
+    locking. The prices are kept as a shared base dict and a small dict of the
+    prices that changed since the base was created; neither is changed after the
+    snapshot has been created.
+    """
+
+    __slots__ = ("version", "_base_prices_cents", "_changed_prices_cents")
+
+    def __init__(
+        self,
+        version: int,
+        base_prices_cents: dict[Product, int],
+        changed_prices_cents: dict[Product, int],
+    ):
+        self.version = version
+        self._base_prices_cents = base_prices_cents
+        self._changed_prices_cents = changed_prices_cents
+
+    def with_prices(
+        self, products_prices_cents: dict[Product, int], max_changed_products: int
+    ) -> "PriceSnapshot":
+        """Returns a new PriceSnapshot with the next version and the given prices.
+
+        The snapshot itself is not changed. The new snapshot shares the base
+        prices of this one, unless more than max_changed_products prices have
+        changed since the base was created; then a new base is created.
+
+        Args:
+            products_prices_cents (dict[Product, int]): A dict that contains the new
+            unit price in cents for every Product that is to be added or updated.
+            max_changed_products (int): The maximum number of changed prices that
+            are kept apart from the base prices.
+
+        Returns:
+            PriceSnapshot: The new PriceSnapshot.
+        """
+
+        base_prices_cents = self._base_prices_cents
+        changed_prices_cents = {**self._changed_prices_cents, **products_prices_cents}
+        if len(changed_prices_cents) > max_changed_products:
+            base_prices_cents = {**base_prices_cents, **changed_prices_cents}
+            changed_prices_cents = {}
+        return PriceSnapshot(
+            version=self.version + 1,
+            base_prices_cents=base_prices_cents,
+            changed_prices_cents=changed_prices_cents,
+        )
+
+    def __len__(self) -> int:
+        return len(self._base_prices_cents) + sum(
+            product not in self._base_prices_cents
+            for product in self._changed_prices_cents
+        )
+
+    def contains_product(self, product: Product) -> bool:
+        return (
+            product in self._changed_prices_cents or product in self._base_prices_cents
+        )
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        price_cents = self._changed_prices_cents.get(product)
+        if price_cents is None:
+            price_cents = self._base_prices_cents[product]
+        return price_cents
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        return {
+            product: self.get_unit_price_cents(product=product) for product in products
+        }
+
+
 class SupermarketCatalog:
     def add_product(self, product: Product, price_cents: int) -> None:
         raise Exception("cannot be called from a unit test - it accesses the database")
@@ -10,3 +87,71 @@ class SupermarketCatalog:
 
     def get_unit_price_cents(self, product: Product) -> int:
         raise Exception("cannot be called from a unit test - it accesses the database")
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        """Retrieves the unit prices of all given Products.
+
+        By default, get_unit_price_cents is called for every given Product, so that
+        catalogs that only implement it keep working. Implementations that can
+        retrieve many prices with a single lookup should override this method.
+
+        Args:
+            products (list[Product]): The Products whose unit prices are to be retrieved.
+
+        Returns:
+            dict[Product, int]: A dict that contains the unit price in cents for every
+            given Product.
+        """
+
+        return {
+            product: self.get_unit_price_cents(product=product) for product in products
+        }
+
+    def get_price_snapshot(self) -> Optional[PriceSnapshot]:
+        """Returns the current PriceSnapshot of the catalog, if it publishes any.
+
+        Checkouts pin the snapshot once and take all unit prices from it, so that
+        every Receipt is based on a single version of the prices.
+
+        Returns:
+            Optional[PriceSnapshot]: The current PriceSnapshot, or None if the
+            catalog doesn't keep versioned prices.
+        """
+        return None
+
+
+class AsyncSupermarketCatalog(SupermarketCatalog):
+    """SupermarketCatalog that can also be accessed without blocking an event loop.
+
+    Implementations are expected to provide the async methods in addition to the
+    blocking ones, so that the same catalog can be used by ShoppingCarts and by
+    async checkouts.
+    """
+
+    async def contains_product_async(self, product: Product) -> bool:
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
+    async def get_unit_price_cents_async(self, product: Product) -> int:
+        raise Exception("cannot be called from a unit test - it accesses the database")
+
+    async def get_unit_prices_cents_async(
+        self, products: list[Product]
+    ) -> dict[Product, int]:
+        """Retrieves the unit prices of all given Products concurrently.
+
+        By default, get_unit_price_cents_async is awaited for all given Products
+        at the same time. Implementations that can retrieve many prices with a single
+        query should override this method.
+
+        Args:
+            products (list[Product]): The Products whose unit prices are to be retrieved.
+
+        Returns:
+            dict[Product, int]: A dict that contains the unit price in cents for every
+            given Product.
+        """
+
+        unit_prices_cents = await asyncio.gather(
+            *(self.get_unit_price_cents_async(product=product) for product in products)
+        )
+        return dict(zip(products, unit_prices_cents))
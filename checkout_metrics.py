@@ -0,0 +1,95 @@
+"""Module that contains the sinks for timings and counters recorded during checkouts.
+
+The Teller and the Discount creation report how long each stage of a checkout
+takes and how much work was done (catalog calls, evaluated Offers and Bundles).
+By default, everything is reported to a CheckoutMetricsSink that ignores it;
+a RecordingMetricsSink, or a custom subclass that forwards the values to a
+monitoring system, can be used instead.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import AbstractContextManager, nullcontext
+from typing import Optional
+
+# stage names
+CHECKOUT = "checkout"
+CATALOG_LOOKUP = "catalog_lookup"
+RECEIPT_ITEMS = "receipt_items"
+OFFER_DISCOUNTS = "offer_discounts"
+BUNDLE_DISCOUNTS = "bundle_discounts"
+DISCOUNT_SELECTION = "discount_selection"
+
+# counter names
+CATALOG_CALLS = "catalog_calls"
+CATALOG_PRODUCTS = "catalog_products"
+OFFER_EVALUATIONS = "offer_evaluations"
+BUNDLE_EVALUATIONS = "bundle_evaluations"
+
+
+class CheckoutMetricsSink:
+    """Class that receives the metrics of checkouts and ignores them.
+
+    Subclasses override record_timing and increment to store or forward the
+    metrics. The default implementation of measure doesn't even read the clock,
+    so that checkouts without instrumentation don't pay for it.
+    """
+
+    _NULL_CONTEXT = nullcontext()
+
+    def measure(self, stage: str) -> AbstractContextManager:
+        """Returns a context manager that measures the duration of a stage.
+
+        Args:
+            stage (str): The name of the stage that is measured.
+
+        Returns:
+            AbstractContextManager: The context manager that reports the duration
+            of its block via record_timing.
+        """
+        return self._NULL_CONTEXT
+
+    def record_timing(self, stage: str, seconds: float) -> None:
+        pass
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        pass
+
+
+class _StageTimer(AbstractContextManager):
+    def __init__(self, sink: CheckoutMetricsSink, stage: str):
+        self.sink = sink
+        self.stage = stage
+        self.start: Optional[float] = None
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.sink.record_timing(
+            stage=self.stage, seconds=time.perf_counter() - self.start
+        )
+
+
+class RecordingMetricsSink(CheckoutMetricsSink):
+    """Class that keeps all recorded timings and counters in memory."""
+
+    def __init__(self):
+        self.timings: defaultdict[str, list[float]] = defaultdict(list)
+        self.counters: defaultdict[str, int] = defaultdict(int)
+
+    def measure(self, stage: str) -> AbstractContextManager:
+        return _StageTimer(sink=self, stage=stage)
+
+    def record_timing(self, stage: str, seconds: float) -> None:
+        self.timings[stage].append(seconds)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        self.counters[counter] += value
+
+    def get_total_seconds(self, stage: str) -> float:
+        return sum(self.timings.get(stage, []))
+
+
+NULL_METRICS_SINK = CheckoutMetricsSink()
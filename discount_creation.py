@@ -1,11 +1,18 @@
 """Module that contains all logic for creating Discounts."""
 
+import fractions
+import functools
+import threading
 from collections import namedtuple
-from typing import Optional, Union
+from typing import Callable, Optional, Protocol
 
-from catalog import SupermarketCatalog
+from checkout_metrics import (BUNDLE_DISCOUNTS, BUNDLE_EVALUATIONS,
+                              NULL_METRICS_SINK, OFFER_DISCOUNTS,
+                              OFFER_EVALUATIONS, CheckoutMetricsSink)
+from lru_cache import LruCache
 from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
                            SpecialOfferType)
+from quantities import QUANTITY_SCALES, divide_rounded, get_total_price_cents
 
 BundleDiscountItem = namedtuple(
     "BundleDiscountItem", "product quantity unit_price_cents"
@@ -25,144 +32,387 @@ def _verify_optional_argument(
         )
 
 
-def _create_percentage_discount(
-    product: Product, quantity: float, unit_price_cents: int, percentage: float
-) -> Discount:
+class OfferEvaluator(Protocol):
+    """Callable that creates the Discount of a compiled Offer.
+
+    It is called with the purchased Product, its fixed-point quantity (in items or
+    grams) and its unit price in cents, and returns None if the Offer doesn't apply
+    to the quantity.
+    """
+
+    def __call__(
+        self, product: Product, quantity: int, unit_price_cents: int
+    ) -> Optional[Discount]: ...
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_percentage_ratio(percentage: float) -> tuple[int, int]:
+    """Returns a percentage as the numerator and denominator of an integer ratio.
+
+    Percentages are given as floats, but applied with integer arithmetic. They are
+    exact with up to four decimal places.
+
+    Args:
+        percentage (float): The percentage, e.g. 12.5.
+
+    Returns:
+        tuple[int, int]: The numerator and the denominator, e.g. (25, 2).
+    """
+
+    ratio = fractions.Fraction(percentage).limit_denominator(max_denominator=10000)
+    return ratio.numerator, ratio.denominator
+
+
+# evaluators are shared by all Offers with the same parameters
+@functools.lru_cache(maxsize=1024, typed=True)
+def _compile_percentage_discount(percentage: float) -> OfferEvaluator:
     if percentage < 0 or percentage > 100:
         raise ValueError(
             f"Discount percentage must be between 0 and 100, but got {percentage}!"
         )
-    discount_amount = round(quantity * unit_price_cents * percentage / 100)
-    return Discount(
-        product=product,
-        description=f"{percentage}% off",
-        discount_amount_cents=-discount_amount,
+    description = f"{percentage}% off"
+    numerator, denominator = _get_percentage_ratio(percentage=percentage)
+    # the divisor of quantity * unit price * numerator for every ProductUnit
+    divisors = {
+        unit: 100 * denominator * scale for unit, scale in QUANTITY_SCALES.items()
+    }
+
+    def evaluate(
+        product: Product, quantity: int, unit_price_cents: int
+    ) -> Optional[Discount]:
+        discount_amount = divide_rounded(
+            numerator=quantity * unit_price_cents * numerator,
+            denominator=divisors[product.unit],
+        )
+        return Discount(
+            product=product,
+            description=description,
+            discount_amount_cents=-discount_amount,
+        )
+
+    return evaluate
+
+
+@functools.lru_cache(maxsize=1024, typed=True)
+def _compile_x_for_y_discount(x: int, y: int) -> OfferEvaluator:
+    if x <= y:
+        raise ValueError(
+            f"Discounted quantity {x} must be higher than paid quantity {y}!"
+        )
+    description = f"{x} for {y}"
+
+    def evaluate(
+        product: Product, quantity: int, unit_price_cents: int
+    ) -> Optional[Discount]:
+        # only whole items or kilograms count for the Offer
+        quantity_as_int = quantity // QUANTITY_SCALES[product.unit]
+        if quantity_as_int <= y:
+            return None
+
+        discount_amount = get_total_price_cents(
+            product=product, quantity=quantity, unit_price_cents=unit_price_cents
+        ) - (
+            ((quantity_as_int // x) * y * unit_price_cents)
+            + quantity_as_int % x * unit_price_cents
+        )
+        return Discount(
+            product=product,
+            description=description,
+            discount_amount_cents=-discount_amount,
+        )
+
+    return evaluate
+
+
+@functools.lru_cache(maxsize=1024, typed=True)
+def _compile_x_for_amount_discount(x: int, paid_amount_per_x: int) -> OfferEvaluator:
+    description = f"{x} for {paid_amount_per_x}"
+
+    def evaluate(
+        product: Product, quantity: int, unit_price_cents: int
+    ) -> Optional[Discount]:
+        quantity_as_int = quantity // QUANTITY_SCALES[product.unit]
+        if quantity_as_int < x:
+            return None
+
+        # the unit price is only known at checkout, so this can't be compiled
+        if paid_amount_per_x >= unit_price_cents * x:
+            raise ValueError(
+                f'Discount "{x} for {paid_amount_per_x}" must be lower than {x} times the unit price of {unit_price_cents} (= {unit_price_cents * x}) by itself!'
+            )
+        total = (
+            paid_amount_per_x * (quantity_as_int // x)
+            + quantity_as_int % x * unit_price_cents
+        )
+        discount_amount = (
+            get_total_price_cents(
+                product=product, quantity=quantity, unit_price_cents=unit_price_cents
+            )
+            - total
+        )
+        return Discount(
+            product=product,
+            description=description,
+            discount_amount_cents=-discount_amount,
+        )
+
+    return evaluate
+
+
+def _create_percentage_discount(
+    product: Product, quantity: int, unit_price_cents: int, percentage: float
+) -> Discount:
+    evaluate = _compile_percentage_discount(percentage=percentage)
+    return evaluate(
+        product=product, quantity=quantity, unit_price_cents=unit_price_cents
     )
 
 
 def _create_x_for_y_discount(
     product: Product,
-    quantity: Union[int, float],
+    quantity: int,
     unit_price_cents: int,
     x: int,
     y: int,
 ) -> Optional[Discount]:
-    quantity_as_int = int(quantity)
-    if quantity_as_int <= y:
-        return None
-
-    if x <= y:
-        raise ValueError(
-            f"Discounted quantity {x} must be higher than paid quantity {y}!"
-        )
-    discount_amount = round(quantity * unit_price_cents) - (
-        ((quantity_as_int // x) * y * unit_price_cents)
-        + quantity_as_int % x * unit_price_cents
-    )
-    return Discount(
-        product=product,
-        description=f"{x} for {y}",
-        discount_amount_cents=-discount_amount,
+    evaluate = _compile_x_for_y_discount(x=x, y=y)
+    return evaluate(
+        product=product, quantity=quantity, unit_price_cents=unit_price_cents
     )
 
 
 def _create_x_for_amount_discount(
     product: Product,
-    quantity: Union[int, float],
+    quantity: int,
     unit_price_cents: int,
     x: int,
     paid_amount_per_x: int,
 ) -> Optional[Discount]:
-    quantity_as_int = int(quantity)
-    if quantity_as_int < x:
-        return None
+    evaluate = _compile_x_for_amount_discount(x=x, paid_amount_per_x=paid_amount_per_x)
+    return evaluate(
+        product=product, quantity=quantity, unit_price_cents=unit_price_cents
+    )
+
 
-    if paid_amount_per_x >= unit_price_cents * x:
+def _get_verified_optional_argument(offer: Offer) -> float:
+    _verify_optional_argument(
+        optional_argument=offer.optional_argument, offer_type=offer.offer_type
+    )
+    return offer.optional_argument
+
+
+def _get_verified_offer_quantity(offer: Offer, name: str) -> int:
+    quantity = getattr(offer, name)
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
         raise ValueError(
-            f'Discount "{x} for {paid_amount_per_x}" must be lower than {x} times the unit price of {unit_price_cents} (= {unit_price_cents * x}) by itself!'
+            f"{name} must be a positive integer for Offer of type {offer.offer_type}, but got {quantity}!"
         )
-    total = (
-        paid_amount_per_x * (quantity_as_int // x)
-        + quantity_as_int % x * unit_price_cents
-    )
-    discount_amount = round(unit_price_cents * quantity) - total
-    return Discount(
-        product=product,
-        description=f"{x} for {paid_amount_per_x}",
-        discount_amount_cents=-discount_amount,
-    )
+    return quantity
+
+
+# compiles the Offers of every SpecialOfferType into an OfferEvaluator
+_OFFER_COMPILERS: dict[SpecialOfferType, Callable[[Offer], OfferEvaluator]] = {
+    SpecialOfferType.THREE_FOR_TWO: lambda offer: _compile_x_for_y_discount(x=3, y=2),
+    SpecialOfferType.PERCENT_DISCOUNT: lambda offer: _compile_percentage_discount(
+        percentage=_get_verified_optional_argument(offer=offer)
+    ),
+    SpecialOfferType.TWO_FOR_AMOUNT: lambda offer: _compile_x_for_amount_discount(
+        x=2, paid_amount_per_x=_get_verified_optional_argument(offer=offer)
+    ),
+    SpecialOfferType.FIVE_FOR_AMOUNT: lambda offer: _compile_x_for_amount_discount(
+        x=5, paid_amount_per_x=_get_verified_optional_argument(offer=offer)
+    ),
+    SpecialOfferType.X_FOR_Y: lambda offer: _compile_x_for_y_discount(
+        x=_get_verified_offer_quantity(offer=offer, name="x"),
+        y=_get_verified_offer_quantity(offer=offer, name="y"),
+    ),
+    SpecialOfferType.X_FOR_AMOUNT: lambda offer: _compile_x_for_amount_discount(
+        x=_get_verified_offer_quantity(offer=offer, name="x"),
+        paid_amount_per_x=_get_verified_optional_argument(offer=offer),
+    ),
+}
+
+
+def compile_offer(offer: Offer) -> OfferEvaluator:
+    """Validates an Offer and compiles it into an OfferEvaluator.
+
+    Everything that only depends on the Offer itself is checked here, so that
+    invalid Offers are rejected before any checkout, and the OfferEvaluator only
+    has to do arithmetic. Changes to the Offer after compiling it don't affect
+    the OfferEvaluator.
+
+    Args:
+        offer (Offer): The Offer that is to be compiled.
+
+    Raises:
+        ValueError: Raised if the Offer has an unknown SpecialOfferType or an
+        invalid optional_argument.
+
+    Returns:
+        OfferEvaluator: The callable that creates the Discounts of the Offer.
+    """
+
+    compile_offer_of_type = _OFFER_COMPILERS.get(offer.offer_type)
+    if compile_offer_of_type is None:
+        raise ValueError(f"Unexpected value for offer.offer_type: {offer.offer_type}!")
+    return compile_offer_of_type(offer)
 
 
 def _create_discount_from_offer(
-    product: Product, quantity: float, offer: Offer, unit_price_cents: int
+    product: Product, quantity: int, offer: Offer, unit_price_cents: int
 ) -> Optional[Discount]:
-    if offer.offer_type == SpecialOfferType.THREE_FOR_TWO:
-        return _create_x_for_y_discount(
-            product=product,
-            quantity=quantity,
-            unit_price_cents=unit_price_cents,
-            x=3,
-            y=2,
-        )
-    elif offer.offer_type == SpecialOfferType.PERCENT_DISCOUNT:
-        _verify_optional_argument(
-            optional_argument=offer.optional_argument,
-            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
-        )
-        return _create_percentage_discount(
-            product=product,
-            quantity=quantity,
-            unit_price_cents=unit_price_cents,
-            percentage=offer.optional_argument,
-        )
-    elif offer.offer_type == SpecialOfferType.TWO_FOR_AMOUNT:
-        _verify_optional_argument(
-            optional_argument=offer.optional_argument,
-            offer_type=SpecialOfferType.TWO_FOR_AMOUNT,
-        )
-        return _create_x_for_amount_discount(
-            product=product,
-            quantity=quantity,
-            unit_price_cents=unit_price_cents,
-            x=2,
-            paid_amount_per_x=offer.optional_argument,
-        )
-    elif offer.offer_type == SpecialOfferType.FIVE_FOR_AMOUNT:
-        _verify_optional_argument(
-            optional_argument=offer.optional_argument,
-            offer_type=SpecialOfferType.FIVE_FOR_AMOUNT,
-        )
-        return _create_x_for_amount_discount(
+    evaluate = compile_offer(offer=offer)
+    return evaluate(
+        product=product, quantity=quantity, unit_price_cents=unit_price_cents
+    )
+
+
+# marks a missing cache entry, because None is a valid result of an Offer
+_NOT_CACHED = object()
+
+
+class OfferDiscountCache:
+    """Class that represents a bounded cache of Discounts created from Offers.
+
+    The Discount of an Offer only depends on the Offer, the purchased quantity and
+    the unit price of the Product, so it is cached under these three values. Offers
+    are compared by identity, so an Offer that is changed in place has to be
+    invalidated via invalidate_offer. The cached Discounts are shared between all
+    Receipts that use them and must not be changed. The cache may be shared by
+    several threads.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self._cache = LruCache(max_size=max_size)
+        # the Offers that may have cached Discounts, so that invalidating any other
+        # Offer doesn't have to check every entry
+        self._cached_offers: set[Offer] = set()
+        # adding an entry and recording its Offer happen together, so that an
+        # invalidation in another thread can't remove the record but miss the entry
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    @property
+    def hit_rate(self) -> float:
+        return self._cache.hit_rate
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get_discount(
+        self,
+        product: Product,
+        quantity: int,
+        offer: Offer,
+        unit_price_cents: int,
+        evaluate: Optional[OfferEvaluator] = None,
+    ) -> Optional[Discount]:
+        """Returns the Discount of an Offer, creating it only if it's not cached.
+
+        Args:
+            product (Product): The purchased Product.
+            quantity (int): The fixed-point quantity in which the Product is
+            purchased, i.e. in items or grams.
+            offer (Offer): The Offer for the Product.
+            unit_price_cents (int): The unit price of the Product in cents.
+            evaluate (Optional[OfferEvaluator]): The compiled Offer. If it's not
+            given, the Offer is compiled whenever its Discount is not cached.
+
+        Returns:
+            Optional[Discount]: The Discount, or None if the Offer doesn't apply to
+            the quantity.
+        """
+
+        key = (offer, quantity, unit_price_cents)
+        discount = self._cache.get(key=key, default=_NOT_CACHED)
+        if discount is _NOT_CACHED:
+            if evaluate is None:
+                evaluate = compile_offer(offer=offer)
+            discount = evaluate(
+                product=product, quantity=quantity, unit_price_cents=unit_price_cents
+            )
+            with self._lock:
+                self._cache.put(key=key, value=discount)
+                self._cached_offers.add(offer)
+        return discount
+
+    def invalidate_offer(self, offer: Offer) -> None:
+        with self._lock:
+            if offer not in self._cached_offers:
+                return
+            self._cached_offers.discard(offer)
+            self._cache.invalidate_matching(predicate=lambda key: key[0] is offer)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cached_offers.clear()
+
+
+def _evaluate_offer(
+    product: Product,
+    quantity: int,
+    offer: Offer,
+    unit_price_cents: int,
+    evaluate: Optional[OfferEvaluator],
+    offer_discount_cache: Optional[OfferDiscountCache],
+) -> Optional[Discount]:
+    if offer_discount_cache is not None:
+        return offer_discount_cache.get_discount(
             product=product,
             quantity=quantity,
+            offer=offer,
             unit_price_cents=unit_price_cents,
-            x=5,
-            paid_amount_per_x=offer.optional_argument,
+            evaluate=evaluate,
         )
-    else:
-        raise ValueError(f"Unexpected value for offer.offer_type: {offer.offer_type}!")
+    if evaluate is None:
+        evaluate = compile_offer(offer=offer)
+    return evaluate(
+        product=product, quantity=quantity, unit_price_cents=unit_price_cents
+    )
 
 
 def _create_discounts_from_offers(
-    product_quantities_map: dict[Product, float],
+    product_quantities_map: dict[Product, int],
     product_offers_map: dict[Product, Offer],
-    catalog: SupermarketCatalog,
+    unit_prices_cents: dict[Product, int],
+    metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
+    offer_discount_cache: Optional[OfferDiscountCache] = None,
+    offer_evaluators: Optional[dict[Offer, OfferEvaluator]] = None,
 ) -> list[Discount]:
+    if offer_evaluators is None:
+        offer_evaluators = {}
     discounts: list[Discount] = []
+    offer_evaluations = 0
     for product, quantity in product_quantities_map.items():
         if product not in product_offers_map.keys():
             continue
 
+        offer_evaluations += 1
         offer = product_offers_map[product]
-        unit_price_cents = catalog.get_unit_price_cents(product)
-        discount = _create_discount_from_offer(
+        unit_price_cents = unit_prices_cents[product]
+        discount = _evaluate_offer(
             product=product,
             quantity=quantity,
             offer=offer,
             unit_price_cents=unit_price_cents,
+            evaluate=offer_evaluators.get(offer),
+            offer_discount_cache=offer_discount_cache,
         )
         if discount:
             discounts.append(discount)
+    metrics_sink.increment(counter=OFFER_EVALUATIONS, value=offer_evaluations)
     return discounts
 
 
@@ -177,14 +427,18 @@ def _create_discounts_from_bundle(
             f"lowest_purchase_quantity must be greater than 0, but it's {lowest_purchase_quantity}!"
         )
 
+    numerator, denominator = _get_percentage_ratio(
+        percentage=bundle.discount_percentage
+    )
     for bundle_discount_item in bundle_discount_items:
         quantity = bundle_discount_item.quantity
         unit_price_cents = bundle_discount_item.unit_price_cents
         discount_amount = quantity * unit_price_cents - (
-            round(
-                lowest_purchase_quantity
-                * ((100 - bundle.discount_percentage) / 100)
-                * unit_price_cents
+            divide_rounded(
+                numerator=lowest_purchase_quantity
+                * (100 * denominator - numerator)
+                * unit_price_cents,
+                denominator=100 * denominator,
             )
             + (quantity - lowest_purchase_quantity) * unit_price_cents
         )
@@ -199,11 +453,13 @@ def _create_discounts_from_bundle(
 
 
 def _create_discounts_from_bundles(
-    product_quantities_map: dict[Product, float],
+    product_quantities_map: dict[Product, int],
     bundles: list[Bundle],
-    catalog: SupermarketCatalog,
+    unit_prices_cents: dict[Product, int],
+    metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
 ) -> list[Discount]:
     discounts: list[Discount] = []
+    metrics_sink.increment(counter=BUNDLE_EVALUATIONS, value=len(bundles))
     for bundle in bundles:
         found_unpurchased_bundle_product = False
         lowest_purchase_quantity: int = -1
@@ -228,7 +484,7 @@ def _create_discounts_from_bundles(
                 lowest_purchase_quantity = product_purchase_quantity
 
         if found_unpurchased_bundle_product:
-            break
+            continue
 
         discounts += _create_discounts_from_bundle(
             bundle=bundle,
@@ -237,7 +493,7 @@ def _create_discounts_from_bundles(
                 BundleDiscountItem(
                     product=product,
                     quantity=product_quantities_map.get(product),
-                    unit_price_cents=catalog.get_unit_price_cents(product),
+                    unit_price_cents=unit_prices_cents[product],
                 )
                 for product in bundle.products
             ],
@@ -246,10 +502,13 @@ def _create_discounts_from_bundles(
 
 
 def create_discounts(
-    product_quantities_map: dict[Product, float],
+    product_quantities_map: dict[Product, int],
     product_offers_map: dict[Product, Offer],
     bundles: list[Bundle],
-    catalog: SupermarketCatalog,
+    unit_prices_cents: dict[Product, int],
+    metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
+    offer_discount_cache: Optional[OfferDiscountCache] = None,
+    offer_evaluators: Optional[dict[Offer, OfferEvaluator]] = None,
 ) -> list[Discount]:
     """Creates Discounts on Products from given Offers and Bundles and returns them.
 
@@ -257,27 +516,49 @@ def create_discounts(
     Discounts that should be given. This depends not just on the Products themselves,
     but also on the quantities in which each Product is bought.
 
+    This is the path for a single Offer per Product, on which every applicable Offer
+    and Bundle Discount is given and no Discounts are selected. Tellers can have
+    several Offers per Product and use discount_selection.create_best_discounts
+    instead.
+
     Args:
-        product_quantities_map (dict[Product, float]): A dict that contains the
-        quantities in which every Product is to be bought.
+        product_quantities_map (dict[Product, int]): A dict that contains the
+        fixed-point quantities (in items or grams) in which every Product is to be
+        bought.
         product_offers_map (dict[Product, Offer]): A dict that contains the Offers
         for each Product that is to be bought.
         bundles (list[Bundle]): All Bundles that are to be used for Discount creation.
-        catalog (SupermarketCatalog): The SupermarketCatalog to use to retrieve item
-        prices for every Product.
+        unit_prices_cents (dict[Product, int]): A dict that contains the unit price
+        in cents for every Product that is to be bought. The prices are expected to
+        have been retrieved from the SupermarketCatalog beforehand, so that no
+        further lookups are needed while creating Discounts.
+        metrics_sink (CheckoutMetricsSink): The sink that receives the durations of
+        the Offer and Bundle stages and the number of evaluated Offers and Bundles.
+        Defaults to a sink that ignores them.
+        offer_discount_cache (Optional[OfferDiscountCache]): The cache from which
+        the Discounts of Offers are taken, if given.
+        offer_evaluators (Optional[dict[Offer, OfferEvaluator]]): The compiled
+        Offers, e.g. from compile_offer. Offers without an
+        OfferEvaluator are compiled during the Discount creation.
 
     Returns:
         list[Discount]: All Discounts that have been created for all Products.
     """
 
-    discounts = _create_discounts_from_offers(
-        product_quantities_map=product_quantities_map,
-        product_offers_map=product_offers_map,
-        catalog=catalog,
-    )
-    discounts += _create_discounts_from_bundles(
-        product_quantities_map=product_quantities_map,
-        bundles=bundles,
-        catalog=catalog,
-    )
+    with metrics_sink.measure(stage=OFFER_DISCOUNTS):
+        discounts = _create_discounts_from_offers(
+            product_quantities_map=product_quantities_map,
+            product_offers_map=product_offers_map,
+            unit_prices_cents=unit_prices_cents,
+            metrics_sink=metrics_sink,
+            offer_discount_cache=offer_discount_cache,
+            offer_evaluators=offer_evaluators,
+        )
+    with metrics_sink.measure(stage=BUNDLE_DISCOUNTS):
+        discounts += _create_discounts_from_bundles(
+            product_quantities_map=product_quantities_map,
+            bundles=bundles,
+            unit_prices_cents=unit_prices_cents,
+            metrics_sink=metrics_sink,
+        )
     return discounts
@@ -0,0 +1,309 @@
+"""Module that contains the logic for selecting the best Discounts of overlapping promotions.
+
+A Product may have several Offers and be part of several Bundles. Every purchased
+Product gets at most one Discount, either from one of its Offers or from one of
+its Bundles, and the Discounts are selected so that the customer saves as much
+as possible:
+    - for every Product, only the Offer with the highest Discount is considered
+    - a Bundle is only worth applying if its Discounts are higher than the
+      Discounts of the best Offers of all its Products
+    - Bundles that share Products exclude each other; the best combination of
+      them is searched exactly for every group of Bundles that share Products,
+      and greedily for groups that are too big for an exact search
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Optional
+
+from checkout_metrics import (BUNDLE_DISCOUNTS, BUNDLE_EVALUATIONS,
+                              DISCOUNT_SELECTION, NULL_METRICS_SINK,
+                              OFFER_DISCOUNTS, OFFER_EVALUATIONS,
+                              CheckoutMetricsSink)
+from discount_creation import (OfferDiscountCache, OfferEvaluator,
+                               _create_discounts_from_bundles, _evaluate_offer)
+from model_objects import Bundle, Discount, Offer, Product
+
+# groups of overlapping Bundles up to this size are searched exactly
+MAX_EXACT_GROUP_SIZE = 18
+
+
+def _get_savings_cents(discounts: list[Discount]) -> int:
+    return -sum(discount.discount_amount_cents for discount in discounts)
+
+
+def get_best_offer_discount(
+    product: Product,
+    quantity: int,
+    offers: Sequence[Offer],
+    unit_price_cents: int,
+    offer_evaluators: Optional[Mapping[Offer, OfferEvaluator]] = None,
+    offer_discount_cache: Optional[OfferDiscountCache] = None,
+) -> Optional[Discount]:
+    """Returns the highest Discount of the given Offers for a Product.
+
+    If several Offers lead to the same Discount amount, the first of them wins.
+
+    Args:
+        product (Product): The purchased Product.
+        quantity (int): The fixed-point quantity in which the Product is purchased,
+        i.e. in items or grams.
+        offers (Sequence[Offer]): All Offers for the Product.
+        unit_price_cents (int): The unit price of the Product in cents.
+        offer_evaluators (Optional[Mapping[Offer, OfferEvaluator]]): The compiled
+        Offers. Offers without an OfferEvaluator are compiled on the fly.
+        offer_discount_cache (Optional[OfferDiscountCache]): The cache from which
+        the Discounts of Offers are taken, if given.
+
+    Returns:
+        Optional[Discount]: The highest Discount, or None if no Offer applies.
+    """
+
+    if offer_evaluators is None:
+        offer_evaluators = {}
+    best_discount: Optional[Discount] = None
+    for offer in offers:
+        discount = _evaluate_offer(
+            product=product,
+            quantity=quantity,
+            offer=offer,
+            unit_price_cents=unit_price_cents,
+            evaluate=offer_evaluators.get(offer),
+            offer_discount_cache=offer_discount_cache,
+        )
+        if discount is not None and (
+            best_discount is None
+            or discount.discount_amount_cents < best_discount.discount_amount_cents
+        ):
+            best_discount = discount
+    return best_discount
+
+
+def _group_overlapping_bundles(bundles: list[Bundle]) -> list[list[Bundle]]:
+    # union-find over the Bundles, joining all Bundles that share a Product
+    parents = list(range(len(bundles)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    first_bundle_indices: dict[Product, int] = {}
+    for index, bundle in enumerate(bundles):
+        for product in bundle.products:
+            other_index = first_bundle_indices.setdefault(product, index)
+            parents[find(other_index)] = find(index)
+
+    groups: dict[int, list[Bundle]] = {}
+    for index, bundle in enumerate(bundles):
+        groups.setdefault(find(index), []).append(bundle)
+    return list(groups.values())
+
+
+def _select_bundles_exactly(
+    bundles: list[Bundle], gains_cents: dict[Bundle, int]
+) -> list[Bundle]:
+    # branch and bound: Bundles are tried in the order of their gains, and a branch
+    # is cut as soon as even taking all remaining Bundles can't beat the best
+    # selection found so far
+    bundles = sorted(bundles, key=lambda bundle: gains_cents[bundle], reverse=True)
+    remaining_gains_cents = [0] * (len(bundles) + 1)
+    for index in range(len(bundles) - 1, -1, -1):
+        remaining_gains_cents[index] = (
+            remaining_gains_cents[index + 1] + gains_cents[bundles[index]]
+        )
+    bundle_products = [frozenset(bundle.products) for bundle in bundles]
+
+    best_gain_cents = -1
+    best_selection: list[Bundle] = []
+    selection: list[Bundle] = []
+
+    def search(index: int, used_products: frozenset, gain_cents: int) -> None:
+        nonlocal best_gain_cents, best_selection
+        if gain_cents + remaining_gains_cents[index] <= best_gain_cents:
+            return
+        if index == len(bundles):
+            best_gain_cents = gain_cents
+            best_selection = list(selection)
+            return
+
+        if used_products.isdisjoint(bundle_products[index]):
+            selection.append(bundles[index])
+            search(
+                index=index + 1,
+                used_products=used_products | bundle_products[index],
+                gain_cents=gain_cents + gains_cents[bundles[index]],
+            )
+            selection.pop()
+        search(index=index + 1, used_products=used_products, gain_cents=gain_cents)
+
+    search(index=0, used_products=frozenset(), gain_cents=0)
+    return best_selection
+
+
+def _select_bundles_greedily(
+    bundles: list[Bundle], gains_cents: dict[Bundle, int], used_products: set[Product]
+) -> list[Bundle]:
+    selection: list[Bundle] = []
+    for bundle in sorted(bundles, key=lambda bundle: gains_cents[bundle], reverse=True):
+        if used_products.isdisjoint(bundle.products):
+            selection.append(bundle)
+            used_products.update(bundle.products)
+    return selection
+
+
+def select_bundles(
+    bundle_discounts: dict[Bundle, list[Discount]],
+    offer_discounts: dict[Product, Discount],
+) -> set[Bundle]:
+    """Selects the Bundles that are to be applied instead of the Offers of their Products.
+
+    Args:
+        bundle_discounts (dict[Bundle, list[Discount]]): The Discounts of every
+        Bundle whose Products have all been purchased.
+        offer_discounts (dict[Product, Discount]): The best Discount of the Offers
+        of every purchased Product that has an applicable Offer.
+
+    Returns:
+        set[Bundle]: The Bundles that are to be applied. No two of them share a
+        Product, and together with the Offers of all other Products, they lead to
+        the highest savings.
+    """
+
+    gains_cents: dict[Bundle, int] = {}
+    for bundle, discounts in bundle_discounts.items():
+        gains_cents[bundle] = _get_savings_cents(discounts=discounts) - sum(
+            -offer_discounts[product].discount_amount_cents
+            for product in bundle.products
+            if product in offer_discounts
+        )
+
+    selection: list[Bundle] = []
+    for group in _group_overlapping_bundles(
+        bundles=[bundle for bundle, gain in gains_cents.items() if gain > 0]
+    ):
+        if len(group) == 1:
+            selection += group
+        elif len(group) <= MAX_EXACT_GROUP_SIZE:
+            selection += _select_bundles_exactly(bundles=group, gains_cents=gains_cents)
+        else:
+            selection += _select_bundles_greedily(
+                bundles=group, gains_cents=gains_cents, used_products=set()
+            )
+
+    # Bundles that don't save anything over the Offers are still applied if they
+    # don't conflict with others, like when there is no overlap at all
+    used_products = {product for bundle in selection for product in bundle.products}
+    selection += _select_bundles_greedily(
+        bundles=[bundle for bundle, gain in gains_cents.items() if gain == 0],
+        gains_cents=gains_cents,
+        used_products=used_products,
+    )
+    return set(selection)
+
+
+def create_best_discounts(
+    product_quantities_map: dict[Product, int],
+    product_offers_map: Mapping[Product, Sequence[Offer]],
+    bundles: list[Bundle],
+    unit_prices_cents: dict[Product, int],
+    metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
+    offer_discount_cache: Optional[OfferDiscountCache] = None,
+    offer_evaluators: Optional[Mapping[Offer, OfferEvaluator]] = None,
+) -> list[Discount]:
+    """Creates the best Discounts for Products that may have overlapping promotions.
+
+    Every purchased Product gets at most one Discount, either from the best of its
+    Offers or from one of the given Bundles, so that the total savings are as high
+    as possible. Without overlapping promotions, the result is the same as the
+    one of discount_creation.create_discounts.
+
+    Args:
+        product_quantities_map (dict[Product, int]): A dict that contains the
+        quantities in which every Product is to be bought.
+        product_offers_map (Mapping[Product, Sequence[Offer]]): A mapping that
+        contains all Offers for each Product that is to be bought.
+        bundles (list[Bundle]): All Bundles that are to be considered.
+        unit_prices_cents (dict[Product, int]): A dict that contains the unit price
+        in cents for every Product that is to be bought.
+        metrics_sink (CheckoutMetricsSink): The sink that receives the durations of
+        the Offer, Bundle and selection stages and the number of evaluated Offers
+        and Bundles. Defaults to a sink that ignores them.
+        offer_discount_cache (Optional[OfferDiscountCache]): The cache from which
+        the Discounts of Offers are taken, if given.
+        offer_evaluators (Optional[Mapping[Offer, OfferEvaluator]]): The compiled
+        Offers. Offers without an OfferEvaluator are compiled on the fly.
+
+    Returns:
+        list[Discount]: The selected Discounts. The Discounts of Offers come first,
+        in the order of the purchased Products, followed by the Discounts of the
+        selected Bundles, in the order of the given Bundles.
+    """
+
+    with metrics_sink.measure(stage=OFFER_DISCOUNTS):
+        offer_discounts: dict[Product, Discount] = {}
+        offer_evaluations = 0
+        for product, quantity in product_quantities_map.items():
+            offers = product_offers_map.get(product)
+            if not offers:
+                continue
+
+            offer_evaluations += len(offers)
+            discount = get_best_offer_discount(
+                product=product,
+                quantity=quantity,
+                offers=offers,
+                unit_price_cents=unit_prices_cents[product],
+                offer_evaluators=offer_evaluators,
+                offer_discount_cache=offer_discount_cache,
+            )
+            if discount is not None:
+                offer_discounts[product] = discount
+        metrics_sink.increment(counter=OFFER_EVALUATIONS, value=offer_evaluations)
+
+    return _add_best_bundle_discounts(
+        product_quantities_map=product_quantities_map,
+        offer_discounts=offer_discounts,
+        bundles=bundles,
+        unit_prices_cents=unit_prices_cents,
+        metrics_sink=metrics_sink,
+    )
+
+
+def _add_best_bundle_discounts(
+    product_quantities_map: dict[Product, int],
+    offer_discounts: dict[Product, Discount],
+    bundles: list[Bundle],
+    unit_prices_cents: dict[Product, int],
+    metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
+) -> list[Discount]:
+    # evaluates the Bundles and selects them against the best Discounts of the
+    # Offers, which are given in the order of the purchased Products
+    with metrics_sink.measure(stage=BUNDLE_DISCOUNTS):
+        metrics_sink.increment(counter=BUNDLE_EVALUATIONS, value=len(bundles))
+        bundle_discounts: dict[Bundle, list[Discount]] = {}
+        for bundle in bundles:
+            discounts = _create_discounts_from_bundles(
+                product_quantities_map=product_quantities_map,
+                bundles=[bundle],
+                unit_prices_cents=unit_prices_cents,
+            )
+            if discounts:
+                bundle_discounts[bundle] = discounts
+
+    with metrics_sink.measure(stage=DISCOUNT_SELECTION):
+        selected_bundles = select_bundles(
+            bundle_discounts=bundle_discounts, offer_discounts=offer_discounts
+        )
+        bundle_products = {
+            product for bundle in selected_bundles for product in bundle.products
+        }
+        discounts = [
+            discount
+            for product, discount in offer_discounts.items()
+            if product not in bundle_products
+        ]
+        for bundle in bundle_discounts:
+            if bundle in selected_bundles:
+                discounts += bundle_discounts[bundle]
+    return discounts
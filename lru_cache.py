@@ -0,0 +1,124 @@
+"""Module that contains a small, bounded cache used to avoid repeated expensive lookups."""
+
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Hashable, Optional
+
+CacheEntry = namedtuple("CacheEntry", "value expires_at")
+
+
+class LruCache:
+    """Class that represents a bounded least-recently-used cache.
+
+    When the cache is full, the least recently used entry is evicted to make room
+    for a new one. Optionally, every entry expires after a given time to live.
+    The cache counts hits, misses and evictions, so that its size can be tuned.
+
+    The cache may be shared by several threads without locking: an entry that
+    another thread evicts or invalidates at the same time is treated as missing,
+    and the counters are only approximate then.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive integer, but got {max_size}!")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError(f"ttl_seconds must be positive, but got {ttl_seconds}!")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_expired(entry=entry)
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= self.clock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for the given key.
+
+        Expired entries are removed and treated like missing entries.
+
+        Args:
+            key (Hashable): The key to look up.
+            default (Any): The value to return if there is no valid entry for the key.
+
+        Returns:
+            Any: The cached value, or the default if there is no valid entry.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if self._is_expired(entry=entry):
+            self._entries.pop(key, None)
+            self.misses += 1
+            return default
+
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            # the entry has been removed by another thread in the meantime
+            pass
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = self.clock() + self.ttl_seconds
+        self._entries[key] = CacheEntry(value=value, expires_at=expires_at)
+        try:
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        except KeyError:
+            # another thread has removed the entry, or evicted the oldest one first
+            pass
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes all entries whose key matches the given predicate.
+
+        This has to check every entry, so it is meant for rare, bulk invalidations.
+
+        Args:
+            predicate (Callable[[Hashable], bool]): Returns True for every key whose
+            entry is to be removed.
+
+        Returns:
+            int: The number of removed entries.
+        """
+
+        # the keys are copied first, because other threads may change the entries
+        keys = [key for key in list(self._entries) if predicate(key)]
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
@@ -1,5 +1,8 @@
 """Module that contains all the model classes for the project."""
 
+import itertools
+import threading
+import weakref
 from enum import Enum
 from typing import Optional
 
@@ -8,36 +11,136 @@ class ProductUnit(Enum):
     EACH = 1
     KILO = 2
 
+    # members are singletons, so they are hashed by identity, which is much faster
+    # than hashing their names, as Enum does by default
+    __hash__ = object.__hash__
+
 
 class Product:
-    def __init__(self, name: str, unit: ProductUnit):
-        self.name = name
-        self.unit = unit
+    """Class that represents a Product that can be sold.
+
+    Products are interned: creating a Product with the same name and ProductUnit
+    as an existing Product returns the existing object. Every Product therefore
+    exists only once, has a unique integer product_id, and is hashed by that id,
+    which makes Products cheap to use as dict keys. Products are immutable.
+
+    The registry only keeps weak references, so a Product is freed as soon as it
+    isn't used anymore. Creating it again afterwards gives it a new product_id.
+    """
+
+    __slots__ = ("name", "unit", "product_id", "__weakref__")
+
+    def __new__(cls, name: str, unit: ProductUnit) -> "Product":
+        return product_registry.intern(name=name, unit=unit)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"Can't set {name} of {self} - Products are immutable!")
+
+    def __reduce__(self):
+        # unpickled Products are interned in the registry of the receiving process
+        return Product, (self.name, self.unit)
 
     def __str__(self):
         return f"Product(name={self.name})"
 
+    def __hash__(self) -> int:
+        return self.product_id
+
+
+class _ProductRegistry:
+    """Class that keeps exactly one Product object for every name and ProductUnit.
+
+    There is a single instance, product_registry, so that every Product is
+    canonical and every product_id is unique within the process. Products are
+    referenced weakly, and product_ids are never reused.
+    """
+
+    def __init__(self):
+        # one dict per ProductUnit, so that no key tuple has to be kept per Product
+        self._products_by_unit_and_name: dict[
+            ProductUnit, weakref.WeakValueDictionary[str, Product]
+        ] = {unit: weakref.WeakValueDictionary() for unit in ProductUnit}
+        self._product_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(
+            len(products_by_name)
+            for products_by_name in self._products_by_unit_and_name.values()
+        )
+
+    def intern(self, name: str, unit: ProductUnit) -> Product:
+        """Returns the Product with the given name and ProductUnit.
+
+        If there is no such Product yet, it is created and given the next free
+        product_id.
+
+        Args:
+            name (str): The name of the Product.
+            unit (ProductUnit): The ProductUnit of the Product.
+
+        Returns:
+            Product: The only Product object with the given name and ProductUnit.
+        """
+
+        products_by_name = self._products_by_unit_and_name[unit]
+        product = products_by_name.get(name)
+        if product is not None:
+            return product
+
+        with self._lock:
+            product = products_by_name.get(name)
+            if product is None:
+                product = object.__new__(Product)
+                object.__setattr__(product, "name", name)
+                object.__setattr__(product, "unit", unit)
+                object.__setattr__(product, "product_id", next(self._product_ids))
+                products_by_name[name] = product
+        return product
+
+
+product_registry = _ProductRegistry()
+
 
 class SpecialOfferType(Enum):
     THREE_FOR_TWO = 1
     PERCENT_DISCOUNT = 2
     TWO_FOR_AMOUNT = 3
     FIVE_FOR_AMOUNT = 4
+    # buy x, pay for y - the quantities are given by Offer.x and Offer.y
+    X_FOR_Y = 5
+    # buy x for the amount in optional_argument - x is given by Offer.x
+    X_FOR_AMOUNT = 6
 
 
 class Offer:
+    """Class that represents a special Offer for a Product.
+
+    Depending on the SpecialOfferType, the Offer is parameterized by
+    optional_argument (a percentage or an amount in cents) and by the quantities
+    x and y, e.g. an Offer of type X_FOR_Y with x=4 and y=3 is a "4 for 3" Offer.
+    """
+
+    __slots__ = ("offer_type", "product", "optional_argument", "x", "y")
+
     def __init__(
         self,
         offer_type: SpecialOfferType,
         product: Product,
         optional_argument: Optional[float],
+        x: Optional[int] = None,
+        y: Optional[int] = None,
     ):
         self.offer_type = offer_type
         self.product = product
         self.optional_argument = optional_argument
+        self.x = x
+        self.y = y
 
 
 class Discount:
+    __slots__ = ("product", "description", "discount_amount_cents")
+
     def __init__(self, product: Product, description: str, discount_amount_cents: int):
         self.product = product
         self.description = description
@@ -45,6 +148,8 @@ class Discount:
 
 
 class Bundle:
+    __slots__ = ("products", "discount_percentage")
+
     def __init__(self, products: list[Product], discount_percentage: float):
         self.products = products
         self.discount_percentage = discount_percentage
@@ -0,0 +1,295 @@
+"""Module that contains the logic for checking out ShoppingCarts in multiple processes.
+
+The Offers and Bundles of a Teller, as well as a snapshot of all needed unit prices,
+are sent to every worker process once when it starts. Afterwards, the ShoppingCarts
+are sent to the workers in chunks, and every chunk is encoded as a few flat arrays
+of Product indices and quantities, which are cheap to pickle. The workers send back
+only what the main process can't derive itself: the line totals and the Discounts
+of the Receipts, again as flat arrays per chunk.
+"""
+
+from array import array
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from catalog import SupermarketCatalog
+from model_objects import Bundle, Discount, Offer, Product
+from quantities import QUANTITY_SCALES, get_total_price_cents
+from receipt import Receipt, ReceiptItem
+from shopping_cart import ShoppingCart
+from teller import Teller
+
+# A chunk of ShoppingCarts is sent as the number of lines of every cart, followed by
+# the Product index and fixed-point quantity of every line of all carts; Products
+# are referenced by their index in a list of Products that every worker receives
+# once
+EncodedChunk = tuple[array, array, array]
+# The Receipts of a chunk are sent back as the total price of every line, the
+# number of Discounts of every Receipt, and the Product index, description and
+# amount of every Discount; the lines of a Receipt are in the order of its cart
+EncodedReceipts = tuple[array, array, array, list[str], array]
+
+
+class ReadOnlyCatalogError(Exception):
+    pass
+
+
+class PriceSnapshotCatalog(SupermarketCatalog):
+    """SupermarketCatalog that answers all lookups from a fixed dict of unit prices.
+
+    This is used in the worker processes, which can't access the database themselves.
+    """
+
+    def __init__(self, unit_prices_cents: dict[Product, int]):
+        self.unit_prices_cents = unit_prices_cents
+
+    def add_product(self, product: Product, price_cents: int) -> None:
+        raise ReadOnlyCatalogError("Can't add Products to a PriceSnapshotCatalog!")
+
+    def contains_product(self, product: Product) -> bool:
+        return product in self.unit_prices_cents
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        return self.unit_prices_cents[product]
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        return {product: self.unit_prices_cents[product] for product in products}
+
+
+# state of a worker process, set once by _init_worker
+_worker_teller: Optional[Teller] = None
+_worker_products: list[Product] = []
+_worker_product_indices: dict[Product, int] = {}
+_worker_unit_prices_cents: dict[Product, int] = {}
+
+
+def _init_worker(
+    products: list[Product],
+    offers: list[Offer],
+    bundles: list[Bundle],
+    unit_prices_cents: dict[Product, int],
+) -> None:
+    global _worker_teller, _worker_products, _worker_product_indices
+    global _worker_unit_prices_cents
+    teller = Teller(catalog=PriceSnapshotCatalog(unit_prices_cents=unit_prices_cents))
+    for offer in offers:
+        teller.add_offer(offer=offer)
+    for bundle in bundles:
+        teller.add_bundle(bundle=bundle)
+
+    _worker_teller = teller
+    _worker_products = products
+    _worker_product_indices = {product: index for index, product in enumerate(products)}
+    _worker_unit_prices_cents = unit_prices_cents
+
+
+class _ProductIndices(dict):
+    """dict that gives every Product the next free index when it is first used."""
+
+    def __missing__(self, product: Product) -> int:
+        index = self[product] = len(self)
+        return index
+
+
+def _encode_chunk(
+    carts: list[ShoppingCart], product_indices: _ProductIndices
+) -> EncodedChunk:
+    line_counts = array("I")
+    line_product_indices = array("I")
+    quantities = array("q")
+    for cart in carts:
+        product_quantities = cart.product_quantities
+        line_counts.append(len(product_quantities))
+        line_product_indices.extend(
+            map(product_indices.__getitem__, product_quantities)
+        )
+        quantities.extend(product_quantities.values())
+    return line_counts, line_product_indices, quantities
+
+
+def _check_out_chunk(encoded_chunk: EncodedChunk) -> EncodedReceipts:
+    line_counts, line_product_indices, quantities = encoded_chunk
+    teller = _worker_teller
+    products = _worker_products
+    product_indices = _worker_product_indices
+    unit_prices_cents = _worker_unit_prices_cents
+    promotions = teller.promotions
+    total_prices_cents = array("q")
+    discount_counts = array("I")
+    discount_product_indices = array("I")
+    descriptions: list[str] = []
+    discount_amounts_cents = array("q")
+    start = 0
+    for line_count in line_counts:
+        end = start + line_count
+        # the quantities are already fixed-point quantities, so the cart is filled
+        # directly instead of converting and verifying every line again
+        product_quantities = {
+            products[product_index]: quantity
+            for product_index, quantity in zip(
+                line_product_indices[start:end], quantities[start:end]
+            )
+        }
+        start = end
+        # only the line totals and Discounts are needed, so no Receipt is created
+        total_prices_cents.extend(
+            [
+                get_total_price_cents(
+                    product=product,
+                    quantity=quantity,
+                    unit_price_cents=unit_prices_cents[product],
+                )
+                for product, quantity in product_quantities.items()
+            ]
+        )
+        discounts = teller._create_discounts(
+            product_quantities=product_quantities,
+            unit_prices_cents=unit_prices_cents,
+            promotions=promotions,
+        )
+        discount_counts.append(len(discounts))
+        for discount in discounts:
+            discount_product_indices.append(product_indices[discount.product])
+            descriptions.append(discount.description)
+            discount_amounts_cents.append(discount.discount_amount_cents)
+    return (
+        total_prices_cents,
+        discount_counts,
+        discount_product_indices,
+        descriptions,
+        discount_amounts_cents,
+    )
+
+
+def _decode_receipts(
+    encoded_chunk: EncodedChunk,
+    encoded_receipts: EncodedReceipts,
+    products: list[Product],
+    unit_prices_cents: list[int],
+    quantity_scales: list[int],
+    price_version: Optional[int] = None,
+) -> Iterator[Receipt]:
+    # the unit prices and quantity scales are given by Product index, and all items
+    # and Discounts of the chunk are created at once
+    line_counts, line_product_indices, quantities = encoded_chunk
+    (
+        total_prices_cents,
+        discount_counts,
+        discount_product_indices,
+        descriptions,
+        discount_amounts_cents,
+    ) = encoded_receipts
+    items = [
+        ReceiptItem(
+            product=products[product_index],
+            # the conversion back to items or kilograms is exact
+            quantity=(
+                quantity
+                if quantity_scales[product_index] == 1
+                else quantity / quantity_scales[product_index]
+            ),
+            price_cents=unit_prices_cents[product_index],
+            total_price_cents=total_price_cents,
+        )
+        for product_index, quantity, total_price_cents in zip(
+            line_product_indices, quantities, total_prices_cents
+        )
+    ]
+    discounts = [
+        Discount(
+            product=products[product_index],
+            description=description,
+            discount_amount_cents=discount_amount_cents,
+        )
+        for product_index, description, discount_amount_cents in zip(
+            discount_product_indices, descriptions, discount_amounts_cents
+        )
+    ]
+    line_start = 0
+    discount_start = 0
+    for line_count, discount_count in zip(line_counts, discount_counts):
+        receipt = Receipt(price_version=price_version)
+        line_end = line_start + line_count
+        receipt.add_items(items=items[line_start:line_end])
+        line_start = line_end
+        discount_end = discount_start + discount_count
+        receipt.add_discounts(discounts=discounts[discount_start:discount_end])
+        discount_start = discount_end
+        yield receipt
+
+
+def check_out_in_parallel(
+    teller: Teller,
+    carts: list[ShoppingCart],
+    max_workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> Iterator[Receipt]:
+    """Checks out the given ShoppingCarts in multiple processes and yields their Receipts.
+
+    The unit prices of all Products in all ShoppingCarts are retrieved from the
+    SupermarketCatalog of the Teller, or from its current PriceSnapshot, in a single
+    lookup before any worker process is started. The Receipts are equal to the ones created by
+    Teller.check_out_articles_from_cart and reference the same Product objects.
+
+    Args:
+        teller (Teller): The Teller whose Offers, Bundles and SupermarketCatalog are
+        to be used.
+        carts (list[ShoppingCart]): The ShoppingCarts that are to be checked out.
+        max_workers (Optional[int]): The number of worker processes. Defaults to the
+        number of processors of the machine.
+        chunksize (int): The number of ShoppingCarts that are sent to a worker
+        process at once.
+
+    Yields:
+        Receipt: The Receipts created from the given ShoppingCarts, in the same
+        order as the ShoppingCarts.
+    """
+
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive integer, but got {chunksize}!")
+
+    product_indices = _ProductIndices()
+    encoded_chunks = [
+        _encode_chunk(
+            carts=carts[start : start + chunksize], product_indices=product_indices
+        )
+        for start in range(0, len(carts), chunksize)
+    ]
+    products = list(product_indices)
+    price_snapshot = teller.catalog.get_price_snapshot()
+    if price_snapshot is None:
+        price_version = None
+        unit_prices_cents = teller.catalog.get_unit_prices_cents(products=products)
+    else:
+        price_version = price_snapshot.version
+        unit_prices_cents = price_snapshot.get_unit_prices_cents(products=products)
+    product_unit_prices_cents = [unit_prices_cents[product] for product in products]
+    quantity_scales = [QUANTITY_SCALES[product.unit] for product in products]
+    offers = [
+        offer for offers in teller.product_offers_map.values() for offer in offers
+    ]
+    bundles = list(
+        dict.fromkeys(
+            bundle
+            for bundles in teller.product_bundles_map.values()
+            for bundle in bundles
+        )
+    )
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(products, offers, bundles, unit_prices_cents),
+    ) as executor:
+        for encoded_chunk, encoded_receipts in zip(
+            encoded_chunks, executor.map(_check_out_chunk, encoded_chunks)
+        ):
+            yield from _decode_receipts(
+                encoded_chunk=encoded_chunk,
+                encoded_receipts=encoded_receipts,
+                products=products,
+                unit_prices_cents=product_unit_prices_cents,
+                quantity_scales=quantity_scales,
+                price_version=price_version,
+            )
@@ -0,0 +1,241 @@
+"""Module that contains the logic for pricing a ShoppingCart while it is being filled.
+
+A PricingSession listens to the changes of a ShoppingCart. Whenever the quantity
+of a Product changes, only the price of that Product's line, the best Discount of
+its Offers and the Discounts of the Bundles that contain it are recalculated, so
+that the running total is available after every scan without checking out the
+whole ShoppingCart again. If promotions overlap, the Bundles are only selected
+again for the Products that are connected to the changed one via Bundles.
+"""
+
+from discount_creation import _create_discounts_from_bundles
+from discount_selection import get_best_offer_discount, select_bundles
+from model_objects import Bundle, Discount, Product
+from quantities import from_fixed_point_quantity, get_total_price_cents
+from receipt import Receipt
+from shopping_cart import ShoppingCart
+from teller import PromotionState, Teller
+
+
+class PricingSession:
+    """Class that keeps the prices and Discounts of a ShoppingCart up to date.
+
+    The Offers and Bundles of the Teller are read whenever a line is recalculated,
+    so Offers and Bundles that are added to the Teller during the session only
+    affect the lines that change afterwards. The unit price of every Product is
+    retrieved from the SupermarketCatalog once, when it is first added. If the
+    SupermarketCatalog publishes PriceSnapshots, the snapshot is pinned when the
+    session starts, so that all prices of the session have the same version.
+    """
+
+    def __init__(self, teller: Teller, cart: ShoppingCart):
+        self.teller = teller
+        self.cart = cart
+        self._price_snapshot = teller.catalog.get_price_snapshot()
+        # the catalog from which unit prices are taken
+        self._prices = (
+            teller.catalog if self._price_snapshot is None else self._price_snapshot
+        )
+        self._unit_prices_cents: dict[Product, int] = {}
+        self._line_totals_cents: dict[Product, int] = {}
+        # the best Discount of the Offers of every Product
+        self._offer_discounts: dict[Product, Discount] = {}
+        # the Discounts of every Bundle whose Products are all in the ShoppingCart
+        self._bundle_discounts: dict[Bundle, list[Discount]] = {}
+        self._selected_bundles: set[Bundle] = set()
+        # the Discount that is applied to every Product after the selection
+        self._applied_discounts: dict[Product, Discount] = {}
+        self._subtotal_cents = 0
+        self._discount_total_cents = 0
+
+        # Products that are already in the ShoppingCart are priced with one lookup
+        products = list(cart.product_quantities)
+        if products:
+            self._unit_prices_cents.update(
+                self._prices.get_unit_prices_cents(products=products)
+            )
+        for product, quantity in cart.product_quantities.items():
+            self._update_line(product=product, quantity=quantity)
+        cart.add_listener(listener=self._update_line)
+
+    def close(self) -> None:
+        """Stops listening to the changes of the ShoppingCart."""
+        self.cart.remove_listener(listener=self._update_line)
+
+    @property
+    def subtotal_cents(self) -> int:
+        return self._subtotal_cents
+
+    @property
+    def discount_total_cents(self) -> int:
+        return self._discount_total_cents
+
+    @property
+    def total_cents(self) -> int:
+        return self._subtotal_cents + self._discount_total_cents
+
+    @property
+    def discounts(self) -> list[Discount]:
+        """All applied Discounts, in the same order as on a Receipt of the Teller."""
+        discounts: list[Discount] = []
+        bundles: dict[Bundle, None] = {}
+        product_bundles_map = self.teller.product_bundles_map
+        for product in self.cart.product_quantities:
+            is_in_selected_bundle = False
+            for bundle in product_bundles_map.get(product, ()):
+                if bundle in self._selected_bundles:
+                    bundles[bundle] = None
+                    is_in_selected_bundle = True
+            if not is_in_selected_bundle and product in self._offer_discounts:
+                discounts.append(self._offer_discounts[product])
+        for bundle in bundles:
+            discounts += self._bundle_discounts[bundle]
+        return discounts
+
+    def create_receipt(self) -> Receipt:
+        """Creates a Receipt from the current state of the session.
+
+        The Receipt is equal to the one that the Teller creates when checking out
+        the ShoppingCart, but no prices or Discounts are calculated again.
+
+        Returns:
+            Receipt: The Receipt of the ShoppingCart.
+        """
+
+        receipt = Receipt(
+            price_version=(
+                None if self._price_snapshot is None else self._price_snapshot.version
+            )
+        )
+        for product, quantity in self.cart.product_quantities.items():
+            receipt.add_product(
+                product=product,
+                quantity=from_fixed_point_quantity(product=product, quantity=quantity),
+                price_cents=self._unit_prices_cents[product],
+                total_price_cents=self._line_totals_cents[product],
+            )
+        receipt.add_discounts(discounts=self.discounts)
+        return receipt
+
+    def _get_unit_price_cents(self, product: Product) -> int:
+        unit_price_cents = self._unit_prices_cents.get(product)
+        if unit_price_cents is None:
+            unit_price_cents = self._prices.get_unit_price_cents(product=product)
+            self._unit_prices_cents[product] = unit_price_cents
+        return unit_price_cents
+
+    def _update_line(self, product: Product, quantity: int) -> None:
+        unit_price_cents = self._get_unit_price_cents(product=product)
+        # the ShoppingCart reports a quantity of 0 for removed Products
+        is_in_cart = product in self.cart.product_quantities
+        line_total_cents = get_total_price_cents(
+            product=product, quantity=quantity, unit_price_cents=unit_price_cents
+        )
+
+        # the Offers and Bundles of the Teller may change concurrently, so the
+        # whole line is recalculated with the same PromotionState
+        promotions = self.teller.promotions
+        # all Discounts are created before the state of the session is changed, so
+        # that an Offer or Bundle that can't be evaluated leaves it as it was
+        offer_discount = None
+        offers = promotions.product_offers_map.get(product)
+        if offers and is_in_cart:
+            offer_discount = get_best_offer_discount(
+                product=product,
+                quantity=quantity,
+                offers=offers,
+                unit_price_cents=unit_price_cents,
+                offer_evaluators=promotions.offer_evaluators,
+                offer_discount_cache=self.teller.offer_discount_cache,
+            )
+        bundles = promotions.product_bundles_map.get(product, ())
+        bundle_discounts = [
+            (bundle, self._create_bundle_discounts(bundle=bundle)) for bundle in bundles
+        ]
+
+        self._subtotal_cents += line_total_cents - self._line_totals_cents.get(
+            product, 0
+        )
+        if is_in_cart:
+            self._line_totals_cents[product] = line_total_cents
+        else:
+            self._line_totals_cents.pop(product, None)
+        if offer_discount is None:
+            self._offer_discounts.pop(product, None)
+        else:
+            self._offer_discounts[product] = offer_discount
+        for bundle, discounts in bundle_discounts:
+            if discounts:
+                self._bundle_discounts[bundle] = discounts
+            else:
+                self._bundle_discounts.pop(bundle, None)
+        self._select_discounts(
+            promotions=promotions,
+            products=[product]
+            + [
+                bundle_product
+                for bundle in bundles
+                for bundle_product in bundle.products
+            ],
+        )
+
+    def _create_bundle_discounts(self, bundle: Bundle) -> list[Discount]:
+        for product in bundle.products:
+            if product not in self.cart.product_quantities:
+                return []
+
+        # all Products of the Bundle are in the ShoppingCart, so their unit prices
+        # are known, and only this Bundle has to be evaluated
+        return _create_discounts_from_bundles(
+            product_quantities_map=self.cart.product_quantities,
+            bundles=[bundle],
+            unit_prices_cents=self._unit_prices_cents,
+        )
+
+    def _select_discounts(
+        self, promotions: PromotionState, products: list[Product]
+    ) -> None:
+        # The given Products, and all Products that are connected to them via
+        # purchased Bundles, are selected again. Every Bundle that changed contains
+        # the changed Product, so the selection of all other Products stays valid.
+        group_products: set[Product] = set()
+        group_bundles: dict[Bundle, None] = {}
+        pending_products = list(products)
+        while pending_products:
+            product = pending_products.pop()
+            if product in group_products:
+                continue
+            group_products.add(product)
+            for bundle in promotions.product_bundles_map.get(product, ()):
+                if bundle in self._bundle_discounts and bundle not in group_bundles:
+                    group_bundles[bundle] = None
+                    pending_products += bundle.products
+
+        for product in group_products:
+            previous_discount = self._applied_discounts.pop(product, None)
+            if previous_discount is not None:
+                self._discount_total_cents -= previous_discount.discount_amount_cents
+            for bundle in promotions.product_bundles_map.get(product, ()):
+                self._selected_bundles.discard(bundle)
+
+        selected_bundles = select_bundles(
+            bundle_discounts={
+                bundle: self._bundle_discounts[bundle] for bundle in group_bundles
+            },
+            offer_discounts={
+                product: self._offer_discounts[product]
+                for product in group_products
+                if product in self._offer_discounts
+            },
+        )
+        self._selected_bundles.update(selected_bundles)
+        for product in group_products:
+            if product in self._offer_discounts:
+                self._applied_discounts[product] = self._offer_discounts[product]
+        for bundle in selected_bundles:
+            for discount in self._bundle_discounts[bundle]:
+                self._applied_discounts[discount.product] = discount
+        for product in group_products:
+            applied_discount = self._applied_discounts.get(product)
+            if applied_discount is not None:
+                self._discount_total_cents += applied_discount.discount_amount_cents
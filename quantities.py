@@ -0,0 +1,75 @@
+"""Module that contains the fixed-point representation of purchased quantities.
+
+Within a ShoppingCart and during the Discount creation, quantities are integers:
+Products with ProductUnit.EACH are counted in items, and Products with
+ProductUnit.KILO are weighed in grams, i.e. in milli-units. Unit prices stay in
+cents per item or per kilogram, so all totals are calculated with integer
+arithmetic and rounded only once, to the nearest cent. Quantities are only
+converted from and to items and kilograms at the boundaries, i.e. when they are
+added to a ShoppingCart and when they are put on a Receipt.
+"""
+
+from typing import Union
+
+from model_objects import Product, ProductUnit
+
+# the number of fixed-point quantity steps per unit of every ProductUnit
+QUANTITY_SCALES: dict[ProductUnit, int] = {ProductUnit.EACH: 1, ProductUnit.KILO: 1000}
+
+
+def from_fixed_point_quantity(product: Product, quantity: int) -> Union[int, float]:
+    """Converts a fixed-point quantity back to items or kilograms.
+
+    Args:
+        product (Product): The Product whose quantity is converted.
+        quantity (int): The quantity in items or grams.
+
+    Returns:
+        Union[int, float]: The number of items, or the weight in kilograms.
+    """
+
+    scale = QUANTITY_SCALES[product.unit]
+    if scale == 1:
+        return quantity
+    return quantity / scale
+
+
+def divide_rounded(numerator: int, denominator: int) -> int:
+    """Divides two integers and rounds the quotient to the nearest integer.
+
+    Like round(), halves are rounded to the nearest even integer, so the result is
+    the one of round(numerator / denominator) without any floating point error.
+
+    Args:
+        numerator (int): The dividend.
+        denominator (int): The divisor, which must be positive.
+
+    Returns:
+        int: The rounded quotient.
+    """
+
+    quotient, remainder = divmod(numerator, denominator)
+    # adding the parity of the quotient rounds halves up only for odd quotients
+    if 2 * remainder + quotient % 2 > denominator:
+        quotient += 1
+    return quotient
+
+
+def get_total_price_cents(
+    product: Product, quantity: int, unit_price_cents: int
+) -> int:
+    """Returns the price of a fixed-point quantity of a Product, rounded to the cent.
+
+    Args:
+        product (Product): The purchased Product.
+        quantity (int): The quantity in items or grams.
+        unit_price_cents (int): The price per item or kilogram in cents.
+
+    Returns:
+        int: The total price in cents.
+    """
+
+    scale = QUANTITY_SCALES[product.unit]
+    if scale == 1:
+        return quantity * unit_price_cents
+    return divide_rounded(numerator=quantity * unit_price_cents, denominator=scale)
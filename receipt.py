@@ -1,11 +1,55 @@
-from typing import Union
+from collections.abc import Iterator, Sequence
+from typing import Optional, TypeVar, Union
 
 from model_objects import Discount, Product
 
+T = TypeVar("T")
+
+
+class SequenceView(Sequence[T]):
+    """Class that represents a read-only view of a list.
+
+    The view does not copy the list, so changes to the list are visible through
+    the view, but the list can't be changed through the view.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: list[T]):
+        self._items = items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __eq__(self, other: object) -> bool:
+        # views compare equal to lists, tuples and other views with the same items,
+        # like the lists that were returned before
+        if isinstance(other, SequenceView):
+            return self._items == other._items
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self._items) == len(other) and all(
+                item == other_item for item, other_item in zip(self._items, other)
+            )
+        return NotImplemented
+
+    # the underlying list can change, so views are not hashable, like lists
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SequenceView({self._items!r})"
+
 
 class ReceiptItem:
     """Class that represents the purchase of a single Product of a bigger Receipt."""
 
+    __slots__ = ("product", "quantity", "price_cents", "total_price_cents")
+
     def __init__(
         self,
         product: Product,
@@ -20,19 +64,24 @@ class ReceiptItem:
 
 
 class Receipt:
-    """Class that represents a Receipt for Products that have been purchased."""
+    """Class that represents a Receipt for Products that have been purchased.
 
-    def __init__(self):
+    If the unit prices have been taken from a PriceSnapshot, price_version is the
+    version of that snapshot, so that the Receipt can be traced back to the prices
+    it was based on.
+    """
+
+    def __init__(self, price_version: Optional[int] = None):
+        self.price_version = price_version
         self._items: list[ReceiptItem] = []
         self._discounts: list[Discount] = []
+        self._items_view = SequenceView(items=self._items)
+        self._discounts_view = SequenceView(items=self._discounts)
+        # the total is updated whenever Products or Discounts are added
+        self._total_price_cents = 0
 
     def get_total_price_cents(self) -> int:
-        total = 0
-        for item in self.items:
-            total += item.total_price_cents
-        for discount in self.discounts:
-            total += discount.discount_amount_cents
-        return total
+        return self._total_price_cents
 
     def add_product(
         self,
@@ -49,14 +98,22 @@ class Receipt:
                 total_price_cents=total_price_cents,
             )
         )
+        self._total_price_cents += total_price_cents
+
+    def add_items(self, items: list[ReceiptItem]) -> None:
+        self._items += items
+        for item in items:
+            self._total_price_cents += item.total_price_cents
 
     def add_discounts(self, discounts: list[Discount]) -> None:
         self._discounts += discounts
+        for discount in discounts:
+            self._total_price_cents += discount.discount_amount_cents
 
     @property
-    def items(self):
-        return self._items[:]
+    def items(self) -> SequenceView[ReceiptItem]:
+        return self._items_view
 
     @property
-    def discounts(self):
-        return self._discounts[:]
+    def discounts(self) -> SequenceView[Discount]:
+        return self._discounts_view
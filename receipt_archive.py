@@ -0,0 +1,406 @@
+"""Module that contains a columnar on-disk format for archiving Receipts.
+
+An archive stores all Receipts in a single file, as one column per field instead
+of one record per Receipt: the Products, quantities, unit prices and total prices
+of all ReceiptItems, the Products, descriptions and amounts of all Discounts, and
+the total and price version of every Receipt, each in a contiguous array. The
+Receipts are delimited by offsets into these columns. Products and Discount
+descriptions are stored once per archive, in tables that the columns refer to by
+index, because product_ids are only valid within the process that created the
+Products.
+
+ReceiptArchive memory-maps the file and exposes the columns as memoryviews, so
+analytics can scan the columns of millions of Receipts without creating a Python
+object per Receipt. Single Receipts can still be restored with get_receipt.
+
+All numbers are stored in little-endian byte order, and every column starts at a
+multiple of 8 bytes.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Optional, Union
+
+from model_objects import Discount, Product, ProductUnit
+from receipt import Receipt
+
+_MAGIC = b"RCPTARC\x00"
+_VERSION = 2
+# stored instead of the price_version of Receipts that have none
+_NO_PRICE_VERSION = -1
+# magic, version, receipt count, item count, discount count, product count,
+# description count, length of the product names, length of the descriptions
+_HEADER = struct.Struct("<8sIqqqqqqq")
+_ALIGNMENT = 8
+
+# the columns of an archive, in the order in which they are stored; every column is
+# given by its name, its array typecode, and the name of the count that its length
+# is derived from (plus 1 for the offset columns)
+_COLUMNS = (
+    ("receipt_item_offsets", "q", "receipt_count", 1),
+    ("receipt_discount_offsets", "q", "receipt_count", 1),
+    ("receipt_total_prices_cents", "q", "receipt_count", 0),
+    ("receipt_price_versions", "q", "receipt_count", 0),
+    ("item_product_indices", "i", "item_count", 0),
+    ("item_quantities", "d", "item_count", 0),
+    ("item_integer_quantities", "B", "item_count", 0),
+    ("item_price_cents", "q", "item_count", 0),
+    ("item_total_prices_cents", "q", "item_count", 0),
+    ("discount_product_indices", "i", "discount_count", 0),
+    ("discount_description_indices", "i", "discount_count", 0),
+    ("discount_amounts_cents", "q", "discount_count", 0),
+    ("product_units", "B", "product_count", 0),
+    ("product_name_offsets", "q", "product_count", 1),
+    ("product_names", "B", "product_names_length", 0),
+    ("description_offsets", "q", "description_count", 1),
+    ("descriptions", "B", "descriptions_length", 0),
+)
+COLUMN_NAMES = tuple(name for name, _, _, _ in _COLUMNS)
+
+
+class InvalidReceiptArchiveError(Exception):
+    pass
+
+
+def _get_padding(length: int) -> int:
+    return -length % _ALIGNMENT
+
+
+def _get_column_layout(counts: dict[str, int]) -> dict[str, tuple[int, int, str]]:
+    # returns the offset in bytes, the length in items and the typecode per column
+    layout: dict[str, tuple[int, int, str]] = {}
+    offset = _HEADER.size + _get_padding(length=_HEADER.size)
+    for name, typecode, count_name, extra_items in _COLUMNS:
+        length = counts[count_name] + extra_items
+        layout[name] = (offset, length, typecode)
+        byte_length = length * array(typecode).itemsize
+        offset += byte_length + _get_padding(length=byte_length)
+    return layout
+
+
+class _ArchiveColumns:
+    """The columns of an archive while it is being written."""
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode, _, _ in _COLUMNS}
+        self.columns["receipt_item_offsets"].append(0)
+        self.columns["receipt_discount_offsets"].append(0)
+        self.columns["product_name_offsets"].append(0)
+        self.columns["description_offsets"].append(0)
+        self.product_indices: dict[Product, int] = {}
+        self.description_indices: dict[str, int] = {}
+
+    def _get_product_index(self, product: Product) -> int:
+        index = self.product_indices.get(product)
+        if index is None:
+            index = len(self.product_indices)
+            self.product_indices[product] = index
+            self.columns["product_units"].append(product.unit.value)
+            self.columns["product_names"].frombytes(product.name.encode("utf-8"))
+            self.columns["product_name_offsets"].append(
+                len(self.columns["product_names"])
+            )
+        return index
+
+    def _get_description_index(self, description: str) -> int:
+        index = self.description_indices.get(description)
+        if index is None:
+            index = len(self.description_indices)
+            self.description_indices[description] = index
+            self.columns["descriptions"].frombytes(description.encode("utf-8"))
+            self.columns["description_offsets"].append(
+                len(self.columns["descriptions"])
+            )
+        return index
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        columns = self.columns
+        for item in receipt.items:
+            columns["item_product_indices"].append(
+                self._get_product_index(product=item.product)
+            )
+            columns["item_quantities"].append(item.quantity)
+            columns["item_integer_quantities"].append(isinstance(item.quantity, int))
+            columns["item_price_cents"].append(item.price_cents)
+            columns["item_total_prices_cents"].append(item.total_price_cents)
+        for discount in receipt.discounts:
+            columns["discount_product_indices"].append(
+                self._get_product_index(product=discount.product)
+            )
+            columns["discount_description_indices"].append(
+                self._get_description_index(description=discount.description)
+            )
+            columns["discount_amounts_cents"].append(discount.discount_amount_cents)
+        columns["receipt_item_offsets"].append(len(columns["item_product_indices"]))
+        columns["receipt_discount_offsets"].append(
+            len(columns["discount_product_indices"])
+        )
+        columns["receipt_total_prices_cents"].append(receipt.get_total_price_cents())
+        columns["receipt_price_versions"].append(
+            _NO_PRICE_VERSION
+            if receipt.price_version is None
+            else receipt.price_version
+        )
+
+    def get_counts(self) -> dict[str, int]:
+        return {
+            "receipt_count": len(self.columns["receipt_total_prices_cents"]),
+            "item_count": len(self.columns["item_product_indices"]),
+            "discount_count": len(self.columns["discount_product_indices"]),
+            "product_count": len(self.product_indices),
+            "description_count": len(self.description_indices),
+            "product_names_length": len(self.columns["product_names"]),
+            "descriptions_length": len(self.columns["descriptions"]),
+        }
+
+
+def write_receipt_archive(path: str, receipts: Iterable[Receipt]) -> int:
+    """Writes the given Receipts to a file in the columnar archive format.
+
+    All Receipts are collected into compact arrays first, so that every column is
+    written with a single call.
+
+    Args:
+        path (str): The path of the archive file. An existing file is overwritten.
+        receipts (Iterable[Receipt]): The Receipts that are to be archived.
+
+    Returns:
+        int: The number of archived Receipts.
+    """
+
+    columns = _ArchiveColumns()
+    for receipt in receipts:
+        columns.add_receipt(receipt=receipt)
+    counts = columns.get_counts()
+
+    with open(path, "wb") as file:
+        file.write(
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                counts["receipt_count"],
+                counts["item_count"],
+                counts["discount_count"],
+                counts["product_count"],
+                counts["description_count"],
+                counts["product_names_length"],
+                counts["descriptions_length"],
+            )
+        )
+        file.write(bytes(_get_padding(length=_HEADER.size)))
+        for name, _, _, _ in _COLUMNS:
+            column = columns.columns[name]
+            if sys.byteorder == "big":
+                column.byteswap()
+            file.write(column.tobytes())
+            file.write(bytes(_get_padding(length=len(column) * column.itemsize)))
+    return counts["receipt_count"]
+
+
+class ReceiptArchive:
+    """Class that gives read access to a memory-mapped Receipt archive.
+
+    The columns are memoryviews of the mapped file: reading them doesn't copy the
+    file or create Python objects for the values that aren't accessed. Receipt i
+    consists of the items from receipt_item_offsets[i] to receipt_item_offsets[i + 1]
+    and the Discounts from receipt_discount_offsets[i] to
+    receipt_discount_offsets[i + 1]. The Products and Discount descriptions are
+    referenced by their index in products and descriptions.
+
+    The archive has to be closed when it isn't needed anymore, e.g. by using it as
+    a context manager. All memoryviews taken from its columns have to be released
+    before.
+    """
+
+    def __init__(self, path: str):
+        if sys.byteorder == "big":
+            raise InvalidReceiptArchiveError(
+                "Receipt archives can only be memory-mapped on little-endian platforms!"
+            )
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise InvalidReceiptArchiveError(f"{path} is not a Receipt archive!")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._columns: dict[str, memoryview] = {}
+        try:
+            self._map_columns(path=path)
+            self.products = self._read_products()
+            self.descriptions = self._read_strings(
+                offsets_name="description_offsets", data_name="descriptions"
+            )
+        except BaseException:
+            self.close()
+            raise
+
+    def _map_columns(self, path: str) -> None:
+        magic, version, *counts = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC:
+            raise InvalidReceiptArchiveError(f"{path} is not a Receipt archive!")
+        if version != _VERSION:
+            raise InvalidReceiptArchiveError(
+                f"Can't read version {version} of the Receipt archive format, only version {_VERSION}!"
+            )
+
+        layout = _get_column_layout(
+            counts=dict(
+                zip(
+                    (
+                        "receipt_count",
+                        "item_count",
+                        "discount_count",
+                        "product_count",
+                        "description_count",
+                        "product_names_length",
+                        "descriptions_length",
+                    ),
+                    counts,
+                )
+            )
+        )
+        with memoryview(self._mmap) as data:
+            for name, (offset, length, typecode) in layout.items():
+                end = offset + length * array(typecode).itemsize
+                if end > len(self._mmap):
+                    raise InvalidReceiptArchiveError(f"{path} is truncated!")
+                with data[offset:end] as column_data:
+                    self._columns[name] = column_data.cast(typecode)
+
+    def _read_strings(self, offsets_name: str, data_name: str) -> list[str]:
+        offsets = self._columns[offsets_name]
+        data = bytes(self._columns[data_name])
+        return [
+            data[offsets[index] : offsets[index + 1]].decode("utf-8")
+            for index in range(len(offsets) - 1)
+        ]
+
+    def _read_products(self) -> list[Product]:
+        names = self._read_strings(
+            offsets_name="product_name_offsets", data_name="product_names"
+        )
+        return [
+            Product(name=name, unit=ProductUnit(unit))
+            for name, unit in zip(names, self._columns["product_units"])
+        ]
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "ReceiptArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._columns["receipt_total_prices_cents"])
+
+    def get_column(self, name: str) -> memoryview:
+        """Returns a column of the archive.
+
+        Args:
+            name (str): The name of the column, e.g. "item_quantities". All names
+            are listed in COLUMN_NAMES.
+
+        Raises:
+            KeyError: Raised if the archive has no column with the given name.
+
+        Returns:
+            memoryview: The column, as a view of the memory-mapped file.
+        """
+
+        if name not in self._columns:
+            raise KeyError(
+                f"Can't get column {name}: Receipt archives have no such column!"
+            )
+        return self._columns[name]
+
+    def get_receipt(self, index: int) -> Receipt:
+        """Restores a single Receipt from the archive.
+
+        Args:
+            index (int): The position of the Receipt in the archive.
+
+        Raises:
+            IndexError: Raised if the archive contains no Receipt at the given index.
+
+        Returns:
+            Receipt: The restored Receipt.
+        """
+
+        if not 0 <= index < len(self):
+            raise IndexError(
+                f"Can't get Receipt {index} - archive only contains {len(self)} Receipts!"
+            )
+        columns = self._columns
+        price_version = columns["receipt_price_versions"][index]
+        receipt = Receipt(
+            price_version=None if price_version == _NO_PRICE_VERSION else price_version
+        )
+        for item_index in range(
+            columns["receipt_item_offsets"][index],
+            columns["receipt_item_offsets"][index + 1],
+        ):
+            quantity: Union[int, float] = columns["item_quantities"][item_index]
+            if columns["item_integer_quantities"][item_index]:
+                quantity = int(quantity)
+            receipt.add_product(
+                product=self.products[columns["item_product_indices"][item_index]],
+                quantity=quantity,
+                price_cents=columns["item_price_cents"][item_index],
+                total_price_cents=columns["item_total_prices_cents"][item_index],
+            )
+        receipt.add_discounts(
+            discounts=[
+                Discount(
+                    product=self.products[
+                        columns["discount_product_indices"][discount_index]
+                    ],
+                    description=self.descriptions[
+                        columns["discount_description_indices"][discount_index]
+                    ],
+                    discount_amount_cents=columns["discount_amounts_cents"][
+                        discount_index
+                    ],
+                )
+                for discount_index in range(
+                    columns["receipt_discount_offsets"][index],
+                    columns["receipt_discount_offsets"][index + 1],
+                )
+            ]
+        )
+        return receipt
+
+    def __iter__(self) -> Iterator[Receipt]:
+        for index in range(len(self)):
+            yield self.get_receipt(index=index)
+
+    def get_product_revenues_cents(self) -> dict[Product, int]:
+        """Sums up the total prices of the items of all Receipts per Product.
+
+        Discounts are not subtracted. Only the item columns are scanned; no
+        Receipts are restored.
+
+        Returns:
+            dict[Product, int]: The revenue in cents for every archived Product that
+            has been purchased.
+        """
+
+        revenues_cents: list[Optional[int]] = [None] * len(self.products)
+        for product_index, total_price_cents in zip(
+            self._columns["item_product_indices"],
+            self._columns["item_total_prices_cents"],
+        ):
+            revenues_cents[product_index] = (
+                revenues_cents[product_index] or 0
+            ) + total_price_cents
+        return {
+            product: revenue_cents
+            for product, revenue_cents in zip(self.products, revenues_cents)
+            if revenue_cents is not None
+        }
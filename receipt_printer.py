@@ -1,23 +1,76 @@
 """Module that contains the classes responsible for creating string representations of Receipts."""
 
-from abc import ABC, abstractmethod
+from abc import ABC
+from collections.abc import Iterator
+from typing import TextIO
 
 from model_objects import Discount, ProductUnit
 from receipt import Receipt, ReceiptItem
 
 
 class ReceiptPrinter(ABC):
-    @abstractmethod
+    """Base class of the classes that create text representations of Receipts.
+
+    Subclasses implement iter_receipt_lines, print_receipt or both. Each of them
+    is created from the other by default, so subclasses that only implement
+    print_receipt can still be streamed line by line.
+    """
+
+    def iter_receipt_lines(self, receipt: Receipt) -> Iterator[str]:
+        """Creates a text representation of a given Receipt piece by piece.
+
+        Every yielded string is a single line including its line break, except for
+        fixed document prefixes and suffixes, which may be yielded in one piece.
+        By default, the lines are split from the result of print_receipt.
+
+        Args:
+            receipt (Receipt): The Receipt for which to create the text representation.
+
+        Raises:
+            NotImplementedError: Raised if the subclass implements neither
+            iter_receipt_lines nor print_receipt.
+
+        Yields:
+            str: The consecutive parts of the text representation of the given Receipt.
+        """
+        if type(self).print_receipt is ReceiptPrinter.print_receipt:
+            raise NotImplementedError(
+                f"{type(self).__name__} must implement iter_receipt_lines or print_receipt!"
+            )
+        yield from self.print_receipt(receipt=receipt).splitlines(keepends=True)
+
     def print_receipt(self, receipt: Receipt) -> str:
         """Creates a text representation of a given Receipt.
 
+        By default, the parts of iter_receipt_lines are joined.
+
         Args:
             receipt (Receipt): The Receipt for which to create the text representation.
 
+        Raises:
+            NotImplementedError: Raised if the subclass implements neither
+            iter_receipt_lines nor print_receipt.
+
         Returns:
             str: The text representation of the given Receipt.
         """
-        pass
+        if type(self).iter_receipt_lines is ReceiptPrinter.iter_receipt_lines:
+            raise NotImplementedError(
+                f"{type(self).__name__} must implement iter_receipt_lines or print_receipt!"
+            )
+        return "".join(self.iter_receipt_lines(receipt=receipt))
+
+    def write_receipt(self, receipt: Receipt, stream: TextIO) -> None:
+        """Writes a text representation of a given Receipt to a stream.
+
+        The text is written line by line, so the complete text representation never
+        has to be held in memory.
+
+        Args:
+            receipt (Receipt): The Receipt for which to create the text representation.
+            stream (TextIO): The writable text stream, e.g. a file or an io.StringIO.
+        """
+        stream.writelines(self.iter_receipt_lines(receipt=receipt))
 
 
 class TextReceiptPrinter(ReceiptPrinter):
@@ -32,38 +85,27 @@ class TextReceiptPrinter(ReceiptPrinter):
             raise ValueError(f"columns must be positive integer, but got {columns}!")
         self.columns = columns
 
-    def print_receipt(self, receipt: Receipt) -> str:
-        result = ""
+    def iter_receipt_lines(self, receipt: Receipt) -> Iterator[str]:
         for item in receipt.items:
-            receipt_item = self._print_receipt_item(item=item)
-            result += receipt_item
+            yield from self._print_receipt_item(item=item)
 
         for discount in receipt.discounts:
-            discount_presentation = self._print_discount(discount=discount)
-            result += discount_presentation
+            yield self._print_discount(discount=discount)
 
-        result += "\n"
-        result += self._present_total(receipt=receipt)
-        return result
+        yield "\n"
+        yield self._present_total(receipt=receipt)
 
-    def _print_receipt_item(self, item: ReceiptItem) -> str:
+    def _print_receipt_item(self, item: ReceiptItem) -> Iterator[str]:
         total_price_printed = self._print_price(price_cents=item.total_price_cents)
         name = item.product.name
-        line = self._format_line_with_whitespace(name=name, value=total_price_printed)
+        yield self._format_line_with_whitespace(name=name, value=total_price_printed)
         if item.quantity != 1:
-            line += f"  {self._print_price(price_cents=item.price_cents)} * {self._print_quantity(item=item)}\n"
-        return line
+            yield f"  {self._print_price(price_cents=item.price_cents)} * {self._print_quantity(item=item)}\n"
 
     def _format_line_with_whitespace(self, name: str, value: str) -> str:
-        line = name
         # leave at least one whitespace between name and value
-        line += " "
-        whitespace_size = self.columns - len(line) - len(value)
-        for _ in range(whitespace_size):
-            line += " "
-        line += value
-        line += "\n"
-        return line
+        whitespace_size = max(self.columns - len(name) - len(value), 1)
+        return f"{name}{' ' * whitespace_size}{value}\n"
 
     def _print_price(self, price_cents: int) -> str:
         return "%.2f" % (price_cents / 100)
@@ -105,20 +147,22 @@ class HtmlReceiptPrinter(ReceiptPrinter):
     HTML_SUFFIX = """  </body>
 </html>"""
 
-    def print_receipt(self, receipt: Receipt) -> str:
+    def iter_receipt_lines(self, receipt: Receipt) -> Iterator[str]:
         body_indentation = 4
-        result = self.HTML_PREFIX
-        result += self._print_item_table(receipt=receipt, indentation=body_indentation)
-        result += self._print_discount_table(
+        yield self.HTML_PREFIX
+        yield from self._print_item_table(receipt=receipt, indentation=body_indentation)
+        yield from self._print_discount_table(
             receipt=receipt, indentation=body_indentation
         )
-        result += self._print_total(receipt=receipt, indentation=body_indentation)
-        result += self.HTML_SUFFIX
-        return result
+        yield self._print_total(receipt=receipt, indentation=body_indentation)
+        yield self.HTML_SUFFIX
 
     def _print_indentation(self, indentation: int) -> str:
         return " " * indentation
 
+    def _print_line(self, indentation: int, content: str) -> str:
+        return f"{self._print_indentation(indentation=indentation)}{content}\n"
+
     def _get_price_string(self, price_cents: int) -> str:
         return "%.2f" % (price_cents / 100)
 
@@ -128,125 +172,118 @@ class HtmlReceiptPrinter(ReceiptPrinter):
         else:
             return "%.3f" % item.quantity
 
-    def _print_item_table(self, receipt: Receipt, indentation: int) -> str:
-        if len(receipt.items) == 0:
-            return ""
+    def _print_item_table(self, receipt: Receipt, indentation: int) -> Iterator[str]:
+        items = receipt.items
+        if len(items) == 0:
+            return
 
-        content = "<table>\n"
-        content += self._print_item_table_headers(indentation=(indentation + 2))
-        for item in receipt.items:
-            content += self._print_item_table_row(
+        # the HTML_PREFIX already ends with the indentation for the first table
+        yield "<table>\n"
+        yield from self._print_item_table_headers(indentation=(indentation + 2))
+        for item in items:
+            yield from self._print_item_table_row(
                 item=item, indentation=(indentation + 2)
             )
-        content += self._print_indentation(indentation=indentation)
-        content += "</table>\n"
-        return content
-
-    def _print_item_table_headers(self, indentation: int) -> str:
-        result = self._print_indentation(indentation=indentation)
-        result += "<tr>\n"
-        result += self._print_indentation(indentation=(indentation + 2))
-        result += "<th>Product name</th>\n"
-        result += self._print_indentation(indentation=(indentation + 2))
-        result += "<th>Unit price (EUR)</th>\n"
-        result += self._print_indentation(indentation=(indentation + 2))
-        result += "<th>Quantity</th>\n"
-        result += self._print_indentation(indentation=(indentation + 2))
-        result += "<th>Total price (EUR)</th>\n"
-        result += self._print_indentation(indentation=indentation)
-        result += "</tr>\n"
-        return result
-
-    def _print_item_table_row(self, item: ReceiptItem, indentation: int) -> str:
-        row = self._print_indentation(indentation=indentation)
-        row += "<tr>\n"
-        row += self._print_product_name(item=item, indentation=(indentation + 2))
-        row += self._print_item_unit_price(item=item, indentation=(indentation + 2))
-        row += self._print_item_quantity(item=item, indentation=(indentation + 2))
-        row += self._print_item_total_price(item=item, indentation=(indentation + 2))
-        row += self._print_indentation(indentation=indentation)
-        row += "</tr>\n"
-        return row
+        yield self._print_line(indentation=indentation, content="</table>")
+
+    def _print_item_table_headers(self, indentation: int) -> Iterator[str]:
+        yield self._print_line(indentation=indentation, content="<tr>")
+        for header in (
+            "Product name",
+            "Unit price (EUR)",
+            "Quantity",
+            "Total price (EUR)",
+        ):
+            yield self._print_line(
+                indentation=(indentation + 2), content=f"<th>{header}</th>"
+            )
+        yield self._print_line(indentation=indentation, content="</tr>")
+
+    def _print_item_table_row(
+        self, item: ReceiptItem, indentation: int
+    ) -> Iterator[str]:
+        yield self._print_line(indentation=indentation, content="<tr>")
+        yield self._print_product_name(item=item, indentation=(indentation + 2))
+        yield self._print_item_unit_price(item=item, indentation=(indentation + 2))
+        yield self._print_item_quantity(item=item, indentation=(indentation + 2))
+        yield self._print_item_total_price(item=item, indentation=(indentation + 2))
+        yield self._print_line(indentation=indentation, content="</tr>")
 
     def _print_product_name(self, item: ReceiptItem, indentation: int) -> str:
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{item.product.name}</td>\n"
-        return cell
+        return self._print_line(
+            indentation=indentation, content=f"<td>{item.product.name}</td>"
+        )
 
     def _print_item_unit_price(self, item: ReceiptItem, indentation: int) -> str:
         price_euros_string = self._get_price_string(price_cents=item.price_cents)
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{price_euros_string}</td>\n"
-        return cell
+        return self._print_line(
+            indentation=indentation, content=f"<td>{price_euros_string}</td>"
+        )
 
     def _print_item_quantity(self, item: ReceiptItem, indentation: int) -> str:
         quantity_string = self._get_quantity_string(item=item)
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{quantity_string}</td>\n"
-        return cell
+        return self._print_line(
+            indentation=indentation, content=f"<td>{quantity_string}</td>"
+        )
 
     def _print_item_total_price(self, item: ReceiptItem, indentation: int) -> str:
         price_euros_string = self._get_price_string(price_cents=item.total_price_cents)
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{price_euros_string}</td>\n"
-        return cell
-
-    def _print_discount_table(self, receipt: Receipt, indentation: int) -> str:
-        if len(receipt.discounts) == 0:
-            return ""
+        return self._print_line(
+            indentation=indentation, content=f"<td>{price_euros_string}</td>"
+        )
 
-        content = self._print_indentation(indentation=indentation)
-        content += "<table>\n"
-        content += self._print_discount_table_headers(indentation=(indentation + 2))
-        for discount in receipt.discounts:
-            content += self._print_discount_table_row(
+    def _print_discount_table(
+        self, receipt: Receipt, indentation: int
+    ) -> Iterator[str]:
+        discounts = receipt.discounts
+        if len(discounts) == 0:
+            return
+
+        yield self._print_line(indentation=indentation, content="<table>")
+        yield from self._print_discount_table_headers(indentation=(indentation + 2))
+        for discount in discounts:
+            yield from self._print_discount_table_row(
                 discount=discount, indentation=(indentation + 2)
             )
-        content += self._print_indentation(indentation=indentation)
-        content += "</table>\n"
-        return content
-
-    def _print_discount_table_headers(self, indentation: int) -> str:
-        row = self._print_indentation(indentation=indentation)
-        row += "<tr>\n"
-        row += self._print_indentation(indentation=(indentation + 2))
-        row += "<th>Discount description</th>\n"
-        row += self._print_indentation(indentation=(indentation + 2))
-        row += "<th>Discount value (EUR)</th>\n"
-        row += self._print_indentation(indentation=indentation)
-        row += "</tr>\n"
-        return row
-
-    def _print_discount_table_row(self, discount: Discount, indentation: int) -> str:
-        row = self._print_indentation(indentation=indentation)
-        row += "<tr>\n"
-        row += self._print_discount_description(
+        yield self._print_line(indentation=indentation, content="</table>")
+
+    def _print_discount_table_headers(self, indentation: int) -> Iterator[str]:
+        yield self._print_line(indentation=indentation, content="<tr>")
+        for header in ("Discount description", "Discount value (EUR)"):
+            yield self._print_line(
+                indentation=(indentation + 2), content=f"<th>{header}</th>"
+            )
+        yield self._print_line(indentation=indentation, content="</tr>")
+
+    def _print_discount_table_row(
+        self, discount: Discount, indentation: int
+    ) -> Iterator[str]:
+        yield self._print_line(indentation=indentation, content="<tr>")
+        yield self._print_discount_description(
             discount=discount, indentation=(indentation + 2)
         )
-        row += self._print_discount_value(
+        yield self._print_discount_value(
             discount=discount, indentation=(indentation + 2)
         )
-        row += self._print_indentation(indentation=indentation)
-        row += "</tr>\n"
-        return row
+        yield self._print_line(indentation=indentation, content="</tr>")
 
     def _print_discount_description(self, discount: Discount, indentation: int) -> str:
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{discount.description}</td>\n"
-        return cell
+        return self._print_line(
+            indentation=indentation, content=f"<td>{discount.description}</td>"
+        )
 
     def _print_discount_value(self, discount: Discount, indentation: int) -> str:
         discount_value_euros_string = self._get_price_string(
             price_cents=discount.discount_amount_cents
         )
-        cell = self._print_indentation(indentation=indentation)
-        cell += f"<td>{discount_value_euros_string}</td>\n"
-        return cell
+        return self._print_line(
+            indentation=indentation, content=f"<td>{discount_value_euros_string}</td>"
+        )
 
     def _print_total(self, receipt: Receipt, indentation: int) -> str:
         total_price_euros_string = self._get_price_string(
             price_cents=receipt.get_total_price_cents()
         )
-        line = self._print_indentation(indentation=indentation)
-        line += f"<p>Total: {total_price_euros_string}</p>\n"
-        return line
+        return self._print_line(
+            indentation=indentation, content=f"<p>Total: {total_price_euros_string}</p>"
+        )
@@ -0,0 +1,375 @@
+"""Module that contains a compact binary format for shipping Receipts.
+
+A stream of Receipts, e.g. the Receipts that a till sends to the central store,
+is a sequence of records. Every record starts with a one-byte tag and is followed
+by fixed-size struct-packed fields:
+
+- a stream header, which contains a magic value and the format version,
+- a Product definition, which contains the ProductUnit and name of a Product,
+- a description definition, which contains a Discount description,
+- a Receipt, which contains the price version and the number of items and
+  Discounts, followed by the items and the Discounts themselves.
+
+Products and descriptions are defined once per stream, before the first Receipt
+that uses them, and are then referenced by their index in the order of their
+definitions. product_ids can't be used for that, because they are only valid
+within the process that created the Products. A stream header starts a new
+stream and resets the definitions, so several streams can simply be concatenated
+and read as one.
+
+All numbers are stored in little-endian byte order. Readers reject Receipts with
+more than _MAX_RECORD_COUNT items or Discounts and names or descriptions longer
+than _MAX_TEXT_LENGTH bytes, so that a corrupt count or length can't make them
+allocate huge buffers.
+"""
+
+import io
+import struct
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+from model_objects import Discount, Product, ProductUnit
+from receipt import Receipt, ReceiptItem
+
+_STREAM_TAG = b"\x89"
+_PRODUCT_TAG = b"\x01"
+_DESCRIPTION_TAG = b"\x02"
+_RECEIPT_TAG = b"\x03"
+_MAGIC = b"RCPTSTR"
+_VERSION = 1
+# stored instead of the price_version of Receipts that have none
+_NO_PRICE_VERSION = -1
+
+# the fields of every record, without its tag
+# magic, version
+_STREAM_HEADER = struct.Struct("<7sB")
+# unit, length of the name
+_PRODUCT_HEADER = struct.Struct("<BI")
+# length of the description
+_DESCRIPTION_HEADER = struct.Struct("<I")
+# price version, item count, discount count
+_RECEIPT_HEADER = struct.Struct("<qII")
+# product index, whether the quantity is an integer, quantity, unit price, total
+_ITEM = struct.Struct("<IBdqq")
+# product index, description index, amount
+_DISCOUNT = struct.Struct("<IIq")
+# the highest number of items and of Discounts of a Receipt that is read
+_MAX_RECORD_COUNT = 1 << 20
+# the highest length of a Product name or Discount description in bytes
+_MAX_TEXT_LENGTH = 1 << 16
+
+
+class InvalidReceiptStreamError(Exception):
+    pass
+
+
+def _encode_text(text: str) -> bytes:
+    encoded_text = text.encode("utf-8")
+    if len(encoded_text) > _MAX_TEXT_LENGTH:
+        raise ValueError(
+            f"Can't write {text[:20]!r}... to Receipt stream - text is longer than {_MAX_TEXT_LENGTH} bytes!"
+        )
+    return encoded_text
+
+
+class ReceiptWriter:
+    """Class that writes Receipts to a binary stream.
+
+    The stream header is written when the writer is created. Every Receipt is
+    written with a single call to the file, together with the definitions of the
+    Products and descriptions that it uses for the first time.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self._product_indices: dict[Product, int] = {}
+        self._description_indices: dict[str, int] = {}
+        file.write(_STREAM_TAG + _STREAM_HEADER.pack(_MAGIC, _VERSION))
+
+    def _get_product_index(self, product: Product, definitions: list[bytes]) -> int:
+        index = self._product_indices.get(product)
+        if index is None:
+            index = len(self._product_indices)
+            self._product_indices[product] = index
+            name = _encode_text(text=product.name)
+            definitions.append(
+                _PRODUCT_TAG
+                + _PRODUCT_HEADER.pack(product.unit.value, len(name))
+                + name
+            )
+        return index
+
+    def _get_description_index(self, description: str, definitions: list[bytes]) -> int:
+        index = self._description_indices.get(description)
+        if index is None:
+            index = len(self._description_indices)
+            self._description_indices[description] = index
+            encoded_description = _encode_text(text=description)
+            definitions.append(
+                _DESCRIPTION_TAG
+                + _DESCRIPTION_HEADER.pack(len(encoded_description))
+                + encoded_description
+            )
+        return index
+
+    def _forget_definitions(self, product_count: int, description_count: int) -> None:
+        # removes the indices of the Products and descriptions that were added after
+        # the given counts were taken, whose definitions haven't been written
+        for product in list(self._product_indices)[product_count:]:
+            del self._product_indices[product]
+        for description in list(self._description_indices)[description_count:]:
+            del self._description_indices[description]
+
+    def write_receipt(self, receipt: Receipt) -> None:
+        """Writes a single Receipt to the stream.
+
+        A Receipt that can't be written leaves the stream and the writer unchanged,
+        so that further Receipts can still be written.
+
+        Args:
+            receipt (Receipt): The Receipt that is to be written.
+
+        Raises:
+            ValueError: Raised if the Receipt has too many items or Discounts, or
+            a Product name or Discount description is too long to be read again.
+        """
+
+        if (
+            len(receipt.items) > _MAX_RECORD_COUNT
+            or len(receipt.discounts) > _MAX_RECORD_COUNT
+        ):
+            raise ValueError(
+                f"Can't write Receipt to Receipt stream - Receipt has more than {_MAX_RECORD_COUNT} items or Discounts!"
+            )
+        product_count = len(self._product_indices)
+        description_count = len(self._description_indices)
+        try:
+            data = self._encode_receipt(receipt=receipt)
+        except BaseException:
+            self._forget_definitions(
+                product_count=product_count, description_count=description_count
+            )
+            raise
+        self.file.write(data)
+
+    def _encode_receipt(self, receipt: Receipt) -> bytes:
+        # returns the records of the Receipt, preceded by the definitions of the
+        # Products and descriptions that it uses for the first time
+        definitions: list[bytes] = []
+        product_indices = self._product_indices
+        pack_item = _ITEM.pack
+        records = [
+            _RECEIPT_TAG
+            + _RECEIPT_HEADER.pack(
+                (
+                    _NO_PRICE_VERSION
+                    if receipt.price_version is None
+                    else receipt.price_version
+                ),
+                len(receipt.items),
+                len(receipt.discounts),
+            )
+        ]
+        for item in receipt.items:
+            product_index = product_indices.get(item.product)
+            if product_index is None:
+                product_index = self._get_product_index(
+                    product=item.product, definitions=definitions
+                )
+            records.append(
+                pack_item(
+                    product_index,
+                    type(item.quantity) is int,
+                    item.quantity,
+                    item.price_cents,
+                    item.total_price_cents,
+                )
+            )
+        for discount in receipt.discounts:
+            records.append(
+                _DISCOUNT.pack(
+                    self._get_product_index(
+                        product=discount.product, definitions=definitions
+                    ),
+                    self._get_description_index(
+                        description=discount.description, definitions=definitions
+                    ),
+                    discount.discount_amount_cents,
+                )
+            )
+        return b"".join(definitions + records)
+
+    def write_receipts(self, receipts: Iterable[Receipt]) -> None:
+        for receipt in receipts:
+            self.write_receipt(receipt=receipt)
+
+
+def serialize_receipts(receipts: Iterable[Receipt]) -> bytes:
+    """Serializes Receipts into a single, self-contained stream.
+
+    Args:
+        receipts (Iterable[Receipt]): The Receipts that are to be serialized.
+
+    Returns:
+        bytes: The stream, which can be read with read_receipts.
+    """
+
+    file = io.BytesIO()
+    ReceiptWriter(file=file).write_receipts(receipts=receipts)
+    return file.getvalue()
+
+
+def _read_exactly(file: BinaryIO, length: int) -> bytes:
+    data = file.read(length)
+    if len(data) != length:
+        raise InvalidReceiptStreamError("Receipt stream is truncated!")
+    return data
+
+
+def _read_text(file: BinaryIO, length: int) -> str:
+    if length > _MAX_TEXT_LENGTH:
+        raise InvalidReceiptStreamError(
+            f"Receipt stream contains a text of {length} bytes, but at most {_MAX_TEXT_LENGTH} bytes are allowed!"
+        )
+    try:
+        return _read_exactly(file=file, length=length).decode("utf-8")
+    except UnicodeDecodeError:
+        raise InvalidReceiptStreamError(
+            "Receipt stream contains a text that is not valid UTF-8!"
+        ) from None
+
+
+def read_receipts(file: BinaryIO) -> Iterator[Receipt]:
+    """Reads all Receipts from a binary stream, one at a time.
+
+    The stream may consist of several concatenated streams, e.g. of several
+    tills. Only the current Receipt is held in memory, so arbitrarily long
+    streams can be read.
+
+    Args:
+        file (BinaryIO): The binary stream, e.g. a file opened with "rb".
+
+    Raises:
+        InvalidReceiptStreamError: Raised if the stream doesn't start with a
+        stream header, contains an unknown record, ProductUnit or invalid UTF-8,
+        exceeds a size limit, references a Product or description that hasn't
+        been defined, or ends within a record.
+
+    Yields:
+        Iterator[Receipt]: The Receipts, in the order in which they were written.
+    """
+
+    products: list[Product] = []
+    descriptions: list[str] = []
+    has_header = False
+    while True:
+        tag = file.read(1)
+        if not tag:
+            return
+        if tag == _STREAM_TAG:
+            magic, version = _STREAM_HEADER.unpack(
+                _read_exactly(file=file, length=_STREAM_HEADER.size)
+            )
+            if magic != _MAGIC:
+                raise InvalidReceiptStreamError("Data is not a Receipt stream!")
+            if version != _VERSION:
+                raise InvalidReceiptStreamError(
+                    f"Can't read version {version} of the Receipt stream format, only version {_VERSION}!"
+                )
+            products = []
+            descriptions = []
+            has_header = True
+        elif not has_header:
+            raise InvalidReceiptStreamError("Data is not a Receipt stream!")
+        elif tag == _RECEIPT_TAG:
+            yield _read_receipt(file=file, products=products, descriptions=descriptions)
+        elif tag == _PRODUCT_TAG:
+            unit, name_length = _PRODUCT_HEADER.unpack(
+                _read_exactly(file=file, length=_PRODUCT_HEADER.size)
+            )
+            name = _read_text(file=file, length=name_length)
+            try:
+                product_unit = ProductUnit(unit)
+            except ValueError:
+                raise InvalidReceiptStreamError(
+                    f"Receipt stream contains unknown ProductUnit {unit}!"
+                ) from None
+            products.append(Product(name=name, unit=product_unit))
+        elif tag == _DESCRIPTION_TAG:
+            (description_length,) = _DESCRIPTION_HEADER.unpack(
+                _read_exactly(file=file, length=_DESCRIPTION_HEADER.size)
+            )
+            descriptions.append(_read_text(file=file, length=description_length))
+        else:
+            raise InvalidReceiptStreamError(
+                f"Receipt stream contains unknown record type {tag[0]}!"
+            )
+
+
+def _read_receipt(
+    file: BinaryIO, products: list[Product], descriptions: list[str]
+) -> Receipt:
+    price_version, item_count, discount_count = _RECEIPT_HEADER.unpack(
+        _read_exactly(file=file, length=_RECEIPT_HEADER.size)
+    )
+    receipt = Receipt(
+        price_version=None if price_version == _NO_PRICE_VERSION else price_version
+    )
+    if item_count > _MAX_RECORD_COUNT or discount_count > _MAX_RECORD_COUNT:
+        raise InvalidReceiptStreamError(
+            f"Receipt stream contains a Receipt with {item_count} items and {discount_count} Discounts, but at most {_MAX_RECORD_COUNT} of each are allowed!"
+        )
+    # the items and Discounts of a Receipt are read with one call each
+    items_data = _read_exactly(file=file, length=item_count * _ITEM.size)
+    discounts_data = _read_exactly(file=file, length=discount_count * _DISCOUNT.size)
+    try:
+        receipt.add_items(
+            items=[
+                ReceiptItem(
+                    product=products[product_index],
+                    quantity=int(quantity) if is_integer_quantity else quantity,
+                    price_cents=price_cents,
+                    total_price_cents=total_price_cents,
+                )
+                for (
+                    product_index,
+                    is_integer_quantity,
+                    quantity,
+                    price_cents,
+                    total_price_cents,
+                ) in _ITEM.iter_unpack(items_data)
+            ]
+        )
+        receipt.add_discounts(
+            discounts=[
+                Discount(
+                    product=products[product_index],
+                    description=descriptions[description_index],
+                    discount_amount_cents=discount_amount_cents,
+                )
+                for product_index, description_index, discount_amount_cents in (
+                    _DISCOUNT.iter_unpack(discounts_data)
+                )
+            ]
+        )
+    except IndexError:
+        raise InvalidReceiptStreamError(
+            "Receipt stream references a Product or description that hasn't been defined!"
+        ) from None
+    return receipt
+
+
+def deserialize_receipts(data: bytes) -> list[Receipt]:
+    """Deserializes all Receipts of one or more concatenated streams.
+
+    Args:
+        data (bytes): The serialized streams.
+
+    Raises:
+        InvalidReceiptStreamError: Raised if the data is not a valid stream.
+
+    Returns:
+        list[Receipt]: The deserialized Receipts.
+    """
+
+    return list(read_receipts(file=io.BytesIO(data)))
@@ -1,7 +1,8 @@
-from typing import Union
+from typing import Callable, Union
 
 from catalog import SupermarketCatalog
-from model_objects import Product, ProductUnit
+from model_objects import Product
+from quantities import QUANTITY_SCALES, from_fixed_point_quantity
 
 
 class IllegalQuantityForProductTypeError(Exception):
@@ -12,32 +13,172 @@ class ProductNotInCatalogError(Exception):
     pass
 
 
+class ProductNotInCartError(Exception):
+    pass
+
+
+# called with a Product and its new fixed-point quantity whenever the quantity
+# changes; a quantity of 0 means that the Product has been removed from the
+# ShoppingCart
+CartListener = Callable[[Product, int], None]
+
+
 class ShoppingCart:
     """Class that represents a collection of Products that are to be bought.
 
     A ShoppingCart is associated with a SupermarketCatalog, and only allows for
-    adding Products that belong to that SupermarketCatalog.
+    adding Products that belong to that SupermarketCatalog. Every Product is only
+    looked up in the SupermarketCatalog when it is first added. Listeners can be
+    registered to be notified whenever the quantity of a Product changes.
+
+    Quantities are given in items or kilograms, but kept as fixed-point integers
+    (items or grams, see the quantities module), so that repeatedly adding and
+    removing weights doesn't accumulate rounding errors. Weights are rounded to
+    the nearest gram, and weights that would be rounded to 0 grams are rejected.
     """
 
     def __init__(self, catalog: SupermarketCatalog):
         self.catalog = catalog
-        self._product_quantities: dict[Product, float] = {}
+        self._product_quantities: dict[Product, int] = {}
+        self._listeners: list[CartListener] = []
+
+    def add_listener(self, listener: CartListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: CartListener) -> None:
+        self._listeners.remove(listener)
 
     @property
-    def product_quantities(self):
+    def product_quantities(self) -> dict[Product, int]:
+        """The fixed-point quantity of every Product, i.e. in items or grams."""
         return self._product_quantities
 
-    def add_item_quantity(self, product: Product, quantity: Union[int, float]) -> None:
-        if product.unit == ProductUnit.EACH and not float(quantity).is_integer():
-            raise IllegalQuantityForProductTypeError(
-                f"Can't add {quantity} of {product} to cart - Products with ProductUnit.EACH must be added in integer quantities!"
+    # Actions describe changes for error messages, e.g. "add {quantity} of
+    # {product} to cart". They are only formatted when an error is raised, because
+    # formatting them for every scanned item would be slower than the change itself.
+
+    def _to_fixed_point_quantity(
+        self, product: Product, quantity: Union[int, float], action: str
+    ) -> int:
+        scale = QUANTITY_SCALES[product.unit]
+        if scale == 1:
+            if not float(quantity).is_integer():
+                raise IllegalQuantityForProductTypeError(
+                    f"Can't {action.format(quantity=quantity, product=product)} - Products with ProductUnit.EACH must be added in integer quantities!"
+                )
+            return int(quantity)
+        # weights are rounded to the nearest gram
+        fixed_point_quantity = round(quantity * scale)
+        if fixed_point_quantity == 0 and quantity != 0:
+            raise ValueError(
+                f"Can't {action.format(quantity=quantity, product=product)} - weights are rounded to the nearest gram, but quantity would be rounded to 0 grams!"
+            )
+        return fixed_point_quantity
+
+    def _verify_not_negative(
+        self, product: Product, quantity: Union[int, float], action: str
+    ) -> None:
+        if quantity < 0:
+            raise ValueError(
+                f"Can't {action.format(quantity=quantity, product=product)} - quantity must not be negative!"
             )
+
+    def _verify_product_in_catalog(self, product: Product) -> None:
+        # Products in the ShoppingCart have already been verified when they were
+        # first added, so the SupermarketCatalog is only asked for new Products
+        if product in self._product_quantities:
+            return
         if not self.catalog.contains_product(product=product):
             raise ProductNotInCatalogError(
                 f"Can't add {product} to ShoppingCart - Product is not in Catalog that this ShoppingCart belongs to!"
             )
 
-        if product in self._product_quantities.keys():
-            self._product_quantities[product] += quantity
+    def _set_quantity(self, product: Product, quantity: int) -> None:
+        if quantity == 0:
+            self._product_quantities.pop(product, None)
         else:
             self._product_quantities[product] = quantity
+        for listener in self._listeners:
+            listener(product, quantity)
+
+    def add_item_quantity(self, product: Product, quantity: Union[int, float]) -> None:
+        fixed_point_quantity = self._to_fixed_point_quantity(
+            product=product,
+            quantity=quantity,
+            action="add {quantity} of {product} to cart",
+        )
+        self._verify_product_in_catalog(product=product)
+
+        if product in self._product_quantities.keys():
+            self._product_quantities[product] += fixed_point_quantity
+        else:
+            self._product_quantities[product] = fixed_point_quantity
+        for listener in self._listeners:
+            listener(product, self._product_quantities[product])
+
+    def remove_item_quantity(
+        self, product: Product, quantity: Union[int, float]
+    ) -> None:
+        """Removes the given quantity of a Product from the ShoppingCart.
+
+        If the whole quantity of the Product is removed, the Product is removed
+        from the ShoppingCart.
+
+        Args:
+            product (Product): The Product of which some quantity is to be removed.
+            quantity (Union[int, float]): The quantity that is to be removed.
+
+        Raises:
+            ProductNotInCartError: Raised if the Product is not in the ShoppingCart.
+            ValueError: Raised if the quantity is negative, a weight that would
+            be rounded to 0 grams, or higher than the quantity of the Product in
+            the ShoppingCart.
+            IllegalQuantityForProductTypeError: Raised if the Product has
+            ProductUnit.EACH and the quantity is not an integer.
+        """
+
+        action = "remove {quantity} of {product} from cart"
+        fixed_point_quantity = self._to_fixed_point_quantity(
+            product=product, quantity=quantity, action=action
+        )
+        self._verify_not_negative(product=product, quantity=quantity, action=action)
+        current_quantity = self._product_quantities.get(product)
+        if current_quantity is None:
+            raise ProductNotInCartError(
+                f"Can't remove {product} from ShoppingCart - Product is not in ShoppingCart!"
+            )
+
+        remaining_quantity = current_quantity - fixed_point_quantity
+        if remaining_quantity < 0:
+            raise ValueError(
+                f"Can't remove {quantity} of {product} from ShoppingCart - ShoppingCart only contains {from_fixed_point_quantity(product=product, quantity=current_quantity)}!"
+            )
+        self._set_quantity(product=product, quantity=remaining_quantity)
+
+    def set_item_quantity(self, product: Product, quantity: Union[int, float]) -> None:
+        """Sets the quantity of a Product in the ShoppingCart.
+
+        Setting the quantity to 0 removes the Product from the ShoppingCart.
+
+        Args:
+            product (Product): The Product whose quantity is to be set.
+            quantity (Union[int, float]): The new quantity of the Product.
+
+        Raises:
+            ValueError: Raised if the quantity is negative or a weight that would
+            be rounded to 0 grams.
+            IllegalQuantityForProductTypeError: Raised if the Product has
+            ProductUnit.EACH and the quantity is not an integer.
+            ProductNotInCatalogError: Raised if the Product is new to the
+            ShoppingCart and not in its SupermarketCatalog.
+        """
+
+        action = "set quantity of {product} in cart to {quantity}"
+        fixed_point_quantity = self._to_fixed_point_quantity(
+            product=product, quantity=quantity, action=action
+        )
+        self._verify_not_negative(product=product, quantity=quantity, action=action)
+        if fixed_point_quantity == 0 and product not in self._product_quantities:
+            return
+        self._verify_product_in_catalog(product=product)
+        self._set_quantity(product=product, quantity=fixed_point_quantity)
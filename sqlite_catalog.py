@@ -0,0 +1,286 @@
+"""Module that contains a SupermarketCatalog that is stored in an SQLite database.
+
+The catalog keeps a pool of connections, so that it can be shared by Tellers and
+ShoppingCarts in several threads: every call borrows a connection from the pool
+and returns it afterwards. All queries are constant strings, so that SQLite only
+prepares them once per connection and reuses the prepared statements afterwards.
+Unit prices of many Products are retrieved with batched IN (...) queries, whose
+batches are padded to a few fixed sizes for the same reason.
+"""
+
+import collections
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Optional
+
+from catalog import SupermarketCatalog
+from model_objects import Product
+
+# the sizes of the batches in which unit prices are retrieved; every batch is padded
+# to the next size, so that there is only one prepared statement per size
+_BATCH_SIZES = (1, 4, 16, 64, 256)
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS products (
+    name TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    price_cents INTEGER NOT NULL,
+    PRIMARY KEY (name, unit)
+) WITHOUT ROWID
+"""
+_UPSERT_PRODUCT = """
+INSERT INTO products (name, unit, price_cents) VALUES (?, ?, ?)
+ON CONFLICT (name, unit) DO UPDATE SET price_cents = excluded.price_cents
+"""
+_SELECT_CONTAINS_PRODUCT = "SELECT 1 FROM products WHERE name = ? AND unit = ?"
+_SELECT_UNIT_PRICE = "SELECT price_cents FROM products WHERE name = ? AND unit = ?"
+# Products are selected by name only, so that the primary key index is used, which
+# SQLite doesn't do for IN with (name, unit) row values; the rows of Products with
+# the same name but a different ProductUnit are skipped afterwards
+_SELECT_UNIT_PRICES = {
+    batch_size: "SELECT name, unit, price_cents FROM products "
+    f"WHERE name IN ({', '.join(['?'] * batch_size)})"
+    for batch_size in _BATCH_SIZES
+}
+
+
+class ConnectionPoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPoolClosedError(Exception):
+    pass
+
+
+class _ConnectionPool:
+    """Pool that creates up to max_size connections to the same database on demand.
+
+    Connections are handed out in the order in which they are requested, so that a
+    thread that has just returned a connection can't take it again while other
+    threads are waiting for one. Once the pool is closed, no more connections are
+    handed out.
+    """
+
+    def __init__(self, database: str, max_size: int, timeout_seconds: float):
+        self.database = database
+        self.max_size = max_size
+        self.timeout_seconds = timeout_seconds
+        self._idle_connections: list[sqlite3.Connection] = []
+        self._all_connections: list[sqlite3.Connection] = []
+        # the threads that are waiting for a connection, in the order of arrival
+        self._waiters: collections.deque[object] = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def _create_connection(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database,
+            timeout=self.timeout_seconds,
+            # connections are used by one thread at a time, but not always the same
+            check_same_thread=False,
+            cached_statements=len(_SELECT_UNIT_PRICES) + 8,
+        )
+        self._all_connections.append(connection)
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        waiter = object()
+        deadline = time.monotonic() + self.timeout_seconds
+        with self._condition:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    if self._closed:
+                        raise ConnectionPoolClosedError(
+                            "Can't get a database connection - the pool has been closed!"
+                        )
+                    if self._waiters[0] is waiter:
+                        if self._idle_connections:
+                            return self._idle_connections.pop()
+                        if len(self._all_connections) < self.max_size:
+                            return self._create_connection()
+                    remaining_seconds = deadline - time.monotonic()
+                    if remaining_seconds <= 0:
+                        raise ConnectionPoolTimeoutError(
+                            f"Can't get a database connection - all {self.max_size} connections have been in use for {self.timeout_seconds} seconds!"
+                        )
+                    self._condition.wait(timeout=remaining_seconds)
+            finally:
+                self._waiters.remove(waiter)
+                # the next waiter may be first in line now
+                self._condition.notify_all()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            with self._condition:
+                self._idle_connections.append(connection)
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """Closes all connections, after waiting until those in use are returned."""
+        with self._condition:
+            self._closed = True
+            # threads that are waiting for a connection give up
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: len(self._idle_connections) == len(self._all_connections)
+            )
+            for connection in self._all_connections:
+                connection.close()
+            self._all_connections.clear()
+            self._idle_connections.clear()
+
+
+class SqliteCatalog(SupermarketCatalog):
+    """Class that represents a SupermarketCatalog in an SQLite database.
+
+    Products are identified by their name and ProductUnit, because product_ids are
+    only valid within a single process. The catalog is safe to use from several
+    threads at once, with up to pool_size concurrent queries; callers wait up to
+    timeout_seconds for a free connection or a lock on the database.
+
+    The database is the path of a database file, which is opened in WAL mode so
+    that readers and the writer don't block each other. By default, the catalog
+    creates a new database file in a temporary directory, which is deleted when the
+    catalog is closed. An in-memory database isn't used for that, because all
+    connections to a shared in-memory database use the same cache, in which writes
+    fail with "database table is locked" while other connections are reading. For
+    the same reason, ":memory:" and "" can't be used as database: they would give
+    every connection of the pool its own, separate database.
+    """
+
+    def __init__(
+        self,
+        database: Optional[str] = None,
+        pool_size: int = 4,
+        timeout_seconds: float = 5.0,
+    ):
+        if pool_size < 1:
+            raise ValueError(
+                f"pool_size must be positive integer, but got {pool_size}!"
+            )
+        if database in (":memory:", ""):
+            raise ValueError(
+                f"database must be the path of a database file, but got {database!r}!"
+            )
+        self._temporary_directory: Optional[tempfile.TemporaryDirectory] = None
+        if database is None:
+            self._temporary_directory = tempfile.TemporaryDirectory(
+                prefix="sqlite_catalog_"
+            )
+            database = os.path.join(self._temporary_directory.name, "catalog.sqlite")
+        self._pool = _ConnectionPool(
+            database=database,
+            max_size=pool_size,
+            timeout_seconds=timeout_seconds,
+        )
+        with self._pool.connection() as connection:
+            # readers don't block the writer and vice versa
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(_CREATE_TABLE)
+
+    def close(self) -> None:
+        """Closes all connections. A temporary database is deleted with them.
+
+        Queries that are running in other threads are finished first; queries that
+        are started afterwards raise ConnectionPoolClosedError.
+        """
+        self._pool.close()
+        if self._temporary_directory is not None:
+            self._temporary_directory.cleanup()
+            self._temporary_directory = None
+
+    def __enter__(self) -> "SqliteCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_product(self, product: Product, price_cents: int) -> None:
+        self.add_products(products_prices_cents={product: price_cents})
+
+    def add_products(self, products_prices_cents: dict[Product, int]) -> None:
+        """Adds many Products with a single statement and transaction.
+
+        The prices of Products that are already in the catalog are replaced.
+
+        Args:
+            products_prices_cents (dict[Product, int]): A dict that contains the
+            unit price in cents for every Product that is to be added.
+        """
+
+        with self._pool.connection() as connection, connection:
+            connection.executemany(
+                _UPSERT_PRODUCT,
+                (
+                    (product.name, product.unit.value, price_cents)
+                    for product, price_cents in products_prices_cents.items()
+                ),
+            )
+
+    def contains_product(self, product: Product) -> bool:
+        with self._pool.connection() as connection:
+            row = connection.execute(
+                _SELECT_CONTAINS_PRODUCT, (product.name, product.unit.value)
+            ).fetchone()
+        return row is not None
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        with self._pool.connection() as connection:
+            row = connection.execute(
+                _SELECT_UNIT_PRICE, (product.name, product.unit.value)
+            ).fetchone()
+        if row is None:
+            raise KeyError(
+                f"Can't get unit price of {product}: Product is not in the catalog!"
+            )
+        return row[0]
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        """Retrieves the unit prices of all given Products with batched queries.
+
+        Args:
+            products (list[Product]): The Products whose unit prices are to be retrieved.
+
+        Raises:
+            KeyError: Raised if one of the Products is not in the catalog.
+
+        Returns:
+            dict[Product, int]: A dict that contains the unit price in cents for every
+            given Product, in the order of the given Products.
+        """
+
+        unique_products = list(dict.fromkeys(products))
+        keys_prices_cents: dict[tuple[str, int], int] = {}
+        max_batch_size = _BATCH_SIZES[-1]
+        with self._pool.connection() as connection:
+            for start in range(0, len(unique_products), max_batch_size):
+                batch = unique_products[start : start + max_batch_size]
+                batch_size = next(size for size in _BATCH_SIZES if size >= len(batch))
+                # pad the batch by repeating the name of its last Product
+                names = [product.name for product in batch]
+                names += [names[-1]] * (batch_size - len(names))
+                for name, unit, price_cents in connection.execute(
+                    _SELECT_UNIT_PRICES[batch_size], names
+                ):
+                    keys_prices_cents[(name, unit)] = price_cents
+
+        unit_prices_cents: dict[Product, int] = {}
+        for product in unique_products:
+            price_cents = keys_prices_cents.get((product.name, product.unit.value))
+            if price_cents is None:
+                raise KeyError(
+                    f"Can't get unit price of {product}: Product is not in the catalog!"
+                )
+            unit_prices_cents[product] = price_cents
+        return unit_prices_cents
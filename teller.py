@@ -1,6 +1,16 @@
-from catalog import SupermarketCatalog
-from discount_creation import create_discounts
-from model_objects import Bundle, Offer, Product
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Optional
+
+from catalog import AsyncSupermarketCatalog, PriceSnapshot, SupermarketCatalog
+from checkout_metrics import (CATALOG_CALLS, CATALOG_LOOKUP, CATALOG_PRODUCTS,
+                              CHECKOUT, NULL_METRICS_SINK, RECEIPT_ITEMS,
+                              CheckoutMetricsSink)
+from discount_creation import OfferDiscountCache, OfferEvaluator, compile_offer
+from discount_selection import create_best_discounts
+from model_objects import Bundle, Discount, Offer, Product
+from quantities import from_fixed_point_quantity, get_total_price_cents
 from receipt import Receipt
 from shopping_cart import ShoppingCart
 
@@ -13,17 +23,136 @@ class AlreadyHasBundleError(Exception):
     pass
 
 
+class OfferNotFoundError(Exception):
+    pass
+
+
+def _get_read_only(mapping: Mapping) -> MappingProxyType:
+    # the mappings of an existing state are shared, all others are copied, so that
+    # the state can't be changed through them
+    if isinstance(mapping, MappingProxyType):
+        return mapping
+    return MappingProxyType(dict(mapping))
+
+
+class PromotionState:
+    """Class that represents the Offers and Bundles of a Teller at one point in time.
+
+    States are immutable, so they can be read by any number of threads without
+    locking: the mappings are read-only views and the Offers and Bundles of every
+    Product are tuples. A change creates a new state with shallow copies of the
+    changed mappings, which share all tuples but those of the changed Products.
+    """
+
+    __slots__ = ("product_offers_map", "product_bundles_map", "offer_evaluators")
+
+    def __init__(
+        self,
+        product_offers_map: Mapping[Product, tuple[Offer, ...]],
+        product_bundles_map: Mapping[Product, tuple[Bundle, ...]],
+        offer_evaluators: Mapping[Offer, OfferEvaluator],
+    ):
+        # a Product may have several Offers and be part of several Bundles
+        self.product_offers_map = _get_read_only(mapping=product_offers_map)
+        self.product_bundles_map = _get_read_only(mapping=product_bundles_map)
+        # the compiled Offers, used instead of the Offers at checkout
+        self.offer_evaluators = _get_read_only(mapping=offer_evaluators)
+
+    def with_offer(
+        self, offer: Offer, offer_evaluator: OfferEvaluator
+    ) -> "PromotionState":
+        return PromotionState(
+            product_offers_map={
+                **self.product_offers_map,
+                offer.product: self.product_offers_map.get(offer.product, ())
+                + (offer,),
+            },
+            product_bundles_map=self.product_bundles_map,
+            offer_evaluators={**self.offer_evaluators, offer: offer_evaluator},
+        )
+
+    def without_offer(self, offer: Offer) -> "PromotionState":
+        product_offers_map = dict(self.product_offers_map)
+        offers = list(product_offers_map.pop(offer.product))
+        offers.remove(offer)
+        if offers:
+            product_offers_map[offer.product] = tuple(offers)
+        offer_evaluators = dict(self.offer_evaluators)
+        del offer_evaluators[offer]
+        return PromotionState(
+            product_offers_map=product_offers_map,
+            product_bundles_map=self.product_bundles_map,
+            offer_evaluators=offer_evaluators,
+        )
+
+    def with_bundle(self, bundle: Bundle) -> "PromotionState":
+        product_bundles_map = dict(self.product_bundles_map)
+        for product in bundle.products:
+            product_bundles_map[product] = product_bundles_map.get(product, ()) + (
+                bundle,
+            )
+        return PromotionState(
+            product_offers_map=self.product_offers_map,
+            product_bundles_map=product_bundles_map,
+            offer_evaluators=self.offer_evaluators,
+        )
+
+
 class Teller:
     """Class that represents the process of checking out items from a ShoppingCart.
 
     The Teller is associated with a SupermarketCatalog and is aware of all Offers
-    and Bundles that are currently active.
+    and Bundles that are currently active. Optionally, the Teller reports the
+    duration of every checkout stage and the number of catalog calls to a
+    CheckoutMetricsSink, and takes the Discounts of Offers from an
+    OfferDiscountCache, which is invalidated whenever the Offers change.
+
+    The Teller can be shared by many threads. Its Offers and Bundles are kept in an
+    immutable PromotionState, which every change replaces with a single
+    assignment. Every checkout takes the current state once, so checkouts never
+    lock and never see a half-applied change, while Offers and Bundles are edited
+    live. Changes are serialized by a lock, which checkouts never take.
     """
 
-    def __init__(self, catalog: SupermarketCatalog):
+    def __init__(
+        self,
+        catalog: SupermarketCatalog,
+        metrics_sink: CheckoutMetricsSink = NULL_METRICS_SINK,
+        offer_discount_cache: Optional[OfferDiscountCache] = None,
+    ):
         self.catalog = catalog
-        self.product_offers_map: dict[Product, Offer] = {}
-        self.product_bundles_map: dict[Product, Bundle] = {}
+        self.metrics_sink = metrics_sink
+        self.offer_discount_cache = offer_discount_cache
+        self._promotions = PromotionState(
+            product_offers_map={}, product_bundles_map={}, offer_evaluators={}
+        )
+        self._write_lock = threading.Lock()
+
+    @property
+    def promotions(self) -> PromotionState:
+        return self._promotions
+
+    @promotions.setter
+    def promotions(self, promotions: PromotionState) -> None:
+        with self._write_lock:
+            self._promotions = promotions
+            if self.offer_discount_cache is not None:
+                self.offer_discount_cache.clear()
+
+    # the following properties are read-only views of the current PromotionState;
+    # Offers and Bundles are changed with the methods of the Teller
+
+    @property
+    def product_offers_map(self) -> Mapping[Product, tuple[Offer, ...]]:
+        return self._promotions.product_offers_map
+
+    @property
+    def product_bundles_map(self) -> Mapping[Product, tuple[Bundle, ...]]:
+        return self._promotions.product_bundles_map
+
+    @property
+    def offer_evaluators(self) -> Mapping[Offer, OfferEvaluator]:
+        return self._promotions.offer_evaluators
 
     def add_offer(
         self,
@@ -32,27 +161,51 @@ class Teller:
         """Add Offer to the Teller instance.
 
         Every Offer added to the Teller will later be used when the Teller creates Receipts.
+        The Offer is validated and compiled once here, so changing it afterwards has no
+        effect unless it is added again. A Product may have several Offers and be part
+        of Bundles at the same time; at checkout, the best of them is applied.
 
         Args:
             offer (Offer): The Offer to add to the Teller.
 
         Raises:
-            AlreadyHasOfferError: Raised if the Offer is for a Product for which the Teller
-            already has an Offer.
-            AlreadyHasBundleError: Raised if the Offer is for a Product for which the Teller
-            already has a Bundle.
+            ValueError: Raised if the Offer has an unknown SpecialOfferType or an
+            invalid optional_argument.
+            AlreadyHasOfferError: Raised if the Offer has already been added to the Teller.
         """
 
-        product = offer.product
-        if product in self.product_offers_map:
-            raise AlreadyHasOfferError(
-                f"Can't add Offer for {product}: Product already has an Offer!"
-            )
-        if product in self.product_bundles_map:
-            raise AlreadyHasBundleError(
-                f"Can't add Offer for {product}: Product already has a Bundle!"
+        offer_evaluator = compile_offer(offer=offer)
+        with self._write_lock:
+            if offer in self._promotions.offer_evaluators:
+                raise AlreadyHasOfferError(
+                    f"Can't add Offer for {offer.product}: Offer has already been added!"
+                )
+            self._promotions = self._promotions.with_offer(
+                offer=offer, offer_evaluator=offer_evaluator
             )
-        self.product_offers_map[offer.product] = offer
+            if self.offer_discount_cache is not None:
+                # the same Offer may have been used and changed before it was re-added;
+                # Offers that have never been evaluated are skipped by the cache
+                self.offer_discount_cache.invalidate_offer(offer=offer)
+
+    def remove_offer(self, offer: Offer) -> None:
+        """Remove an Offer from the Teller instance.
+
+        Args:
+            offer (Offer): The Offer that is to be removed.
+
+        Raises:
+            OfferNotFoundError: Raised if the Offer has not been added to the Teller.
+        """
+
+        with self._write_lock:
+            if offer not in self._promotions.offer_evaluators:
+                raise OfferNotFoundError(
+                    f"Can't remove Offer for {offer.product}: Offer has not been added!"
+                )
+            self._promotions = self._promotions.without_offer(offer=offer)
+            if self.offer_discount_cache is not None:
+                self.offer_discount_cache.invalidate_offer(offer=offer)
 
     def add_bundle(
         self,
@@ -61,73 +214,225 @@ class Teller:
         """Add Bundle to the Teller instance.
 
         Every Bundle added to the Teller will later be used when the Teller creates Receipts.
+        The Products of the Bundle may have Offers and be part of other Bundles as well.
 
         Args:
-            offer (Offer): The Bundle to add to the Teller.
+            bundle (Bundle): The Bundle to add to the Teller.
 
         Raises:
-            AlreadyHasOfferError: Raised if the Bundle is for a Product for which the Teller
-            already has an Offer.
-            AlreadyHasBundleError: Raised if the Bundle is for a Product for which the Teller
-            already has a Bundle.
+            AlreadyHasBundleError: Raised if the Bundle has already been added to the
+            Teller.
         """
 
-        for product in bundle.products:
-            if product in self.product_offers_map:
-                raise AlreadyHasOfferError(
-                    f"Can't add Bundle for {product}: Product already has an Offer!"
-                )
-            if product in self.product_bundles_map:
-                raise AlreadyHasBundleError(
-                    f"Can't add Bundle for {product}: Product already has a Bundle!"
-                )
+        with self._write_lock:
+            for product in bundle.products:
+                if bundle in self._promotions.product_bundles_map.get(product, ()):
+                    raise AlreadyHasBundleError(
+                        f"Can't add Bundle for {product}: Bundle has already been added!"
+                    )
+            self._promotions = self._promotions.with_bundle(bundle=bundle)
 
-        for product in bundle.products:
-            self.product_bundles_map[product] = bundle
+    def _get_unit_prices_cents(
+        self, products: list[Product], price_snapshot: Optional[PriceSnapshot]
+    ) -> dict[Product, int]:
+        self.metrics_sink.increment(counter=CATALOG_CALLS)
+        self.metrics_sink.increment(counter=CATALOG_PRODUCTS, value=len(products))
+        with self.metrics_sink.measure(stage=CATALOG_LOOKUP):
+            if price_snapshot is not None:
+                return price_snapshot.get_unit_prices_cents(products=products)
+            return self.catalog.get_unit_prices_cents(products=products)
+
+    def _get_candidate_bundles(
+        self, product_quantities: dict[Product, int], promotions: PromotionState
+    ) -> list[Bundle]:
+        # Only Bundles that contain at least one Product of the ShoppingCart can
+        # lead to Discounts, so they are looked up via the purchased Products
+        # instead of checking every Bundle of the Teller
+        candidate_bundles: dict[Bundle, None] = {}
+        for product in product_quantities:
+            for bundle in promotions.product_bundles_map.get(product, ()):
+                candidate_bundles[bundle] = None
+        return list(candidate_bundles)
 
     def _add_products_to_receipt(
-        self, receipt: Receipt, product_quantities: dict[Product, float]
+        self,
+        receipt: Receipt,
+        product_quantities: dict[Product, int],
+        unit_prices_cents: dict[Product, int],
     ) -> None:
         for product, quantity in product_quantities.items():
-            unit_price_cents = self.catalog.get_unit_price_cents(product)
-            total_price_cents = round(quantity * unit_price_cents)
+            unit_price_cents = unit_prices_cents[product]
             receipt.add_product(
                 product=product,
-                quantity=quantity,
+                # weights are only converted to kilograms for the Receipt
+                quantity=from_fixed_point_quantity(product=product, quantity=quantity),
                 price_cents=unit_price_cents,
-                total_price_cents=total_price_cents,
+                total_price_cents=get_total_price_cents(
+                    product=product,
+                    quantity=quantity,
+                    unit_price_cents=unit_price_cents,
+                ),
             )
 
     def check_out_articles_from_cart(self, cart: ShoppingCart) -> Receipt:
         """Check out the items from a given ShoppingCart and return a Receipt.
 
         In order to create a Receipt, this method:
+            - retrieves the unit prices of all Products in the ShoppingCart from the
+              SupermarketCatalog in a single lookup, or from its current
+              PriceSnapshot if it publishes any
             - calculates the prices of all Products given via the ShoppingCart
-            - infers all Discounts for the Products (using the Offers and Bundles
-              stored by the Teller)
+            - selects the best Discounts for the Products (using the Offers and
+              Bundles stored by the Teller)
+
+        Args:
+            cart (ShoppingCart): The ShoppingCart whose Products are to be used for
+            the Receipt creation.
+
+        Returns:
+            Receipt: The Receipt created from the given ShoppingCart.
+        """
+
+        with self.metrics_sink.measure(stage=CHECKOUT):
+            # All unit prices are looked up once and then shared between the Receipt
+            # items and the Discount creation
+            promotions = self._promotions
+            price_snapshot = self.catalog.get_price_snapshot()
+            unit_prices_cents = self._get_unit_prices_cents(
+                products=list(cart.product_quantities), price_snapshot=price_snapshot
+            )
+            return self._create_receipt(
+                product_quantities=cart.product_quantities,
+                unit_prices_cents=unit_prices_cents,
+                promotions=promotions,
+                price_snapshot=price_snapshot,
+            )
+
+    async def check_out_articles_from_cart_async(self, cart: ShoppingCart) -> Receipt:
+        """Check out the items from a given ShoppingCart without blocking the event loop.
+
+        This works like check_out_articles_from_cart, but the unit prices of all
+        Products in the ShoppingCart are awaited concurrently, so that many checkouts
+        can run on the same event loop.
 
         Args:
             cart (ShoppingCart): The ShoppingCart whose Products are to be used for
             the Receipt creation.
 
+        Raises:
+            TypeError: Raised if the SupermarketCatalog of the Teller is not an
+            AsyncSupermarketCatalog.
+
         Returns:
             Receipt: The Receipt created from the given ShoppingCart.
         """
 
-        receipt = Receipt()
-        self._add_products_to_receipt(
-            receipt=receipt, product_quantities=cart.product_quantities
+        if not isinstance(self.catalog, AsyncSupermarketCatalog):
+            raise TypeError(
+                f"Async checkouts require an AsyncSupermarketCatalog, but the Teller has {type(self.catalog).__name__}!"
+            )
+        with self.metrics_sink.measure(stage=CHECKOUT):
+            products = list(cart.product_quantities)
+            promotions = self._promotions
+            price_snapshot = self.catalog.get_price_snapshot()
+            if price_snapshot is not None:
+                # a PriceSnapshot is in memory, so there's nothing to await
+                unit_prices_cents = self._get_unit_prices_cents(
+                    products=products, price_snapshot=price_snapshot
+                )
+            else:
+                self.metrics_sink.increment(counter=CATALOG_CALLS)
+                self.metrics_sink.increment(
+                    counter=CATALOG_PRODUCTS, value=len(products)
+                )
+                with self.metrics_sink.measure(stage=CATALOG_LOOKUP):
+                    unit_prices_cents = await self.catalog.get_unit_prices_cents_async(
+                        products=products
+                    )
+            return self._create_receipt(
+                product_quantities=cart.product_quantities,
+                unit_prices_cents=unit_prices_cents,
+                promotions=promotions,
+                price_snapshot=price_snapshot,
+            )
+
+    def check_out_many(self, carts: list[ShoppingCart]) -> list[Receipt]:
+        """Check out the items from many ShoppingCarts at once and return their Receipts.
+
+        This works like calling check_out_articles_from_cart for every ShoppingCart,
+        but the unit prices of all Products in all given ShoppingCarts are retrieved
+        from the SupermarketCatalog in a single lookup, so that Products that appear
+        in many ShoppingCarts are only looked up once. For the same reason, the
+        checkout stage is measured once for the whole batch.
+
+        Args:
+            carts (list[ShoppingCart]): The ShoppingCarts whose Products are to be
+            used for the Receipt creation.
+
+        Returns:
+            list[Receipt]: The Receipts created from the given ShoppingCarts, in the
+            same order as the ShoppingCarts.
+        """
+
+        with self.metrics_sink.measure(stage=CHECKOUT):
+            products: dict[Product, None] = {}
+            for cart in carts:
+                products.update(dict.fromkeys(cart.product_quantities))
+            promotions = self._promotions
+            price_snapshot = self.catalog.get_price_snapshot()
+            unit_prices_cents = self._get_unit_prices_cents(
+                products=list(products), price_snapshot=price_snapshot
+            )
+            return [
+                self._create_receipt(
+                    product_quantities=cart.product_quantities,
+                    unit_prices_cents=unit_prices_cents,
+                    promotions=promotions,
+                    price_snapshot=price_snapshot,
+                )
+                for cart in carts
+            ]
+
+    def _create_receipt(
+        self,
+        product_quantities: dict[Product, int],
+        unit_prices_cents: dict[Product, int],
+        promotions: PromotionState,
+        price_snapshot: Optional[PriceSnapshot] = None,
+    ) -> Receipt:
+        receipt = Receipt(
+            price_version=None if price_snapshot is None else price_snapshot.version
         )
-        # To get a list of all Bundles, we can take all the values in
-        # self.product_bundles_map. To make them unique, convert the
-        # list of Bundles into a set and then back into a list
-        bundles = list(set(self.product_bundles_map.values()))
-        discounts = create_discounts(
-            product_quantities_map=cart.product_quantities,
-            product_offers_map=self.product_offers_map,
-            bundles=bundles,
-            catalog=self.catalog,
+        with self.metrics_sink.measure(stage=RECEIPT_ITEMS):
+            self._add_products_to_receipt(
+                receipt=receipt,
+                product_quantities=product_quantities,
+                unit_prices_cents=unit_prices_cents,
+            )
+        receipt.add_discounts(
+            discounts=self._create_discounts(
+                product_quantities=product_quantities,
+                unit_prices_cents=unit_prices_cents,
+                promotions=promotions,
+            )
         )
-        receipt.add_discounts(discounts=discounts)
 
         return receipt
+
+    def _create_discounts(
+        self,
+        product_quantities: dict[Product, int],
+        unit_prices_cents: dict[Product, int],
+        promotions: PromotionState,
+    ) -> list[Discount]:
+        return create_best_discounts(
+            product_quantities_map=product_quantities,
+            product_offers_map=promotions.product_offers_map,
+            bundles=self._get_candidate_bundles(
+                product_quantities=product_quantities, promotions=promotions
+            ),
+            unit_prices_cents=unit_prices_cents,
+            metrics_sink=self.metrics_sink,
+            offer_discount_cache=self.offer_discount_cache,
+            offer_evaluators=promotions.offer_evaluators,
+        )
@@ -1,4 +1,6 @@
-from catalog import SupermarketCatalog
+import asyncio
+
+from catalog import AsyncSupermarketCatalog, SupermarketCatalog
 from model_objects import Product
 
 
@@ -6,15 +8,29 @@ class FakeCatalog(SupermarketCatalog):
     """Catalog class that can be used for testing."""
 
     def __init__(self):
-        self.products: dict[str, Product] = {}
-        self.prices_cents: dict[str, int] = {}
+        self.prices_cents: dict[Product, int] = {}
 
     def add_product(self, product: Product, price_cents: int) -> None:
-        self.products[product.name] = product
-        self.prices_cents[product.name] = price_cents
+        self.prices_cents[product] = price_cents
 
     def contains_product(self, product: Product) -> bool:
-        return product.name in self.products
+        return product in self.prices_cents
 
     def get_unit_price_cents(self, product: Product) -> int:
-        return self.prices_cents[product.name]
+        return self.prices_cents[product]
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        return {product: self.prices_cents[product] for product in products}
+
+
+class FakeAsyncCatalog(FakeCatalog, AsyncSupermarketCatalog):
+    """Async catalog class that can be used for testing."""
+
+    async def contains_product_async(self, product: Product) -> bool:
+        # give other tasks the chance to run, like a real database query would
+        await asyncio.sleep(0)
+        return self.contains_product(product=product)
+
+    async def get_unit_price_cents_async(self, product: Product) -> int:
+        await asyncio.sleep(0)
+        return self.get_unit_price_cents(product=product)
@@ -0,0 +1,26 @@
+from model_objects import Discount, Product, ProductUnit
+from receipt import Receipt
+
+
+def create_whole_receipt() -> Receipt:
+    """Creates a Receipt with a Product per ProductUnit and a Discount, for testing."""
+    receipt = Receipt()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    receipt.add_product(
+        product=toothbrush, quantity=3, price_cents=99, total_price_cents=297
+    )
+    receipt.add_product(
+        product=apples,
+        quantity=0.75,
+        price_cents=199,
+        total_price_cents=round(199 * 0.75),
+    )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush, description="3 for 2", discount_amount_cents=-99
+            )
+        ]
+    )
+    return receipt
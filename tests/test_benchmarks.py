@@ -0,0 +1,85 @@
+"""This module contains smoke tests for the benchmark suite in the benchmarks package."""
+
+import random
+
+from benchmarks.run_benchmarks import create_stages, run_stage
+from benchmarks.synthetic_data import (create_carts, create_catalog,
+                                       create_overlapping_teller,
+                                       create_teller)
+from model_objects import ProductUnit
+
+
+def test_synthetic_data_is_reproducible():
+    catalog_one, products_one = create_catalog(rng=random.Random(7), product_count=50)
+    catalog_two, products_two = create_catalog(rng=random.Random(7), product_count=50)
+    assert products_one == products_two
+    assert catalog_one.prices_cents == catalog_two.prices_cents
+
+
+def test_create_teller_and_carts():
+    rng = random.Random(7)
+    catalog, products = create_catalog(rng=rng, product_count=200)
+    teller = create_teller(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        offer_density=0.2,
+        bundle_density=0.1,
+    )
+    carts = create_carts(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        cart_count=20,
+        min_line_count=5,
+        max_line_count=10,
+    )
+
+    assert 40 == len(teller.product_offers_map)
+    assert 20 == len(teller.product_bundles_map)
+    for bundles in teller.product_bundles_map.values():
+        assert 1 == len(bundles)
+        assert all(product.unit == ProductUnit.EACH for product in bundles[0].products)
+    assert 20 == len(carts)
+    assert all(5 <= len(cart.product_quantities) <= 10 for cart in carts)
+
+
+def test_create_overlapping_teller():
+    rng = random.Random(7)
+    catalog, products = create_catalog(rng=rng, product_count=100)
+    teller = create_overlapping_teller(
+        rng=rng,
+        catalog=catalog,
+        products=products,
+        offers_per_product=2,
+        bundles_per_product=4,
+    )
+
+    assert 100 == len(teller.product_offers_map)
+    assert all(2 == len(offers) for offers in teller.product_offers_map.values())
+    each_products = [
+        product for product in products if product.unit == ProductUnit.EACH
+    ]
+    bundles = {
+        bundle for bundles in teller.product_bundles_map.values() for bundle in bundles
+    }
+    assert len(each_products) * 4 // 2 == len(bundles)
+    assert all(
+        product.unit == ProductUnit.EACH
+        for bundle in bundles
+        for product in bundle.products
+    )
+
+
+def test_run_all_stages():
+    rng = random.Random(7)
+    catalog, products = create_catalog(rng=rng, product_count=100)
+    teller = create_teller(rng=rng, catalog=catalog, products=products)
+    carts = create_carts(rng=rng, catalog=catalog, products=products, cart_count=5)
+
+    for name, stage in create_stages(teller=teller, carts=carts).items():
+        result = run_stage(name=name, stage=stage, cart_count=len(carts))
+        assert name == result.name
+        assert result.carts_per_second > 0
+        assert result.p50_microseconds <= result.p99_microseconds
+        assert result.peak_bytes > 0
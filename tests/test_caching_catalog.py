@@ -0,0 +1,105 @@
+"""This module contains the tests for the caching_catalog module."""
+
+from caching_catalog import CachingCatalog
+from model_objects import Product, ProductUnit
+from tests.fake_catalog import FakeCatalog
+from tests.test_lru_cache import FakeClock
+
+
+def test_get_unit_price_cents_is_read_through(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    caching_catalog = CachingCatalog(catalog=catalog)
+    get_unit_price_cents_spy = mocker.spy(catalog, "get_unit_price_cents")
+    assert 99 == caching_catalog.get_unit_price_cents(product=toothbrush)
+    assert 99 == caching_catalog.get_unit_price_cents(product=toothbrush)
+
+    assert 1 == get_unit_price_cents_spy.call_count
+    assert 1 == caching_catalog.hits
+    assert 1 == caching_catalog.misses
+
+
+def test_get_unit_prices_cents_only_fetches_uncached_products(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+
+    caching_catalog = CachingCatalog(catalog=catalog)
+    caching_catalog.get_unit_price_cents(product=apples)
+
+    get_unit_prices_cents_spy = mocker.spy(catalog, "get_unit_prices_cents")
+    assert {toothbrush: 99, apples: 199} == caching_catalog.get_unit_prices_cents(
+        products=[toothbrush, apples]
+    )
+    get_unit_prices_cents_spy.assert_called_once_with(products=[toothbrush])
+
+    # everything is cached now, so the wrapped catalog is not called again
+    caching_catalog.get_unit_prices_cents(products=[toothbrush, apples])
+    assert 1 == get_unit_prices_cents_spy.call_count
+
+
+def test_contains_product(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+    melon = Product(name="melon", unit=ProductUnit.EACH)
+
+    caching_catalog = CachingCatalog(catalog=catalog)
+    caching_catalog.get_unit_price_cents(product=apples)
+
+    contains_product_spy = mocker.spy(catalog, "contains_product")
+    # apples have a cached price, so the wrapped catalog is not asked
+    assert caching_catalog.contains_product(product=apples)
+    assert caching_catalog.contains_product(product=toothbrush)
+    assert caching_catalog.contains_product(product=toothbrush)
+    assert not caching_catalog.contains_product(product=melon)
+    assert not caching_catalog.contains_product(product=melon)
+    assert 2 == contains_product_spy.call_count
+
+
+def test_add_product_invalidates_cached_price():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+
+    caching_catalog = CachingCatalog(catalog=catalog)
+    assert not caching_catalog.contains_product(product=toothbrush)
+    caching_catalog.add_product(product=toothbrush, price_cents=99)
+    assert caching_catalog.contains_product(product=toothbrush)
+    assert 99 == caching_catalog.get_unit_price_cents(product=toothbrush)
+
+    caching_catalog.add_product(product=toothbrush, price_cents=89)
+    assert 89 == caching_catalog.get_unit_price_cents(product=toothbrush)
+
+
+def test_invalidate_after_change_in_wrapped_catalog():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    caching_catalog = CachingCatalog(catalog=catalog)
+    caching_catalog.get_unit_price_cents(product=toothbrush)
+    catalog.add_product(product=toothbrush, price_cents=89)
+    assert 99 == caching_catalog.get_unit_price_cents(product=toothbrush)
+
+    caching_catalog.invalidate(product=toothbrush)
+    assert 89 == caching_catalog.get_unit_price_cents(product=toothbrush)
+
+
+def test_cached_prices_expire():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    clock = FakeClock()
+    caching_catalog = CachingCatalog(catalog=catalog, ttl_seconds=60, clock=clock)
+    caching_catalog.get_unit_price_cents(product=toothbrush)
+    catalog.add_product(product=toothbrush, price_cents=89)
+
+    clock.now = 61
+    assert 89 == caching_catalog.get_unit_price_cents(product=toothbrush)
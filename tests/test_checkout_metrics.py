@@ -0,0 +1,29 @@
+"""This module contains the tests for the checkout_metrics module."""
+
+from checkout_metrics import (NULL_METRICS_SINK, CheckoutMetricsSink,
+                              RecordingMetricsSink)
+
+
+def test_null_metrics_sink_ignores_everything():
+    with NULL_METRICS_SINK.measure(stage="checkout"):
+        pass
+    NULL_METRICS_SINK.record_timing(stage="checkout", seconds=1.5)
+    NULL_METRICS_SINK.increment(counter="catalog_calls")
+    # the same context manager is reused for every measurement
+    assert NULL_METRICS_SINK.measure(stage="a") is CheckoutMetricsSink().measure(
+        stage="b"
+    )
+
+
+def test_recording_metrics_sink():
+    metrics_sink = RecordingMetricsSink()
+    with metrics_sink.measure(stage="checkout"):
+        pass
+    metrics_sink.record_timing(stage="checkout", seconds=1.5)
+    metrics_sink.increment(counter="catalog_calls")
+    metrics_sink.increment(counter="catalog_calls", value=2)
+
+    assert 2 == len(metrics_sink.timings["checkout"])
+    assert 1.5 <= metrics_sink.get_total_seconds(stage="checkout")
+    assert 0 == metrics_sink.get_total_seconds(stage="receipt_items")
+    assert {"catalog_calls": 3} == metrics_sink.counters
@@ -1,15 +1,17 @@
 """This module contains the tests for the discount_creation module."""
 
 import pytest
+from checkout_metrics import NULL_METRICS_SINK, RecordingMetricsSink
 from discount_creation import (BundleDiscountItem, InvalidProductUnitError,
-                               _create_discount_from_offer,
+                               OfferDiscountCache, _create_discount_from_offer,
                                _create_discounts_from_bundle,
                                _create_discounts_from_bundles,
                                _create_discounts_from_offers,
                                _create_percentage_discount,
                                _create_x_for_amount_discount,
                                _create_x_for_y_discount,
-                               _verify_optional_argument, create_discounts)
+                               _verify_optional_argument, compile_offer,
+                               create_discounts)
 from model_objects import Bundle, Offer, Product, ProductUnit, SpecialOfferType
 from tests.fake_catalog import FakeCatalog
 
@@ -33,7 +35,7 @@ def test_fail_verify_optional_argument():
 def test_create_percentage_discount_0_percent():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_percentage_discount(
-        product=apples, quantity=2.5, unit_price_cents=199, percentage=0
+        product=apples, quantity=2500, unit_price_cents=199, percentage=0
     )
     assert "0% off" == discount.description
     assert 0 == discount.discount_amount_cents
@@ -42,7 +44,7 @@ def test_create_percentage_discount_0_percent():
 def test_create_percentage_discount_20_percent():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_percentage_discount(
-        product=apples, quantity=2.5, unit_price_cents=199, percentage=20
+        product=apples, quantity=2500, unit_price_cents=199, percentage=20
     )
     assert "20% off" == discount.description
     assert -100 == discount.discount_amount_cents
@@ -51,19 +53,36 @@ def test_create_percentage_discount_20_percent():
 def test_create_percentage_discount_100_percent():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_percentage_discount(
-        product=apples, quantity=2.5, unit_price_cents=199, percentage=100
+        product=apples, quantity=2500, unit_price_cents=199, percentage=100
     )
     assert "100% off" == discount.description
     assert -498 == discount.discount_amount_cents
 
 
+def test_create_percentage_discount_with_decimal_percentage():
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    discount = _create_percentage_discount(
+        product=apples, quantity=1234, unit_price_cents=1000, percentage=12.5
+    )
+    assert "12.5% off" == discount.description
+    # 12.5% of 12.34 are 1.5425
+    assert -154 == discount.discount_amount_cents
+
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    discount = _create_percentage_discount(
+        product=toothbrush, quantity=3, unit_price_cents=100, percentage=33.3333
+    )
+    # 33.3333% of 3.00 are 0.999999, not 1.00
+    assert -100 == discount.discount_amount_cents
+
+
 def test_fail_create_percentage_discount_negative_percent():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     with pytest.raises(
         ValueError, match="Discount percentage must be between 0 and 100, but got -10!"
     ):
         _create_percentage_discount(
-            product=apples, quantity=2.5, unit_price_cents=199, percentage=-10
+            product=apples, quantity=2500, unit_price_cents=199, percentage=-10
         )
 
 
@@ -73,7 +92,7 @@ def test_fail_create_percentage_discount_more_than_100_percent():
         ValueError, match="Discount percentage must be between 0 and 100, but got 120!"
     ):
         _create_percentage_discount(
-            product=apples, quantity=2.5, unit_price_cents=199, percentage=120
+            product=apples, quantity=2500, unit_price_cents=199, percentage=120
         )
 
 
@@ -81,7 +100,7 @@ def test_create_x_for_y_discount_5_for_3_and_buy_6():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_x_for_y_discount(
         product=apples,
-        quantity=6,
+        quantity=6000,
         unit_price_cents=199,
         x=5,
         y=3,
@@ -94,7 +113,7 @@ def test_create_x_for_y_discount_5_for_3_and_buy_11():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_x_for_y_discount(
         product=apples,
-        quantity=11,
+        quantity=11000,
         unit_price_cents=199,
         x=5,
         y=3,
@@ -107,7 +126,7 @@ def test_create_x_for_y_discount_5_for_3_and_buy_2():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_x_for_y_discount(
         product=apples,
-        quantity=2,
+        quantity=2000,
         unit_price_cents=199,
         x=5,
         y=3,
@@ -122,7 +141,7 @@ def test_fail_create_x_for_y_discount_3_for_3():
     ):
         _create_x_for_y_discount(
             product=apples,
-            quantity=5,
+            quantity=5000,
             unit_price_cents=199,
             x=3,
             y=3,
@@ -132,7 +151,7 @@ def test_fail_create_x_for_y_discount_3_for_3():
 def test_create_x_for_amount_discount_3_for_400_and_buy_4():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_x_for_amount_discount(
-        product=apples, quantity=4, unit_price_cents=199, x=3, paid_amount_per_x=400
+        product=apples, quantity=4000, unit_price_cents=199, x=3, paid_amount_per_x=400
     )
     assert "3 for 400" == discount.description
     assert -197 == discount.discount_amount_cents
@@ -141,7 +160,7 @@ def test_create_x_for_amount_discount_3_for_400_and_buy_4():
 def test_create_x_for_amount_discount_3_for_400_and_buy_2():
     apples = Product(name="apples", unit=ProductUnit.KILO)
     discount = _create_x_for_amount_discount(
-        product=apples, quantity=2, unit_price_cents=199, x=3, paid_amount_per_x=400
+        product=apples, quantity=2000, unit_price_cents=199, x=3, paid_amount_per_x=400
     )
     assert None == discount
 
@@ -154,81 +173,158 @@ def test_fail_create_x_for_amount_discount_amount_too_high():
     ):
         _create_x_for_amount_discount(
             product=apples,
-            quantity=5,
+            quantity=5000,
             unit_price_cents=199,
             x=3,
             paid_amount_per_x=597,
         )
 
 
-def test_create_discount_from_offer(mocker):
+def test_create_discount_from_offer():
     apples = Product(name="apples", unit=ProductUnit.KILO)
+    for offer_type, optional_argument, description, discount_amount_cents in [
+        (SpecialOfferType.THREE_FOR_TWO, None, "3 for 2", -298),
+        (SpecialOfferType.PERCENT_DISCOUNT, 20, "20% off", -219),
+        (SpecialOfferType.TWO_FOR_AMOUNT, 150, "2 for 150", -595),
+        (SpecialOfferType.FIVE_FOR_AMOUNT, 800, "5 for 800", -294),
+    ]:
+        discount = _create_discount_from_offer(
+            product=apples,
+            quantity=5500,
+            offer=Offer(
+                offer_type=offer_type,
+                product=apples,
+                optional_argument=optional_argument,
+            ),
+            unit_price_cents=199,
+        )
+        assert apples == discount.product
+        assert description == discount.description
+        assert discount_amount_cents == discount.discount_amount_cents
 
-    mocked_create_x_for_y_discount = mocker.patch(
-        "discount_creation._create_x_for_y_discount"
-    )
-    _create_discount_from_offer(
+
+def test_compile_offer():
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    offer = Offer(
+        offer_type=SpecialOfferType.PERCENT_DISCOUNT,
         product=apples,
-        quantity=5.5,
+        optional_argument=20,
+    )
+    evaluate = compile_offer(offer=offer)
+    # the OfferEvaluator doesn't change with the Offer it has been compiled from
+    offer.optional_argument = 50
+
+    discount = evaluate(product=apples, quantity=2000, unit_price_cents=199)
+    assert "20% off" == discount.description
+    assert -80 == discount.discount_amount_cents
+
+
+def test_compile_parameterized_offers():
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    four_for_three = compile_offer(
         offer=Offer(
-            offer_type=SpecialOfferType.THREE_FOR_TWO,
-            product=apples,
+            offer_type=SpecialOfferType.X_FOR_Y,
+            product=rice,
             optional_argument=None,
-        ),
-        unit_price_cents=199,
-    )
-    mocked_create_x_for_y_discount.assert_called_with(
-        product=apples, quantity=5.5, unit_price_cents=199, x=3, y=2
+            x=4,
+            y=3,
+        )
     )
+    discount = four_for_three(product=rice, quantity=9, unit_price_cents=249)
+    assert "4 for 3" == discount.description
+    assert -498 == discount.discount_amount_cents
+    assert four_for_three(product=rice, quantity=3, unit_price_cents=249) is None
 
-    mocked_create_percentage_discount = mocker.patch(
-        "discount_creation._create_percentage_discount"
-    )
-    _create_discount_from_offer(
-        product=apples,
-        quantity=5.5,
+    ten_for_amount = compile_offer(
         offer=Offer(
-            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
-            product=apples,
-            optional_argument=20,
-        ),
-        unit_price_cents=199,
-    )
-    mocked_create_percentage_discount.assert_called_with(
-        product=apples, quantity=5.5, unit_price_cents=199, percentage=20
+            offer_type=SpecialOfferType.X_FOR_AMOUNT,
+            product=rice,
+            optional_argument=2000,
+            x=10,
+        )
     )
+    discount = ten_for_amount(product=rice, quantity=11, unit_price_cents=249)
+    assert "10 for 2000" == discount.description
+    assert -490 == discount.discount_amount_cents
+    assert ten_for_amount(product=rice, quantity=9, unit_price_cents=249) is None
 
-    # TWO_FOR_AMOUNT and FIVE_FOR_AMOUNT use the same mocker
-    mocked_x_for_amount_discount = mocker.patch(
-        "discount_creation._create_x_for_amount_discount"
-    )
-    _create_discount_from_offer(
-        product=apples,
-        quantity=5.5,
+    # Offers with the same parameters share their OfferEvaluator
+    assert four_for_three is compile_offer(
         offer=Offer(
-            offer_type=SpecialOfferType.TWO_FOR_AMOUNT,
-            product=apples,
-            optional_argument=150,
-        ),
-        unit_price_cents=199,
-    )
-    mocked_x_for_amount_discount.assert_called_with(
-        product=apples, quantity=5.5, unit_price_cents=199, x=2, paid_amount_per_x=150
+            offer_type=SpecialOfferType.X_FOR_Y,
+            product=Product(name="toothbrush", unit=ProductUnit.EACH),
+            optional_argument=None,
+            x=4,
+            y=3,
+        )
     )
 
-    _create_discount_from_offer(
-        product=apples,
-        quantity=5.5,
-        offer=Offer(
-            offer_type=SpecialOfferType.FIVE_FOR_AMOUNT,
-            product=apples,
-            optional_argument=800,
+
+def test_fail_compile_offer():
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    for offer_type, optional_argument, message in [
+        (
+            SpecialOfferType.PERCENT_DISCOUNT,
+            None,
+            "optional_argument can not be None for Offer of type SpecialOfferType.PERCENT_DISCOUNT!",
         ),
-        unit_price_cents=199,
-    )
-    mocked_x_for_amount_discount.assert_called_with(
-        product=apples, quantity=5.5, unit_price_cents=199, x=5, paid_amount_per_x=800
-    )
+        (
+            SpecialOfferType.PERCENT_DISCOUNT,
+            120,
+            "Discount percentage must be between 0 and 100, but got 120!",
+        ),
+        (
+            SpecialOfferType.FIVE_FOR_AMOUNT,
+            None,
+            "optional_argument can not be None for Offer of type SpecialOfferType.FIVE_FOR_AMOUNT!",
+        ),
+        (-500, 150, "Unexpected value for offer.offer_type: -500!"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            compile_offer(
+                offer=Offer(
+                    offer_type=offer_type,
+                    product=apples,
+                    optional_argument=optional_argument,
+                )
+            )
+
+    for offer_type, x, y, message in [
+        (
+            SpecialOfferType.X_FOR_Y,
+            None,
+            2,
+            "x must be a positive integer for Offer of type SpecialOfferType.X_FOR_Y, but got None!",
+        ),
+        (
+            SpecialOfferType.X_FOR_Y,
+            4,
+            0,
+            "y must be a positive integer for Offer of type SpecialOfferType.X_FOR_Y, but got 0!",
+        ),
+        (
+            SpecialOfferType.X_FOR_Y,
+            3,
+            3,
+            "Discounted quantity 3 must be higher than paid quantity 3!",
+        ),
+        (
+            SpecialOfferType.X_FOR_AMOUNT,
+            2.5,
+            None,
+            "x must be a positive integer for Offer of type SpecialOfferType.X_FOR_AMOUNT, but got 2.5!",
+        ),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            compile_offer(
+                offer=Offer(
+                    offer_type=offer_type,
+                    product=apples,
+                    optional_argument=500,
+                    x=x,
+                    y=y,
+                )
+            )
 
 
 def test_fail_create_discount_from_offer_invalid_type():
@@ -240,7 +336,7 @@ def test_fail_create_discount_from_offer_invalid_type():
     ):
         _create_discount_from_offer(
             product=apples,
-            quantity=5.5,
+            quantity=5500,
             offer=Offer(
                 offer_type=invalid_offer_type,
                 product=apples,
@@ -275,12 +371,14 @@ def test_create_discounts_from_offers():
     catalog.add_product(product=melon, price_cents=210)
 
     discounts = _create_discounts_from_offers(
-        product_quantities_map={toothbrush: 2, apples: 2, melon: 2},
+        product_quantities_map={toothbrush: 2, apples: 2000, melon: 2},
         product_offers_map={
             toothbrush: toothbrush_offer,
             apples: apples_offer,
         },
-        catalog=catalog,
+        unit_prices_cents=catalog.get_unit_prices_cents(
+            products=[toothbrush, apples, melon]
+        ),
     )
     assert 1 == len(discounts)
     discount_toothbrush = discounts[0]
@@ -389,7 +487,9 @@ def test_create_discounts_from_bundles():
     discounts = _create_discounts_from_bundles(
         product_quantities_map={toothbrush: 2, toothpaste: 3, oil_can: 2},
         bundles=[dental_bundle, car_bundle],
-        catalog=catalog,
+        unit_prices_cents=catalog.get_unit_prices_cents(
+            products=[toothbrush, toothpaste, oil_can]
+        ),
     )
     assert 2 == len(discounts)
     discount_toothbrush, discount_toothpaste = discounts
@@ -401,6 +501,32 @@ def test_create_discounts_from_bundles():
     assert -32 == discount_toothpaste.discount_amount_cents
 
 
+def test_create_discounts_from_bundles_after_unpurchased_bundle():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    dental_bundle = Bundle(
+        products=[toothbrush, toothpaste],
+        discount_percentage=20,
+    )
+
+    oil_can = Product(name="oil can", unit=ProductUnit.EACH)
+    wheel = Product(name="wheel", unit=ProductUnit.EACH)
+    car_bundle = Bundle(
+        products=[oil_can, wheel],
+        discount_percentage=15,
+    )
+
+    # the car bundle is not completely purchased, but the dental bundle must still
+    # be applied
+    discounts = _create_discounts_from_bundles(
+        product_quantities_map={toothbrush: 2, toothpaste: 3, oil_can: 2},
+        bundles=[car_bundle, dental_bundle],
+        unit_prices_cents={toothbrush: 99, toothpaste: 80, oil_can: 400},
+    )
+    assert 2 == len(discounts)
+    assert [toothbrush, toothpaste] == [discount.product for discount in discounts]
+
+
 def test_create_discounts_from_bundles_with_empty_list_of_bundles():
     catalog = FakeCatalog()
 
@@ -413,7 +539,9 @@ def test_create_discounts_from_bundles_with_empty_list_of_bundles():
     discounts = _create_discounts_from_bundles(
         product_quantities_map={toothbrush: 2, toothpaste: 3},
         bundles=[],
-        catalog=catalog,
+        unit_prices_cents=catalog.get_unit_prices_cents(
+            products=[toothbrush, toothpaste]
+        ),
     )
     assert 0 == len(discounts)
 
@@ -437,9 +565,11 @@ def test_fail_create_discounts_from_bundles_invalid_type():
         match="Bundles can only be applied if every Product has ProductUnit.EACH, but Product\(name=apples\) has ProductUnit.KILO!",
     ):
         _create_discounts_from_bundles(
-            product_quantities_map={apples: 2.5, toothbrush: 2},
+            product_quantities_map={apples: 2500, toothbrush: 2},
             bundles=[bundle],
-            catalog=catalog,
+            unit_prices_cents=catalog.get_unit_prices_cents(
+                products=[apples, toothbrush]
+            ),
         )
 
 
@@ -469,9 +599,12 @@ def test_create_discounts(mocker):
     melon = Product(name="melon", unit=ProductUnit.EACH)
     catalog.add_product(product=melon, price_cents=210)
 
-    product_quantities_map = {toothbrush: 2, toothpaste: 3, apples: 4, melon: 2}
+    product_quantities_map = {toothbrush: 2, toothpaste: 3, apples: 4000, melon: 2}
     product_offers_map = {apples: apples_offer}
     bundles = [bundle]
+    unit_prices_cents = catalog.get_unit_prices_cents(
+        products=list(product_quantities_map)
+    )
 
     mocked_create_discounts_from_offers = mocker.patch(
         "discount_creation._create_discounts_from_offers"
@@ -484,15 +617,112 @@ def test_create_discounts(mocker):
         product_quantities_map=product_quantities_map,
         product_offers_map=product_offers_map,
         bundles=bundles,
-        catalog=catalog,
+        unit_prices_cents=unit_prices_cents,
     )
     mocked_create_discounts_from_offers.assert_called_with(
         product_quantities_map=product_quantities_map,
         product_offers_map=product_offers_map,
-        catalog=catalog,
+        unit_prices_cents=unit_prices_cents,
+        metrics_sink=NULL_METRICS_SINK,
+        offer_discount_cache=None,
+        offer_evaluators=None,
     )
     mocked_create_discounts_from_bundles.assert_called_with(
         product_quantities_map=product_quantities_map,
         bundles=bundles,
-        catalog=catalog,
+        unit_prices_cents=unit_prices_cents,
+        metrics_sink=NULL_METRICS_SINK,
     )
+
+
+def test_create_discounts_records_metrics():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    melon = Product(name="melon", unit=ProductUnit.EACH)
+
+    metrics_sink = RecordingMetricsSink()
+    create_discounts(
+        product_quantities_map={toothbrush: 2, toothpaste: 3, apples: 4000, melon: 2},
+        product_offers_map={
+            apples: Offer(
+                offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+                product=apples,
+                optional_argument=10,
+            )
+        },
+        bundles=[Bundle(products=[toothbrush, toothpaste], discount_percentage=20)],
+        unit_prices_cents={toothbrush: 99, toothpaste: 80, apples: 199, melon: 210},
+        metrics_sink=metrics_sink,
+    )
+    assert {"offer_evaluations": 1, "bundle_evaluations": 1} == metrics_sink.counters
+    assert ["offer_discounts", "bundle_discounts"] == list(metrics_sink.timings)
+
+
+def test_offer_discount_cache():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    offer = Offer(
+        offer_type=SpecialOfferType.THREE_FOR_TWO,
+        product=toothbrush,
+        optional_argument=None,
+    )
+    offer_discount_cache = OfferDiscountCache(max_size=2)
+
+    discount = offer_discount_cache.get_discount(
+        product=toothbrush, quantity=3, offer=offer, unit_price_cents=99
+    )
+    assert -99 == discount.discount_amount_cents
+    assert discount is offer_discount_cache.get_discount(
+        product=toothbrush, quantity=3, offer=offer, unit_price_cents=99
+    )
+    # Offers that don't apply are cached as well
+    for _ in range(2):
+        assert (
+            offer_discount_cache.get_discount(
+                product=toothbrush, quantity=2, offer=offer, unit_price_cents=99
+            )
+            is None
+        )
+    assert 2 == offer_discount_cache.hits
+    assert 2 == offer_discount_cache.misses
+    assert 0.5 == offer_discount_cache.hit_rate
+
+    # a different unit price is a different entry
+    offer_discount_cache.get_discount(
+        product=toothbrush, quantity=3, offer=offer, unit_price_cents=89
+    )
+    assert 1 == offer_discount_cache.evictions
+    assert 2 == len(offer_discount_cache)
+
+    offer_discount_cache.invalidate_offer(offer=offer)
+    assert 0 == len(offer_discount_cache)
+
+
+def test_create_discounts_with_offer_discount_cache():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    product_offers_map = {
+        toothbrush: Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=toothbrush,
+            optional_argument=None,
+        ),
+        apples: Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=10,
+        ),
+    }
+    offer_discount_cache = OfferDiscountCache()
+
+    for _ in range(3):
+        discounts = create_discounts(
+            product_quantities_map={toothbrush: 3, apples: 2500},
+            product_offers_map=product_offers_map,
+            bundles=[],
+            unit_prices_cents={toothbrush: 99, apples: 199},
+            offer_discount_cache=offer_discount_cache,
+        )
+        assert [-99, -50] == [discount.discount_amount_cents for discount in discounts]
+    assert 4 == offer_discount_cache.hits
+    assert 2 == offer_discount_cache.misses
@@ -0,0 +1,335 @@
+"""This module contains the tests for the discount_selection module."""
+
+import random
+
+import discount_selection
+from discount_creation import compile_offer, create_discounts
+from discount_selection import (create_best_discounts, get_best_offer_discount,
+                                select_bundles)
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType)
+
+
+def _to_tuples(discounts: list[Discount]) -> list[tuple[Product, str, int]]:
+    return [
+        (discount.product, discount.description, discount.discount_amount_cents)
+        for discount in discounts
+    ]
+
+
+def _create_bundle_discounts(
+    bundle: Bundle, discount_amounts_cents: list[int]
+) -> list[Discount]:
+    return [
+        Discount(
+            product=product,
+            description="Bundle discount",
+            discount_amount_cents=discount_amount_cents,
+        )
+        for product, discount_amount_cents in zip(
+            bundle.products, discount_amounts_cents
+        )
+    ]
+
+
+def test_get_best_offer_discount():
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    three_for_two = Offer(
+        offer_type=SpecialOfferType.THREE_FOR_TWO,
+        product=apples,
+        optional_argument=None,
+    )
+    two_for_amount = Offer(
+        offer_type=SpecialOfferType.TWO_FOR_AMOUNT,
+        product=apples,
+        optional_argument=150,
+    )
+    five_for_amount = Offer(
+        offer_type=SpecialOfferType.FIVE_FOR_AMOUNT,
+        product=apples,
+        optional_argument=800,
+    )
+
+    discount = get_best_offer_discount(
+        product=apples,
+        quantity=5500,
+        offers=[three_for_two, two_for_amount, five_for_amount],
+        unit_price_cents=199,
+        offer_evaluators={
+            two_for_amount: compile_offer(offer=two_for_amount),
+        },
+    )
+    assert (apples, "2 for 150", -595) == _to_tuples(discounts=[discount])[0]
+
+    assert (
+        get_best_offer_discount(
+            product=apples,
+            quantity=1000,
+            offers=[three_for_two, two_for_amount, five_for_amount],
+            unit_price_cents=199,
+        )
+        is None
+    )
+
+
+def test_get_best_offer_discount_prefers_first_offer_on_ties():
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    three_for_two = Offer(
+        offer_type=SpecialOfferType.THREE_FOR_TWO,
+        product=rice,
+        optional_argument=None,
+    )
+    x_for_y = Offer(
+        offer_type=SpecialOfferType.X_FOR_Y,
+        product=rice,
+        optional_argument=None,
+        x=3,
+        y=2,
+    )
+
+    discount = get_best_offer_discount(
+        product=rice,
+        quantity=3,
+        offers=[x_for_y, three_for_two],
+        unit_price_cents=100,
+    )
+    assert (rice, "3 for 2", -100) == _to_tuples(discounts=[discount])[0]
+
+
+def test_select_bundles_prefers_higher_offer_discounts():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    bundle = Bundle(products=[toothbrush, toothpaste], discount_percentage=10)
+    bundle_discounts = {
+        bundle: _create_bundle_discounts(
+            bundle=bundle, discount_amounts_cents=[-10, -8]
+        )
+    }
+
+    assert {bundle} == select_bundles(
+        bundle_discounts=bundle_discounts,
+        offer_discounts={
+            toothbrush: Discount(
+                product=toothbrush, description="10% off", discount_amount_cents=-10
+            )
+        },
+    )
+    assert set() == select_bundles(
+        bundle_discounts=bundle_discounts,
+        offer_discounts={
+            toothbrush: Discount(
+                product=toothbrush, description="20% off", discount_amount_cents=-20
+            )
+        },
+    )
+
+
+def test_select_bundles_without_overlap():
+    products = [Product(name=f"product {i}", unit=ProductUnit.EACH) for i in range(4)]
+    bundle_one = Bundle(products=products[:2], discount_percentage=10)
+    bundle_two = Bundle(products=products[2:], discount_percentage=10)
+
+    assert {bundle_one, bundle_two} == select_bundles(
+        bundle_discounts={
+            bundle_one: _create_bundle_discounts(
+                bundle=bundle_one, discount_amounts_cents=[-5, -5]
+            ),
+            bundle_two: _create_bundle_discounts(
+                bundle=bundle_two, discount_amounts_cents=[0, 0]
+            ),
+        },
+        offer_discounts={},
+    )
+
+
+def test_select_bundles_with_overlap():
+    # the Bundle with the highest Discounts conflicts with two Bundles that save
+    # more together
+    a, b, c, d = [Product(name=name, unit=ProductUnit.EACH) for name in "abcd"]
+    bundle_ab = Bundle(products=[a, b], discount_percentage=10)
+    bundle_bc = Bundle(products=[b, c], discount_percentage=10)
+    bundle_cd = Bundle(products=[c, d], discount_percentage=10)
+
+    assert {bundle_ab, bundle_cd} == select_bundles(
+        bundle_discounts={
+            bundle_ab: _create_bundle_discounts(
+                bundle=bundle_ab, discount_amounts_cents=[-20, -20]
+            ),
+            bundle_bc: _create_bundle_discounts(
+                bundle=bundle_bc, discount_amounts_cents=[-30, -30]
+            ),
+            bundle_cd: _create_bundle_discounts(
+                bundle=bundle_cd, discount_amounts_cents=[-20, -20]
+            ),
+        },
+        offer_discounts={},
+    )
+
+
+def test_select_bundles_greedily_for_big_groups(monkeypatch):
+    a, b, c, d = [Product(name=name, unit=ProductUnit.EACH) for name in "abcd"]
+    bundle_ab = Bundle(products=[a, b], discount_percentage=10)
+    bundle_bc = Bundle(products=[b, c], discount_percentage=10)
+    bundle_cd = Bundle(products=[c, d], discount_percentage=10)
+    bundle_discounts = {
+        bundle_ab: _create_bundle_discounts(
+            bundle=bundle_ab, discount_amounts_cents=[-20, -20]
+        ),
+        bundle_bc: _create_bundle_discounts(
+            bundle=bundle_bc, discount_amounts_cents=[-30, -30]
+        ),
+        bundle_cd: _create_bundle_discounts(
+            bundle=bundle_cd, discount_amounts_cents=[-20, -20]
+        ),
+    }
+
+    monkeypatch.setattr(discount_selection, "MAX_EXACT_GROUP_SIZE", 2)
+    assert {bundle_bc} == select_bundles(
+        bundle_discounts=bundle_discounts, offer_discounts={}
+    )
+
+
+def test_select_bundles_exactly_matches_brute_force():
+    rng = random.Random(7)
+    products = [Product(name=f"product {i}", unit=ProductUnit.EACH) for i in range(8)]
+    for _ in range(50):
+        bundles = [
+            Bundle(
+                products=rng.sample(products, k=rng.randint(2, 3)),
+                discount_percentage=10,
+            )
+            for _ in range(rng.randint(1, 8))
+        ]
+        bundle_discounts = {
+            bundle: _create_bundle_discounts(
+                bundle=bundle,
+                discount_amounts_cents=[-rng.randint(0, 50) for _ in bundle.products],
+            )
+            for bundle in bundles
+        }
+        offer_discounts = {
+            product: Discount(
+                product=product,
+                description="Offer",
+                discount_amount_cents=-rng.randint(0, 40),
+            )
+            for product in rng.sample(products, k=4)
+        }
+
+        def get_savings_cents(selection: set[Bundle]) -> int:
+            covered_products = {
+                product for bundle in selection for product in bundle.products
+            }
+            return sum(
+                -discount.discount_amount_cents
+                for bundle in selection
+                for discount in bundle_discounts[bundle]
+            ) + sum(
+                -discount.discount_amount_cents
+                for product, discount in offer_discounts.items()
+                if product not in covered_products
+            )
+
+        best_savings_cents = 0
+        for mask in range(1 << len(bundles)):
+            selection = {
+                bundle for index, bundle in enumerate(bundles) if mask >> index & 1
+            }
+            if sum(len(bundle.products) for bundle in selection) == len(
+                {product for bundle in selection for product in bundle.products}
+            ):
+                best_savings_cents = max(
+                    best_savings_cents, get_savings_cents(selection=selection)
+                )
+
+        selection = select_bundles(
+            bundle_discounts=bundle_discounts, offer_discounts=offer_discounts
+        )
+        assert sum(len(bundle.products) for bundle in selection) == len(
+            {product for bundle in selection for product in bundle.products}
+        )
+        assert best_savings_cents == get_savings_cents(selection=selection)
+
+
+def test_create_best_discounts_matches_create_discounts_without_overlap():
+    rng = random.Random(3)
+    products = [Product(name=f"product {i}", unit=ProductUnit.EACH) for i in range(30)]
+    unit_prices_cents = {product: rng.randint(50, 500) for product in products}
+    product_offers_map = {
+        product: Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=product,
+            optional_argument=rng.randint(1, 50),
+        )
+        for product in products[:10]
+    }
+    bundles = [
+        Bundle(products=products[index : index + 3], discount_percentage=10)
+        for index in range(10, 30, 3)
+    ]
+    product_quantities_map = {
+        product: rng.randint(1, 5) for product in rng.sample(products, k=20)
+    }
+
+    assert _to_tuples(
+        discounts=create_discounts(
+            product_quantities_map=product_quantities_map,
+            product_offers_map=product_offers_map,
+            bundles=bundles,
+            unit_prices_cents=unit_prices_cents,
+        )
+    ) == _to_tuples(
+        discounts=create_best_discounts(
+            product_quantities_map=product_quantities_map,
+            product_offers_map={
+                product: [offer] for product, offer in product_offers_map.items()
+            },
+            bundles=bundles,
+            unit_prices_cents=unit_prices_cents,
+        )
+    )
+
+
+def test_create_best_discounts_with_overlap():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    dental_floss = Product(name="dental floss", unit=ProductUnit.EACH)
+    unit_prices_cents = {toothbrush: 100, toothpaste: 80, dental_floss: 60}
+    product_offers_map = {
+        toothbrush: [
+            Offer(
+                offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+                product=toothbrush,
+                optional_argument=10,
+            ),
+            Offer(
+                offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+                product=toothbrush,
+                optional_argument=15,
+            ),
+        ]
+    }
+    bundles = [
+        Bundle(products=[toothbrush, toothpaste], discount_percentage=5),
+        Bundle(products=[toothbrush, dental_floss], discount_percentage=30),
+    ]
+
+    assert [
+        (toothbrush, "Bundle discount: 30% off", -30),
+        (dental_floss, "Bundle discount: 30% off", -18),
+    ] == _to_tuples(
+        discounts=create_best_discounts(
+            product_quantities_map={toothbrush: 1, toothpaste: 1, dental_floss: 1},
+            product_offers_map=product_offers_map,
+            bundles=bundles,
+            unit_prices_cents=unit_prices_cents,
+        )
+    )
+    assert [(toothbrush, "15% off", -15)] == _to_tuples(
+        discounts=create_best_discounts(
+            product_quantities_map={toothbrush: 1, toothpaste: 1},
+            product_offers_map=product_offers_map,
+            bundles=bundles,
+            unit_prices_cents=unit_prices_cents,
+        )
+    )
@@ -4,10 +4,13 @@ The tests in this module create files that are compared to the expected output f
 in the approved_files subdirectory.
 """
 
+import io
+
 from approvaltests import verify
 from model_objects import Discount, Product, ProductUnit
 from receipt import Receipt
 from receipt_printer import HtmlReceiptPrinter
+from tests.fake_receipts import create_whole_receipt
 
 
 def test_quantity_one():
@@ -82,3 +85,21 @@ def test_whole_receipt():
         [Discount(product=toothbrush, description="3 for 2", discount_amount_cents=-99)]
     )
     verify(HtmlReceiptPrinter().print_receipt(receipt=receipt))
+
+
+def test_write_receipt():
+    receipt = create_whole_receipt()
+    stream = io.StringIO()
+    HtmlReceiptPrinter().write_receipt(receipt=receipt, stream=stream)
+    assert HtmlReceiptPrinter().print_receipt(receipt=receipt) == stream.getvalue()
+
+
+def test_iter_receipt_lines():
+    receipt = create_whole_receipt()
+    lines = list(HtmlReceiptPrinter().iter_receipt_lines(receipt=receipt))
+    assert HtmlReceiptPrinter.HTML_PREFIX == lines[0]
+    assert HtmlReceiptPrinter.HTML_SUFFIX == lines[-1]
+    # everything between prefix and suffix is yielded line by line
+    for line in lines[1:-1]:
+        assert line.endswith("\n")
+        assert 1 == line.count("\n")
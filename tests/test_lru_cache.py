@@ -0,0 +1,111 @@
+"""This module contains the tests for the lru_cache module."""
+
+import threading
+
+import pytest
+from lru_cache import LruCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_and_put():
+    cache = LruCache(max_size=2)
+    assert cache.get(key="apples") is None
+    cache.put(key="apples", value=199)
+    assert 199 == cache.get(key="apples")
+    assert 1 == cache.hits
+    assert 1 == cache.misses
+    assert 0.5 == cache.hit_rate
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LruCache(max_size=2)
+    cache.put(key="apples", value=199)
+    cache.put(key="toothbrush", value=99)
+    # using apples makes toothbrush the least recently used entry
+    cache.get(key="apples")
+    cache.put(key="melon", value=210)
+
+    assert 2 == len(cache)
+    assert "apples" in cache
+    assert "melon" in cache
+    assert "toothbrush" not in cache
+    assert 1 == cache.evictions
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LruCache(max_size=2, ttl_seconds=10, clock=clock)
+    cache.put(key="apples", value=199)
+
+    clock.now = 9.9
+    assert 199 == cache.get(key="apples")
+    clock.now = 10
+    assert cache.get(key="apples") is None
+    assert 0 == len(cache)
+
+
+def test_invalidate_and_clear():
+    cache = LruCache(max_size=2)
+    cache.put(key="apples", value=199)
+    cache.put(key="toothbrush", value=99)
+
+    cache.invalidate(key="apples")
+    assert "apples" not in cache
+    cache.invalidate(key="melon")
+    cache.clear()
+    assert 0 == len(cache)
+
+
+def test_fail_init_max_size_is_0():
+    with pytest.raises(ValueError, match="max_size must be positive integer, but got 0!"):
+        LruCache(max_size=0)
+
+
+def test_fail_init_ttl_is_negative():
+    with pytest.raises(ValueError, match="ttl_seconds must be positive, but got -1!"):
+        LruCache(max_size=1, ttl_seconds=-1)
+
+
+def test_invalidate_matching():
+    cache = LruCache(max_size=3)
+    cache.put(key=("apples", 1), value=199)
+    cache.put(key=("apples", 2), value=398)
+    cache.put(key=("melon", 1), value=210)
+
+    assert 2 == cache.invalidate_matching(predicate=lambda key: key[0] == "apples")
+    assert 1 == len(cache)
+    assert ("melon", 1) in cache
+
+
+def test_concurrent_use():
+    cache = LruCache(max_size=8)
+    errors = []
+
+    def use_cache(offset: int) -> None:
+        try:
+            for index in range(2000):
+                key = (index + offset) % 20
+                if cache.get(key=key) is None:
+                    cache.put(key=key, value=key)
+                if index % 100 == 0:
+                    cache.invalidate_matching(predicate=lambda key: key % 3 == 0)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=use_cache, args=(offset,)) for offset in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [] == errors
+    assert len(cache) <= 8
@@ -0,0 +1,93 @@
+"""This module contains the tests for the model_objects module."""
+
+import gc
+import pickle
+
+import pytest
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType, product_registry)
+
+
+def test_products_are_interned():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    same_toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+
+    assert toothbrush is same_toothbrush
+    assert toothbrush.product_id != apples.product_id
+    assert toothbrush.product_id == hash(toothbrush)
+
+
+def test_unpickled_products_are_interned():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    assert toothbrush is pickle.loads(pickle.dumps(toothbrush))
+
+
+def test_fail_set_product_attribute():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    with pytest.raises(
+        AttributeError,
+        match="Can't set name of Product\\(name=toothbrush\\) - Products are immutable!",
+    ):
+        toothbrush.name = "electric toothbrush"
+
+
+def test_product_registry():
+    product_count = len(product_registry)
+    toothbrush = product_registry.intern(
+        name="registry toothbrush", unit=ProductUnit.EACH
+    )
+    apples = product_registry.intern(name="registry apples", unit=ProductUnit.KILO)
+
+    assert toothbrush is Product(name="registry toothbrush", unit=ProductUnit.EACH)
+    assert product_count + 2 == len(product_registry)
+    assert toothbrush.product_id + 1 == apples.product_id
+
+
+def test_unused_products_are_freed():
+    toothbrush = Product(name="freed toothbrush", unit=ProductUnit.EACH)
+    product_id = toothbrush.product_id
+    # Products of other tests may still be waiting to be collected
+    gc.collect()
+    product_count = len(product_registry)
+
+    del toothbrush
+    gc.collect()
+
+    assert product_count - 1 == len(product_registry)
+    # product_ids are not reused
+    assert (
+        product_id < Product(name="freed toothbrush", unit=ProductUnit.EACH).product_id
+    )
+
+
+def test_products_are_compared_by_value():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    same_toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    apples_by_piece = Product(name="apples", unit=ProductUnit.EACH)
+
+    assert toothbrush == same_toothbrush
+    assert hash(toothbrush) == hash(same_toothbrush)
+    assert apples != apples_by_piece
+    assert toothbrush != "toothbrush"
+    assert 99 == {toothbrush: 99}[same_toothbrush]
+
+
+def test_model_objects_have_no_instance_dict():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    model_objects = [
+        toothbrush,
+        Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=toothbrush,
+            optional_argument=None,
+        ),
+        Discount(product=toothbrush, description="3 for 2", discount_amount_cents=-99),
+        Bundle(products=[toothbrush, toothpaste], discount_percentage=10),
+    ]
+    for model_object in model_objects:
+        assert not hasattr(model_object, "__dict__")
+        with pytest.raises(AttributeError):
+            model_object.unknown_attribute = 1
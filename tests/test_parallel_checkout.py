@@ -0,0 +1,91 @@
+"""This module contains the tests for the parallel_checkout module."""
+
+import pytest
+from model_objects import Bundle, Offer, Product, ProductUnit, SpecialOfferType
+from parallel_checkout import (PriceSnapshotCatalog, ReadOnlyCatalogError,
+                               check_out_in_parallel)
+from shopping_cart import ShoppingCart
+from teller import Teller
+from tests.fake_catalog import FakeCatalog
+
+
+def test_price_snapshot_catalog():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog = PriceSnapshotCatalog(unit_prices_cents={toothbrush: 99})
+
+    assert catalog.contains_product(product=toothbrush)
+    assert not catalog.contains_product(product=apples)
+    assert 99 == catalog.get_unit_price_cents(product=toothbrush)
+    assert {toothbrush: 99} == catalog.get_unit_prices_cents(products=[toothbrush])
+    with pytest.raises(
+        ReadOnlyCatalogError, match="Can't add Products to a PriceSnapshotCatalog!"
+    ):
+        catalog.add_product(product=apples, price_cents=199)
+
+
+def test_check_out_in_parallel(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=apples,
+            optional_argument=None,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    )
+
+    carts = []
+    for cart_number in range(10):
+        cart = ShoppingCart(catalog=catalog)
+        cart.add_item_quantity(product=apples, quantity=cart_number + 0.5)
+        cart.add_item_quantity(product=toothbrush, quantity=cart_number + 1)
+        if cart_number % 2 == 0:
+            cart.add_item_quantity(product=toothpaste, quantity=2)
+        carts.append(cart)
+    expected_receipts = teller.check_out_many(carts=carts)
+
+    get_unit_prices_cents_spy = mocker.spy(catalog, "get_unit_prices_cents")
+    receipts = list(
+        check_out_in_parallel(teller=teller, carts=carts, max_workers=2, chunksize=3)
+    )
+
+    get_unit_prices_cents_spy.assert_called_once_with(
+        products=[apples, toothbrush, toothpaste]
+    )
+    assert len(expected_receipts) == len(receipts)
+    for expected_receipt, receipt in zip(expected_receipts, receipts):
+        assert (
+            expected_receipt.get_total_price_cents() == receipt.get_total_price_cents()
+        )
+        # the Receipts reference the original Product objects
+        assert [item.product for item in expected_receipt.items] == [
+            item.product for item in receipt.items
+        ]
+        assert [
+            (discount.product, discount.description, discount.discount_amount_cents)
+            for discount in expected_receipt.discounts
+        ] == [
+            (discount.product, discount.description, discount.discount_amount_cents)
+            for discount in receipt.discounts
+        ]
+
+
+def test_fail_check_out_in_parallel_chunksize_is_0():
+    teller = Teller(catalog=FakeCatalog())
+    with pytest.raises(
+        ValueError, match="chunksize must be positive integer, but got 0!"
+    ):
+        list(check_out_in_parallel(teller=teller, carts=[], chunksize=0))
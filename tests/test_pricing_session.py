@@ -0,0 +1,256 @@
+"""This module contains the tests for the pricing_session module."""
+
+import pytest
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType)
+from pricing_session import PricingSession
+from shopping_cart import ShoppingCart
+from teller import Teller
+from tests.fake_catalog import FakeCatalog
+
+
+def _to_tuples(discounts: list[Discount]) -> list[tuple[Product, str, int]]:
+    return [
+        (discount.product, discount.description, discount.discount_amount_cents)
+        for discount in discounts
+    ]
+
+
+def _create_teller() -> tuple[Teller, list[Product]]:
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=179)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    catalog.add_product(product=rice, price_cents=249)
+    cherries = Product(name="cherries", unit=ProductUnit.EACH)
+    catalog.add_product(product=cherries, price_cents=69)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=20,
+        )
+    )
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=rice,
+            optional_argument=None,
+        )
+    )
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.FIVE_FOR_AMOUNT,
+            product=cherries,
+            optional_argument=299,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=10)
+    )
+    return teller, [toothbrush, toothpaste, apples, rice, cherries]
+
+
+def test_pricing_session_matches_checkout_after_every_scan():
+    teller, [toothbrush, toothpaste, apples, rice, cherries] = _create_teller()
+    cart = ShoppingCart(catalog=teller.catalog)
+    session = PricingSession(teller=teller, cart=cart)
+    assert 0 == session.total_cents
+
+    for product, quantity in [
+        (rice, 1),
+        (toothbrush, 1),
+        (rice, 2),
+        (apples, 1.5),
+        (cherries, 3),
+        (toothpaste, 2),
+        (cherries, 4),
+        (toothbrush, 2),
+        (apples, 0.25),
+    ]:
+        cart.add_item_quantity(product=product, quantity=quantity)
+        expected_receipt = teller.check_out_articles_from_cart(cart=cart)
+        assert expected_receipt.get_total_price_cents() == session.total_cents
+        assert _to_tuples(discounts=expected_receipt.discounts) == _to_tuples(
+            discounts=session.discounts
+        )
+
+        receipt = session.create_receipt()
+        assert [
+            (item.product, item.quantity, item.price_cents, item.total_price_cents)
+            for item in expected_receipt.items
+        ] == [
+            (item.product, item.quantity, item.price_cents, item.total_price_cents)
+            for item in receipt.items
+        ]
+        assert _to_tuples(discounts=expected_receipt.discounts) == _to_tuples(
+            discounts=receipt.discounts
+        )
+        assert expected_receipt.get_total_price_cents() == (
+            receipt.get_total_price_cents()
+        )
+
+
+def test_pricing_session_matches_checkout_after_every_correction():
+    teller, [toothbrush, toothpaste, apples, rice, cherries] = _create_teller()
+    cart = ShoppingCart(catalog=teller.catalog)
+    for product, quantity in [
+        (rice, 4),
+        (toothbrush, 2),
+        (toothpaste, 3),
+        (apples, 1.5),
+        (cherries, 6),
+    ]:
+        cart.add_item_quantity(product=product, quantity=quantity)
+    session = PricingSession(teller=teller, cart=cart)
+
+    for change, product, quantity in [
+        (cart.remove_item_quantity, rice, 2),
+        (cart.remove_item_quantity, cherries, 1),
+        (cart.set_item_quantity, toothpaste, 1),
+        (cart.remove_item_quantity, toothbrush, 2),
+        (cart.set_item_quantity, apples, 0),
+        (cart.set_item_quantity, toothbrush, 4),
+        (cart.remove_item_quantity, cherries, 5),
+        (cart.add_item_quantity, apples, 0.5),
+    ]:
+        change(product=product, quantity=quantity)
+        expected_receipt = teller.check_out_articles_from_cart(cart=cart)
+        assert expected_receipt.get_total_price_cents() == session.total_cents
+        assert _to_tuples(discounts=expected_receipt.discounts) == _to_tuples(
+            discounts=session.discounts
+        )
+        assert expected_receipt.get_total_price_cents() == (
+            session.create_receipt().get_total_price_cents()
+        )
+
+
+def test_pricing_session_totals():
+    teller, [toothbrush, toothpaste, _, rice, _] = _create_teller()
+    cart = ShoppingCart(catalog=teller.catalog)
+    session = PricingSession(teller=teller, cart=cart)
+
+    cart.add_item_quantity(product=rice, quantity=3)
+    assert 747 == session.subtotal_cents
+    assert -249 == session.discount_total_cents
+
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    assert 846 == session.subtotal_cents
+    assert -249 == session.discount_total_cents
+
+    cart.add_item_quantity(product=toothpaste, quantity=1)
+    assert 1025 == session.subtotal_cents
+    assert -249 - 10 - 18 == session.discount_total_cents
+    assert 1025 - 249 - 10 - 18 == session.total_cents
+
+
+def test_pricing_session_prices_existing_items_with_one_lookup(mocker):
+    teller, [toothbrush, toothpaste, apples, _, _] = _create_teller()
+    cart = ShoppingCart(catalog=teller.catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    cart.add_item_quantity(product=toothpaste, quantity=1)
+
+    spied_get_unit_prices_cents = mocker.spy(teller.catalog, "get_unit_prices_cents")
+    spied_get_unit_price_cents = mocker.spy(teller.catalog, "get_unit_price_cents")
+    session = PricingSession(teller=teller, cart=cart)
+    spied_get_unit_prices_cents.assert_called_once_with(
+        products=[toothbrush, toothpaste]
+    )
+    assert (
+        teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+        == session.total_cents
+    )
+
+    cart.add_item_quantity(product=apples, quantity=1)
+    cart.add_item_quantity(product=apples, quantity=1)
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    spied_get_unit_price_cents.assert_called_once_with(product=apples)
+
+
+def test_close_pricing_session():
+    teller, [toothbrush, *_] = _create_teller()
+    cart = ShoppingCart(catalog=teller.catalog)
+    session = PricingSession(teller=teller, cart=cart)
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    session.close()
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+
+    assert 99 == session.total_cents
+
+
+def test_pricing_session_matches_checkout_with_overlapping_promotions():
+    teller, [toothbrush, toothpaste, apples, rice, cherries] = _create_teller()
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=toothbrush,
+            optional_argument=30,
+        )
+    )
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=rice,
+            optional_argument=10,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothpaste, rice], discount_percentage=25)
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[rice, cherries, toothbrush], discount_percentage=15)
+    )
+    cart = ShoppingCart(catalog=teller.catalog)
+    session = PricingSession(teller=teller, cart=cart)
+
+    for change, product, quantity in [
+        (cart.add_item_quantity, toothbrush, 1),
+        (cart.add_item_quantity, toothpaste, 1),
+        (cart.add_item_quantity, rice, 2),
+        (cart.add_item_quantity, cherries, 2),
+        (cart.add_item_quantity, apples, 1.5),
+        (cart.add_item_quantity, rice, 1),
+        (cart.add_item_quantity, toothbrush, 1),
+        (cart.set_item_quantity, toothpaste, 0),
+        (cart.add_item_quantity, cherries, 5),
+        (cart.set_item_quantity, toothpaste, 3),
+        (cart.remove_item_quantity, rice, 3),
+    ]:
+        change(product=product, quantity=quantity)
+        expected_receipt = teller.check_out_articles_from_cart(cart=cart)
+        assert expected_receipt.get_total_price_cents() == session.total_cents
+        assert _to_tuples(discounts=expected_receipt.discounts) == _to_tuples(
+            discounts=session.discounts
+        )
+
+
+def test_pricing_session_is_unchanged_by_offer_that_fails():
+    teller, [_, _, _, rice, _] = _create_teller()
+    chocolate = Product(name="chocolate", unit=ProductUnit.EACH)
+    teller.catalog.add_product(product=chocolate, price_cents=100)
+    # "2 for 250" is more expensive than two bars, which is only detected when the
+    # Offer applies
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.TWO_FOR_AMOUNT,
+            product=chocolate,
+            optional_argument=250,
+        )
+    )
+    cart = ShoppingCart(catalog=teller.catalog)
+    session = PricingSession(teller=teller, cart=cart)
+    cart.add_item_quantity(product=rice, quantity=3)
+    cart.add_item_quantity(product=chocolate, quantity=1)
+
+    with pytest.raises(ValueError, match='Discount "2 for 250" must be lower than'):
+        cart.add_item_quantity(product=chocolate, quantity=1)
+
+    assert 747 + 100 == session.subtotal_cents
+    assert -249 == session.discount_total_cents
+    assert [(rice, "3 for 2", -249)] == _to_tuples(discounts=session.discounts)
@@ -0,0 +1,42 @@
+"""This module contains the tests for the quantities module."""
+
+from model_objects import Product, ProductUnit
+from quantities import (divide_rounded, from_fixed_point_quantity,
+                        get_total_price_cents)
+
+
+def test_divide_rounded():
+    assert [0, 0, 0, 1, 1, 1, 2, 2] == [
+        divide_rounded(numerator=numerator, denominator=4) for numerator in range(8)
+    ]
+    # halves are rounded to the nearest even integer, like round()
+    assert [round(numerator / 2) for numerator in range(-7, 8)] == [
+        divide_rounded(numerator=numerator, denominator=2) for numerator in range(-7, 8)
+    ]
+    assert 2 == divide_rounded(numerator=2500, denominator=1000)
+    assert 4 == divide_rounded(numerator=3500, denominator=1000)
+
+
+def test_from_fixed_point_quantity():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+
+    assert 3 == from_fixed_point_quantity(product=toothbrush, quantity=3)
+    assert 1.5 == from_fixed_point_quantity(product=apples, quantity=1500)
+    assert 0.001 == from_fixed_point_quantity(product=apples, quantity=1)
+
+
+def test_get_total_price_cents():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+
+    assert 297 == get_total_price_cents(
+        product=toothbrush, quantity=3, unit_price_cents=99
+    )
+    assert 603 == get_total_price_cents(
+        product=apples, quantity=3017, unit_price_cents=200
+    )
+    # 1.015 kg for 1.00 are 101.5 cents, but 1.015 * 100 is 101.49999999999999
+    assert 102 == get_total_price_cents(
+        product=apples, quantity=1015, unit_price_cents=100
+    )
@@ -0,0 +1,95 @@
+"""This module contains the tests for the receipt module."""
+
+import pytest
+from model_objects import Discount, Product, ProductUnit
+from receipt import Receipt, ReceiptItem, SequenceView
+
+
+def test_sequence_view():
+    items = [1, 2]
+    view = SequenceView(items=items)
+    items.append(3)
+
+    assert 3 == len(view)
+    assert [1, 2, 3] == list(view)
+    assert 2 == view[1]
+    assert [2, 3] == view[1:]
+    assert 3 in view
+    assert "SequenceView([1, 2, 3])" == repr(view)
+    with pytest.raises(TypeError):
+        view[0] = 5
+    assert not hasattr(view, "append")
+
+
+def test_sequence_view_equality():
+    view = SequenceView(items=[1, 2, 3])
+
+    assert [1, 2, 3] == view
+    assert view == (1, 2, 3)
+    assert view == SequenceView(items=[1, 2, 3])
+    assert view != [1, 2]
+    assert view != [1, 2, 4]
+    assert view != "123"
+    assert view != {1, 2, 3}
+    with pytest.raises(TypeError):
+        hash(view)
+
+
+def test_get_total_price_cents():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    receipt = Receipt()
+    assert 0 == receipt.get_total_price_cents()
+
+    receipt.add_product(
+        product=toothbrush, quantity=3, price_cents=99, total_price_cents=297
+    )
+    receipt.add_product(
+        product=apples, quantity=0.75, price_cents=199, total_price_cents=149
+    )
+    assert 446 == receipt.get_total_price_cents()
+
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush, description="3 for 2", discount_amount_cents=-99
+            ),
+            Discount(product=apples, description="10% off", discount_amount_cents=-15),
+        ]
+    )
+    assert 332 == receipt.get_total_price_cents()
+
+    receipt.add_items(
+        items=[
+            ReceiptItem(
+                product=toothbrush, quantity=1, price_cents=99, total_price_cents=99
+            ),
+            ReceiptItem(
+                product=apples, quantity=0.5, price_cents=199, total_price_cents=100
+            ),
+        ]
+    )
+    assert 531 == receipt.get_total_price_cents()
+    assert [3, 0.75, 1, 0.5] == [item.quantity for item in receipt.items]
+
+
+def test_items_and_discounts_are_not_copied():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    receipt = Receipt()
+    items = receipt.items
+    discounts = receipt.discounts
+
+    receipt.add_product(
+        product=toothbrush, quantity=3, price_cents=99, total_price_cents=297
+    )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush, description="3 for 2", discount_amount_cents=-99
+            )
+        ]
+    )
+    assert items is receipt.items
+    assert discounts is receipt.discounts
+    assert [toothbrush] == [item.product for item in items]
+    assert ["3 for 2"] == [discount.description for discount in discounts]
@@ -0,0 +1,226 @@
+"""This module contains the tests for the receipt_archive module."""
+
+import random
+
+import pytest
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType)
+from receipt import Receipt
+from receipt_archive import (COLUMN_NAMES, InvalidReceiptArchiveError,
+                             ReceiptArchive, write_receipt_archive)
+from shopping_cart import ShoppingCart
+from teller import Teller
+from tests.fake_catalog import FakeCatalog
+
+
+def _to_tuples(receipt: Receipt) -> tuple[list[tuple], list[tuple], int]:
+    return (
+        [
+            (
+                item.product,
+                item.quantity,
+                type(item.quantity),
+                item.price_cents,
+                item.total_price_cents,
+            )
+            for item in receipt.items
+        ],
+        [
+            (discount.product, discount.description, discount.discount_amount_cents)
+            for discount in receipt.discounts
+        ],
+        receipt.get_total_price_cents(),
+    )
+
+
+def _create_receipts() -> list[Receipt]:
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=179)
+    apples = Product(name="äpfel", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    catalog.add_product(product=rice, price_cents=249)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=20,
+        )
+    )
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=rice,
+            optional_argument=None,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=10)
+    )
+
+    rng = random.Random(5)
+    products = [toothbrush, toothpaste, apples, rice]
+    carts: list[ShoppingCart] = []
+    for _ in range(20):
+        cart = ShoppingCart(catalog=catalog)
+        for product in rng.sample(products, k=rng.randint(0, 4)):
+            if product.unit == ProductUnit.EACH:
+                quantity = rng.randint(1, 5)
+            else:
+                quantity = rng.randint(50, 3000) / 1000
+            cart.add_item_quantity(product=product, quantity=quantity)
+        carts.append(cart)
+    return teller.check_out_many(carts=carts)
+
+
+def test_write_and_read_receipt_archive(tmp_path):
+    receipts = _create_receipts()
+    path = str(tmp_path / "receipts.archive")
+    assert 20 == write_receipt_archive(path=path, receipts=iter(receipts))
+
+    with ReceiptArchive(path=path) as archive:
+        assert 20 == len(archive)
+        assert [_to_tuples(receipt=receipt) for receipt in receipts] == [
+            _to_tuples(receipt=receipt) for receipt in archive
+        ]
+        assert _to_tuples(receipt=receipts[3]) == _to_tuples(
+            receipt=archive.get_receipt(index=3)
+        )
+
+
+def test_scan_receipt_archive_columns(tmp_path):
+    receipts = _create_receipts()
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=receipts)
+
+    with ReceiptArchive(path=path) as archive:
+        assert [receipt.get_total_price_cents() for receipt in receipts] == list(
+            archive.get_column(name="receipt_total_prices_cents")
+        )
+        assert sum(len(receipt.discounts) for receipt in receipts) == len(
+            archive.get_column(name="discount_amounts_cents")
+        )
+        assert len(archive.get_column(name="item_quantities")) == (
+            archive.get_column(name="receipt_item_offsets")[-1]
+        )
+        assert set(archive.products) == {
+            item.product for receipt in receipts for item in receipt.items
+        }
+
+        expected_revenues_cents: dict[Product, int] = {}
+        for receipt in receipts:
+            for item in receipt.items:
+                expected_revenues_cents[item.product] = (
+                    expected_revenues_cents.get(item.product, 0)
+                    + item.total_price_cents
+                )
+        assert expected_revenues_cents == archive.get_product_revenues_cents()
+
+
+def test_receipt_archive_columns_are_aligned(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=_create_receipts())
+
+    with open(path, "rb") as file:
+        data = file.read()
+    with ReceiptArchive(path=path) as archive:
+        for name in COLUMN_NAMES:
+            column = archive.get_column(name=name)
+            with column.cast("B") as column_bytes:
+                assert column_bytes.tobytes() in data
+        assert 0 == len(data) % 8
+
+
+def test_write_empty_receipt_archive(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=[Receipt()])
+
+    with ReceiptArchive(path=path) as archive:
+        assert 1 == len(archive)
+        assert [] == archive.products
+        assert ([], [], 0) == _to_tuples(receipt=archive.get_receipt(index=0))
+        assert {} == archive.get_product_revenues_cents()
+
+
+def test_receipt_archive_keeps_discount_descriptions(tmp_path):
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    receipt = Receipt()
+    receipt.add_product(
+        product=toothbrush, quantity=2, price_cents=99, total_price_cents=198
+    )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush, description="10% off", discount_amount_cents=-20
+            ),
+            Discount(
+                product=toothbrush, description="10% off", discount_amount_cents=-1
+            ),
+        ]
+    )
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=[receipt, receipt])
+
+    with ReceiptArchive(path=path) as archive:
+        assert ["10% off"] == archive.descriptions
+        assert _to_tuples(receipt=receipt) == _to_tuples(
+            receipt=archive.get_receipt(index=1)
+        )
+
+
+def test_fail_get_receipt_out_of_range(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=[Receipt()])
+
+    with ReceiptArchive(path=path) as archive:
+        with pytest.raises(
+            IndexError,
+            match="Can't get Receipt 1 - archive only contains 1 Receipts!",
+        ):
+            archive.get_receipt(index=1)
+        with pytest.raises(
+            KeyError,
+            match="Can't get column items: Receipt archives have no such column!",
+        ):
+            archive.get_column(name="items")
+
+
+def test_fail_read_invalid_receipt_archive(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    with open(path, "wb") as file:
+        file.write(b"not a receipt archive at all, just some bytes in a file")
+    with pytest.raises(InvalidReceiptArchiveError, match="is not a Receipt archive!"):
+        ReceiptArchive(path=path)
+
+    with open(path, "wb") as file:
+        file.write(b"")
+    with pytest.raises(InvalidReceiptArchiveError, match="is not a Receipt archive!"):
+        ReceiptArchive(path=path)
+
+
+def test_fail_read_truncated_receipt_archive(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(path=path, receipts=_create_receipts())
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:-16])
+
+    with pytest.raises(InvalidReceiptArchiveError, match="is truncated!"):
+        ReceiptArchive(path=path)
+
+
+def test_receipt_archive_keeps_price_versions(tmp_path):
+    path = str(tmp_path / "receipts.archive")
+    write_receipt_archive(
+        path=path,
+        receipts=[Receipt(), Receipt(price_version=0), Receipt(price_version=12)],
+    )
+
+    with ReceiptArchive(path=path) as archive:
+        assert [None, 0, 12] == [receipt.price_version for receipt in archive]
@@ -0,0 +1,316 @@
+"""This module contains the tests for the receipt_serialization module."""
+
+import io
+import random
+import struct
+from typing import Optional
+
+import pytest
+from model_objects import (Bundle, Discount, Offer, Product, ProductUnit,
+                           SpecialOfferType)
+from receipt import Receipt
+from receipt_serialization import (InvalidReceiptStreamError, ReceiptWriter,
+                                   deserialize_receipts, read_receipts,
+                                   serialize_receipts)
+from shopping_cart import ShoppingCart
+from teller import Teller
+from tests.fake_catalog import FakeCatalog
+
+
+def _to_tuples(receipt: Receipt) -> tuple[list[tuple], list[tuple], int, Optional[int]]:
+    return (
+        [
+            (
+                item.product,
+                item.quantity,
+                type(item.quantity),
+                item.price_cents,
+                item.total_price_cents,
+            )
+            for item in receipt.items
+        ],
+        [
+            (discount.product, discount.description, discount.discount_amount_cents)
+            for discount in receipt.discounts
+        ],
+        receipt.get_total_price_cents(),
+        receipt.price_version,
+    )
+
+
+def _create_receipts() -> list[Receipt]:
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=179)
+    apples = Product(name="äpfel", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    catalog.add_product(product=rice, price_cents=249)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=20,
+        )
+    )
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=rice,
+            optional_argument=None,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=10)
+    )
+
+    rng = random.Random(5)
+    products = [toothbrush, toothpaste, apples, rice]
+    carts: list[ShoppingCart] = []
+    for _ in range(20):
+        cart = ShoppingCart(catalog=catalog)
+        for product in rng.sample(products, k=rng.randint(0, 4)):
+            if product.unit == ProductUnit.EACH:
+                quantity = rng.randint(1, 5)
+            else:
+                quantity = rng.randint(50, 3000) / 1000
+            cart.add_item_quantity(product=product, quantity=quantity)
+        carts.append(cart)
+    return teller.check_out_many(carts=carts)
+
+
+def test_serialize_and_deserialize_receipts():
+    receipts = _create_receipts()
+    receipts[4].price_version = 12
+
+    data = serialize_receipts(receipts=receipts)
+
+    assert [_to_tuples(receipt=receipt) for receipt in receipts] == [
+        _to_tuples(receipt=receipt) for receipt in deserialize_receipts(data=data)
+    ]
+
+
+def test_products_and_descriptions_are_defined_once_per_stream():
+    toothbrush = Product(name="toothbrush with a very long name", unit=ProductUnit.EACH)
+    receipt = Receipt()
+    receipt.add_product(
+        product=toothbrush, quantity=2, price_cents=99, total_price_cents=198
+    )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush,
+                description="a Discount with a very long description",
+                discount_amount_cents=-20,
+            )
+        ]
+    )
+
+    data = serialize_receipts(receipts=[receipt] * 10)
+
+    assert 1 == data.count(b"toothbrush with a very long name")
+    assert 1 == data.count(b"a Discount with a very long description")
+    assert 10 == len(deserialize_receipts(data=data))
+
+
+def test_read_concatenated_streams():
+    receipts = _create_receipts()
+    # every till has its own stream, in which the Products have other indices
+    data = serialize_receipts(receipts=receipts[:10]) + serialize_receipts(
+        receipts=list(reversed(receipts[10:]))
+    )
+
+    assert [_to_tuples(receipt=receipt) for receipt in receipts[:10]] + [
+        _to_tuples(receipt=receipt) for receipt in reversed(receipts[10:])
+    ] == [_to_tuples(receipt=receipt) for receipt in deserialize_receipts(data=data)]
+
+
+def test_read_receipts_while_they_are_written():
+    receipts = _create_receipts()
+    file = io.BytesIO()
+    writer = ReceiptWriter(file=file)
+    writer.write_receipt(receipt=receipts[0])
+    file.seek(0)
+    reader = read_receipts(file=file)
+
+    assert _to_tuples(receipt=receipts[0]) == _to_tuples(receipt=next(reader))
+
+    position = file.tell()
+    writer.file.seek(0, io.SEEK_END)
+    writer.write_receipts(receipts=receipts[1:3])
+    file.seek(position)
+    assert [_to_tuples(receipt=receipt) for receipt in receipts[1:3]] == [
+        _to_tuples(receipt=receipt) for receipt in reader
+    ]
+
+
+def test_serialize_no_receipts():
+    assert [] == deserialize_receipts(data=serialize_receipts(receipts=[]))
+    assert [] == deserialize_receipts(data=b"")
+    assert [([], [], 0, None)] == [
+        _to_tuples(receipt=receipt)
+        for receipt in deserialize_receipts(
+            data=serialize_receipts(receipts=[Receipt()])
+        )
+    ]
+
+
+def test_fail_read_invalid_receipt_stream():
+    with pytest.raises(
+        InvalidReceiptStreamError, match="Data is not a Receipt stream!"
+    ):
+        deserialize_receipts(data=b"not a receipt stream at all")
+    with pytest.raises(
+        InvalidReceiptStreamError, match="Data is not a Receipt stream!"
+    ):
+        deserialize_receipts(data=b"\x89RECEIPT\x01")
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Can't read version 7 of the Receipt stream format, only version 1!",
+    ):
+        deserialize_receipts(data=b"\x89RCPTSTR\x07")
+
+    data = serialize_receipts(receipts=[])
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains unknown record type 255!",
+    ):
+        deserialize_receipts(data=data + b"\xff")
+
+
+def test_fail_read_truncated_receipt_stream():
+    data = serialize_receipts(receipts=_create_receipts())
+    for length in [3, len(data) - 1, len(data) - 30]:
+        with pytest.raises(InvalidReceiptStreamError, match="is truncated!"):
+            deserialize_receipts(data=data[:length])
+
+
+def test_fail_read_receipt_with_undefined_product():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    receipt = Receipt()
+    receipt.add_product(
+        product=toothbrush, quantity=2, price_cents=99, total_price_cents=198
+    )
+    file = io.BytesIO()
+    writer = ReceiptWriter(file=file)
+    writer.write_receipt(receipt=receipt)
+    # the second stream doesn't define the Product again
+    ReceiptWriter(file=file)
+    writer.write_receipt(receipt=receipt)
+
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream references a Product or description that hasn't been defined!",
+    ):
+        deserialize_receipts(data=file.getvalue())
+
+
+def test_fail_read_malformed_receipt_stream():
+    header = serialize_receipts(receipts=[])
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains unknown ProductUnit 99!",
+    ):
+        deserialize_receipts(data=header + b"\x01" + struct.pack("<BI", 99, 1) + b"x")
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains a text that is not valid UTF-8!",
+    ):
+        deserialize_receipts(
+            data=header
+            + b"\x01"
+            + struct.pack("<BI", ProductUnit.EACH.value, 2)
+            + b"\xff\xfe"
+        )
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains a text that is not valid UTF-8!",
+    ):
+        deserialize_receipts(data=header + b"\x02" + struct.pack("<I", 1) + b"\x80")
+
+
+def test_fail_read_receipt_stream_with_huge_counts():
+    header = serialize_receipts(receipts=[])
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains a text of 4294967295 bytes, but at most 65536 bytes are allowed!",
+    ):
+        deserialize_receipts(data=header + b"\x02" + struct.pack("<I", 2**32 - 1))
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains a Receipt with 4294967295 items and 0 Discounts, but at most 1048576 of each are allowed!",
+    ):
+        deserialize_receipts(
+            data=header + b"\x03" + struct.pack("<qII", -1, 2**32 - 1, 0)
+        )
+    with pytest.raises(
+        InvalidReceiptStreamError,
+        match="Receipt stream contains a Receipt with 0 items and 4294967295 Discounts, but at most 1048576 of each are allowed!",
+    ):
+        deserialize_receipts(
+            data=header + b"\x03" + struct.pack("<qII", -1, 0, 2**32 - 1)
+        )
+
+
+def test_fail_write_too_long_description():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    receipt = Receipt()
+    receipt.add_product(
+        product=toothbrush, quantity=2, price_cents=99, total_price_cents=198
+    )
+    receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush,
+                description="x" * 70000,
+                discount_amount_cents=-20,
+            )
+        ]
+    )
+
+    with pytest.raises(
+        ValueError,
+        match="Can't write 'xxxxxxxxxxxxxxxxxxxx'... to Receipt stream - text is longer than 65536 bytes!",
+    ):
+        serialize_receipts(receipts=[receipt])
+
+
+def test_write_receipt_after_rejected_receipt():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    rejected_receipt = Receipt()
+    rejected_receipt.add_product(
+        product=toothpaste, quantity=1, price_cents=179, total_price_cents=179
+    )
+    rejected_receipt.add_product(
+        product=toothbrush, quantity=2, price_cents=99, total_price_cents=198
+    )
+    rejected_receipt.add_discounts(
+        discounts=[
+            Discount(
+                product=toothbrush, description="x" * 70000, discount_amount_cents=-20
+            )
+        ]
+    )
+    receipt = Receipt()
+    receipt.add_product(
+        product=toothbrush, quantity=1, price_cents=99, total_price_cents=99
+    )
+    receipt.add_product(
+        product=toothpaste, quantity=1, price_cents=179, total_price_cents=179
+    )
+    file = io.BytesIO()
+    writer = ReceiptWriter(file=file)
+
+    with pytest.raises(ValueError):
+        writer.write_receipt(receipt=rejected_receipt)
+    writer.write_receipt(receipt=receipt)
+
+    assert [_to_tuples(receipt=receipt)] == [
+        _to_tuples(receipt=read_receipt)
+        for read_receipt in deserialize_receipts(data=file.getvalue())
+    ]
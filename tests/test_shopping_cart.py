@@ -3,7 +3,8 @@
 import pytest
 from model_objects import Product, ProductUnit
 from shopping_cart import (IllegalQuantityForProductTypeError,
-                           ProductNotInCatalogError, ShoppingCart)
+                           ProductNotInCartError, ProductNotInCatalogError,
+                           ShoppingCart)
 from tests.fake_catalog import FakeCatalog
 
 
@@ -18,18 +19,38 @@ def test_add_item_quantity():
     cart.add_item_quantity(product=toothbrush, quantity=3)
     cart.add_item_quantity(product=apples, quantity=2.5)
 
+    # weights are kept in grams
     assert {
         toothbrush: 3,
-        apples: 2.5,
+        apples: 2500,
     } == cart._product_quantities
 
     cart.add_item_quantity(product=apples, quantity=1.2)
     assert {
         toothbrush: 3,
-        apples: 3.7,
+        apples: 3700,
     } == cart._product_quantities
 
 
+def test_repeatedly_scanned_weights_are_exact():
+    catalog = FakeCatalog()
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+
+    cart = ShoppingCart(catalog=catalog)
+    for _ in range(10):
+        cart.add_item_quantity(product=apples, quantity=0.1)
+    # the sum of ten floats 0.1 is 0.9999999999999999
+    assert {apples: 1000} == cart.product_quantities
+
+    cart.remove_item_quantity(product=apples, quantity=0.3)
+    cart.remove_item_quantity(product=apples, quantity=0.7)
+    assert {} == cart.product_quantities
+
+    cart.set_item_quantity(product=apples, quantity=0.1234)
+    assert {apples: 123} == cart.product_quantities
+
+
 def test_fail_add_item_quantity_unexpected_float_quantity():
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
@@ -43,6 +64,38 @@ def test_fail_add_item_quantity_unexpected_float_quantity():
         cart.add_item_quantity(product=toothbrush, quantity=2.5)
 
 
+def test_fail_change_quantity_by_weight_rounded_to_zero_grams():
+    catalog = FakeCatalog()
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+    cart = ShoppingCart(catalog=catalog)
+    changes = []
+    cart.add_listener(
+        listener=lambda product, quantity: changes.append((product, quantity))
+    )
+
+    with pytest.raises(
+        ValueError,
+        match=r"Can't add 0.0005 of Product\(name=apples\) to cart - weights are rounded to the nearest gram, but quantity would be rounded to 0 grams!",
+    ):
+        cart.add_item_quantity(product=apples, quantity=0.0005)
+    assert {} == cart.product_quantities
+
+    cart.add_item_quantity(product=apples, quantity=0.0006)
+    with pytest.raises(
+        ValueError,
+        match=r"Can't remove 0.0001 of Product\(name=apples\) from cart - weights are rounded to the nearest gram, but quantity would be rounded to 0 grams!",
+    ):
+        cart.remove_item_quantity(product=apples, quantity=0.0001)
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set quantity of Product\(name=apples\) in cart to 0.0001 - weights are rounded to the nearest gram, but quantity would be rounded to 0 grams!",
+    ):
+        cart.set_item_quantity(product=apples, quantity=0.0001)
+    assert {apples: 1} == cart.product_quantities
+    assert [(apples, 1)] == changes
+
+
 def test_fail_add_item_quantity_product_not_in_catalog():
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
@@ -56,3 +109,144 @@ def test_fail_add_item_quantity_product_not_in_catalog():
         match="Can't add Product\(name=apples\) to ShoppingCart - Product is not in Catalog that this ShoppingCart belongs to!",
     ):
         cart.add_item_quantity(product=apples, quantity=3.5)
+
+
+def test_add_item_quantity_notifies_listeners():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    cart = ShoppingCart(catalog=catalog)
+    changes = []
+    listener = lambda product, quantity: changes.append((product, quantity))
+    cart.add_listener(listener=listener)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    cart.remove_listener(listener=listener)
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+
+    assert [(toothbrush, 2), (toothbrush, 3)] == changes
+
+
+def test_add_item_quantity_verifies_product_in_catalog_once(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    cart = ShoppingCart(catalog=catalog)
+    spied_contains_product = mocker.spy(catalog, "contains_product")
+    cart.add_item_quantity(product=toothbrush, quantity=1)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cart.set_item_quantity(product=toothbrush, quantity=5)
+    cart.remove_item_quantity(product=toothbrush, quantity=1)
+
+    spied_contains_product.assert_called_once_with(product=toothbrush)
+
+
+def test_remove_item_quantity():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+
+    cart = ShoppingCart(catalog=catalog)
+    changes = []
+    cart.add_listener(
+        listener=lambda product, quantity: changes.append((product, quantity))
+    )
+    cart.add_item_quantity(product=toothbrush, quantity=3)
+    cart.add_item_quantity(product=apples, quantity=3.7)
+
+    cart.remove_item_quantity(product=toothbrush, quantity=1)
+    assert {toothbrush: 2, apples: 3700} == cart.product_quantities
+
+    cart.remove_item_quantity(product=apples, quantity=1.2)
+    cart.remove_item_quantity(product=apples, quantity=2.5)
+    assert {toothbrush: 2} == cart.product_quantities
+
+    cart.remove_item_quantity(product=toothbrush, quantity=2)
+    assert {} == cart.product_quantities
+    assert [
+        (toothbrush, 3),
+        (apples, 3700),
+        (toothbrush, 2),
+        (apples, 2500),
+        (apples, 0),
+        (toothbrush, 0),
+    ] == changes
+
+
+def test_fail_remove_item_quantity():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+
+    with pytest.raises(
+        ProductNotInCartError,
+        match=r"Can't remove Product\(name=apples\) from ShoppingCart - Product is not in ShoppingCart!",
+    ):
+        cart.remove_item_quantity(product=apples, quantity=1)
+    with pytest.raises(
+        ValueError,
+        match=r"Can't remove 3 of Product\(name=toothbrush\) from ShoppingCart - ShoppingCart only contains 2!",
+    ):
+        cart.remove_item_quantity(product=toothbrush, quantity=3)
+    with pytest.raises(
+        ValueError,
+        match=r"Can't remove -1 of Product\(name=toothbrush\) from cart - quantity must not be negative!",
+    ):
+        cart.remove_item_quantity(product=toothbrush, quantity=-1)
+    with pytest.raises(
+        IllegalQuantityForProductTypeError,
+        match=r"Can't remove 0.5 of Product\(name=toothbrush\) from cart - Products with ProductUnit.EACH must be added in integer quantities!",
+    ):
+        cart.remove_item_quantity(product=toothbrush, quantity=0.5)
+    assert {toothbrush: 2} == cart.product_quantities
+
+
+def test_set_item_quantity():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=199)
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.set_item_quantity(product=toothbrush, quantity=3)
+    cart.set_item_quantity(product=apples, quantity=1.5)
+    cart.set_item_quantity(product=toothbrush, quantity=1)
+    assert {toothbrush: 1, apples: 1500} == cart.product_quantities
+
+    cart.set_item_quantity(product=apples, quantity=0)
+    assert {toothbrush: 1} == cart.product_quantities
+
+
+def test_fail_set_item_quantity():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+
+    cart = ShoppingCart(catalog=catalog)
+    with pytest.raises(
+        ValueError,
+        match=r"Can't set quantity of Product\(name=toothbrush\) in cart to -1 - quantity must not be negative!",
+    ):
+        cart.set_item_quantity(product=toothbrush, quantity=-1)
+    with pytest.raises(
+        IllegalQuantityForProductTypeError,
+        match=r"Can't set quantity of Product\(name=toothbrush\) in cart to 1.5 - Products with ProductUnit.EACH must be added in integer quantities!",
+    ):
+        cart.set_item_quantity(product=toothbrush, quantity=1.5)
+    with pytest.raises(
+        ProductNotInCatalogError,
+        match=r"Can't add Product\(name=apples\) to ShoppingCart - Product is not in Catalog that this ShoppingCart belongs to!",
+    ):
+        cart.set_item_quantity(product=apples, quantity=1)
+    assert {} == cart.product_quantities
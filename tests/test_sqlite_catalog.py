@@ -0,0 +1,249 @@
+"""This module contains the tests for the sqlite_catalog module."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from model_objects import Product, ProductUnit
+from shopping_cart import ShoppingCart
+from sqlite_catalog import (ConnectionPoolClosedError,
+                            ConnectionPoolTimeoutError, SqliteCatalog)
+from teller import Teller
+
+
+def test_add_and_get_products():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    apples_each = Product(name="apples", unit=ProductUnit.EACH)
+
+    with SqliteCatalog() as catalog:
+        catalog.add_product(product=toothbrush, price_cents=99)
+        catalog.add_product(product=apples, price_cents=199)
+
+        assert catalog.contains_product(product=toothbrush)
+        assert catalog.contains_product(product=apples)
+        assert not catalog.contains_product(product=apples_each)
+        assert 99 == catalog.get_unit_price_cents(product=toothbrush)
+        assert 199 == catalog.get_unit_price_cents(product=apples)
+
+        catalog.add_product(product=toothbrush, price_cents=129)
+        assert 129 == catalog.get_unit_price_cents(product=toothbrush)
+
+
+def test_get_unit_prices_in_batches():
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(600)
+    ]
+    with SqliteCatalog() as catalog:
+        catalog.add_products(
+            products_prices_cents={
+                product: index for index, product in enumerate(products)
+            }
+        )
+
+        for count in [0, 1, 3, 17, 256, 600]:
+            requested_products = products[::-1][:count]
+            unit_prices_cents = catalog.get_unit_prices_cents(
+                products=requested_products
+            )
+            assert requested_products == list(unit_prices_cents)
+            assert [599 - index for index in range(count)] == list(
+                unit_prices_cents.values()
+            )
+
+        assert {products[2]: 2, products[1]: 1} == catalog.get_unit_prices_cents(
+            products=[products[2], products[1], products[2]]
+        )
+
+
+def test_fail_get_unit_price_of_missing_product():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    with SqliteCatalog() as catalog:
+        catalog.add_product(product=toothbrush, price_cents=99)
+
+        with pytest.raises(
+            KeyError,
+            match=r"Can't get unit price of Product\(name=toothpaste\): Product is not in the catalog!",
+        ):
+            catalog.get_unit_price_cents(product=toothpaste)
+        with pytest.raises(
+            KeyError,
+            match=r"Can't get unit price of Product\(name=toothpaste\): Product is not in the catalog!",
+        ):
+            catalog.get_unit_prices_cents(products=[toothbrush, toothpaste])
+
+
+def test_default_catalogs_are_separate_and_temporary():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    with SqliteCatalog() as catalog_one, SqliteCatalog() as catalog_two:
+        catalog_one.add_product(product=toothbrush, price_cents=99)
+        assert not catalog_two.contains_product(product=toothbrush)
+        database = catalog_one._pool.database
+        assert os.path.exists(database)
+    assert not os.path.exists(os.path.dirname(database))
+
+
+def test_catalog_file_is_persistent(tmp_path):
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    database = str(tmp_path / "catalog.sqlite")
+    with SqliteCatalog(database=database) as catalog:
+        catalog.add_product(product=toothbrush, price_cents=99)
+
+    with SqliteCatalog(database=database) as catalog:
+        assert 99 == catalog.get_unit_price_cents(product=toothbrush)
+
+
+def test_concurrent_checkouts(tmp_path):
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(50)
+    ]
+    with SqliteCatalog(
+        database=str(tmp_path / "catalog.sqlite"), pool_size=3
+    ) as catalog:
+        catalog.add_products(
+            products_prices_cents={
+                product: 100 + index for index, product in enumerate(products)
+            }
+        )
+        teller = Teller(catalog=catalog)
+        carts = []
+        for index in range(40):
+            cart = ShoppingCart(catalog=catalog)
+            for product in products[index : index + 10]:
+                cart.add_item_quantity(product=product, quantity=1)
+            carts.append(cart)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            receipts = list(executor.map(teller.check_out_articles_from_cart, carts))
+        assert [
+            sum(100 + index + offset for offset in range(10)) for index in range(40)
+        ] == [receipt.get_total_price_cents() for receipt in receipts]
+
+
+def test_concurrent_reads_and_writes_on_default_catalog():
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(50)
+    ]
+    with SqliteCatalog(pool_size=4) as catalog:
+        catalog.add_products(
+            products_prices_cents={product: 100 for product in products}
+        )
+
+        def write_prices(price_cents: int) -> None:
+            for _ in range(20):
+                for product in products:
+                    catalog.add_product(product=product, price_cents=price_cents)
+
+        def read_prices() -> None:
+            for _ in range(200):
+                unit_prices_cents = catalog.get_unit_prices_cents(products=products)
+                assert products == list(unit_prices_cents)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(write_prices, 200) for _ in range(2)]
+            futures += [executor.submit(read_prices) for _ in range(6)]
+            for future in futures:
+                future.result()
+        assert {200} == set(catalog.get_unit_prices_cents(products=products).values())
+
+
+def test_pool_hands_out_connections_in_arrival_order():
+    with SqliteCatalog(pool_size=1) as catalog:
+        pool = catalog._pool
+        connection_order: list[int] = []
+        waiters_started = []
+
+        def borrow_connection(number: int) -> None:
+            with pool.connection():
+                connection_order.append(number)
+
+        with pool.connection():
+            for number in range(5):
+                thread = threading.Thread(target=borrow_connection, args=(number,))
+                thread.start()
+                waiters_started.append(thread)
+                # wait until the thread is queued, so that the arrival order is known
+                while len(pool._waiters) <= number:
+                    time.sleep(0.001)
+        for thread in waiters_started:
+            thread.join()
+        assert [0, 1, 2, 3, 4] == connection_order
+
+
+def test_fail_get_connection_from_exhausted_pool():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    with SqliteCatalog(pool_size=1, timeout_seconds=0.01) as catalog:
+        catalog.add_product(product=toothbrush, price_cents=99)
+        connection_borrowed = threading.Event()
+        release_connection = threading.Event()
+
+        def borrow_connection() -> None:
+            with catalog._pool.connection():
+                connection_borrowed.set()
+                release_connection.wait()
+
+        thread = threading.Thread(target=borrow_connection)
+        thread.start()
+        connection_borrowed.wait()
+        try:
+            with pytest.raises(
+                ConnectionPoolTimeoutError,
+                match="Can't get a database connection - all 1 connections have been in use for 0.01 seconds!",
+            ):
+                catalog.contains_product(product=toothbrush)
+        finally:
+            release_connection.set()
+            thread.join()
+        assert catalog.contains_product(product=toothbrush)
+
+
+def test_fail_create_catalog_with_invalid_pool_size():
+    with pytest.raises(
+        ValueError, match="pool_size must be positive integer, but got 0!"
+    ):
+        SqliteCatalog(pool_size=0)
+
+
+@pytest.mark.parametrize("database", [":memory:", ""])
+def test_fail_create_catalog_with_in_memory_database(database):
+    with pytest.raises(
+        ValueError,
+        match=f"database must be the path of a database file, but got {database!r}!",
+    ):
+        SqliteCatalog(database=database)
+
+
+def test_close_catalog_while_connection_is_in_use():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog = SqliteCatalog(pool_size=2)
+    catalog.add_product(product=toothbrush, price_cents=99)
+    connection_borrowed = threading.Event()
+    closing = threading.Event()
+    prices_cents: list[int] = []
+
+    def get_price_while_closing() -> None:
+        with catalog._pool.connection() as connection:
+            connection_borrowed.set()
+            closing.wait()
+            # the connection is still open while the catalog is being closed
+            time.sleep(0.05)
+            prices_cents.append(
+                connection.execute("SELECT price_cents FROM products").fetchone()[0]
+            )
+
+    thread = threading.Thread(target=get_price_while_closing)
+    thread.start()
+    connection_borrowed.wait()
+    closing.set()
+    catalog.close()
+    thread.join()
+
+    assert [99] == prices_cents
+    with pytest.raises(
+        ConnectionPoolClosedError,
+        match="Can't get a database connection - the pool has been closed!",
+    ):
+        catalog.contains_product(product=toothbrush)
@@ -1,20 +1,33 @@
 """This module contains the tests for the teller module."""
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import ANY, call
 
 import pytest
+from catalog import SupermarketCatalog
+from checkout_metrics import NULL_METRICS_SINK, RecordingMetricsSink
+from discount_creation import OfferDiscountCache
 from model_objects import Bundle, Offer, Product, ProductUnit, SpecialOfferType
 from receipt import Receipt
 from shopping_cart import ShoppingCart
-from teller import AlreadyHasBundleError, AlreadyHasOfferError, Teller
-from tests.fake_catalog import FakeCatalog
+from teller import (AlreadyHasBundleError, AlreadyHasOfferError,
+                    OfferNotFoundError, Teller)
+from tests.fake_catalog import FakeAsyncCatalog, FakeCatalog
 
 
-def test_fail_add_offer_with_existing_offer():
+def test_add_overlapping_offers_and_bundles():
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
     catalog.add_product(product=toothbrush, price_cents=100)
 
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    dental_floss = Product(name="dental floss", unit=ProductUnit.EACH)
+    catalog.add_product(product=dental_floss, price_cents=60)
+
     teller = Teller(catalog=catalog)
     offer_one = Offer(
         offer_type=SpecialOfferType.PERCENT_DISCOUNT,
@@ -27,47 +40,45 @@ def test_fail_add_offer_with_existing_offer():
         product=toothbrush,
         optional_argument=400,
     )
-    with pytest.raises(
-        AlreadyHasOfferError,
-        match="Can't add Offer for Product\(name=toothbrush\): Product already has an Offer!",
-    ):
-        teller.add_offer(offer=offer_two)
-
+    teller.add_offer(offer=offer_two)
+    bundle_one = Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    teller.add_bundle(bundle=bundle_one)
+    bundle_two = Bundle(products=[toothbrush, dental_floss], discount_percentage=10)
+    teller.add_bundle(bundle=bundle_two)
 
-def test_fail_add_offer_with_existing_bundle():
-    catalog = FakeCatalog()
-    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
-    catalog.add_product(product=toothbrush, price_cents=100)
+    assert {toothbrush: (offer_one, offer_two)} == teller.product_offers_map
+    assert {
+        toothbrush: (bundle_one, bundle_two),
+        toothpaste: (bundle_one,),
+        dental_floss: (bundle_two,),
+    } == teller.product_bundles_map
 
-    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
-    catalog.add_product(product=toothpaste, price_cents=80)
 
-    teller = Teller(catalog=catalog)
-    bundle = Bundle(
-        products=[toothbrush, toothpaste],
-        discount_percentage=20,
-    )
-    teller.add_bundle(bundle=bundle)
+def test_promotions_are_read_only():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    teller = Teller(catalog=FakeCatalog())
     offer = Offer(
-        offer_type=SpecialOfferType.FIVE_FOR_AMOUNT,
+        offer_type=SpecialOfferType.PERCENT_DISCOUNT,
         product=toothbrush,
-        optional_argument=400,
+        optional_argument=20,
     )
-    with pytest.raises(
-        AlreadyHasBundleError,
-        match="Can't add Offer for Product\(name=toothbrush\): Product already has a Bundle!",
-    ):
-        teller.add_offer(offer=offer)
+    teller.add_offer(offer=offer)
 
+    with pytest.raises(TypeError):
+        teller.product_offers_map[toothbrush] = ()
+    with pytest.raises(AttributeError):
+        teller.product_offers_map[toothbrush].append(offer)
+    with pytest.raises(TypeError):
+        teller.product_bundles_map[toothbrush] = ()
+    with pytest.raises(TypeError):
+        del teller.offer_evaluators[offer]
 
-def test_fail_add_bundle_with_existing_offer():
+
+def test_fail_add_offer_twice():
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
     catalog.add_product(product=toothbrush, price_cents=100)
 
-    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
-    catalog.add_product(product=toothpaste, price_cents=80)
-
     teller = Teller(catalog=catalog)
     offer = Offer(
         offer_type=SpecialOfferType.PERCENT_DISCOUNT,
@@ -75,18 +86,14 @@ def test_fail_add_bundle_with_existing_offer():
         optional_argument=20,
     )
     teller.add_offer(offer=offer)
-    bundle = Bundle(
-        products=[toothbrush, toothpaste],
-        discount_percentage=10,
-    )
     with pytest.raises(
         AlreadyHasOfferError,
-        match="Can't add Bundle for Product\(name=toothbrush\): Product already has an Offer!",
+        match=r"Can't add Offer for Product\(name=toothbrush\): Offer has already been added!",
     ):
-        teller.add_bundle(bundle=bundle)
+        teller.add_offer(offer=offer)
 
 
-def test_fail_add_bundle_with_existing_bundle():
+def test_fail_add_bundle_twice():
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
     catalog.add_product(product=toothbrush, price_cents=100)
@@ -94,24 +101,14 @@ def test_fail_add_bundle_with_existing_bundle():
     toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
     catalog.add_product(product=toothpaste, price_cents=80)
 
-    dental_floss = Product(name="dental floss", unit=ProductUnit.EACH)
-    catalog.add_product(product=dental_floss, price_cents=60)
-
     teller = Teller(catalog=catalog)
-    bundle_one = Bundle(
-        products=[toothbrush, toothpaste],
-        discount_percentage=20,
-    )
-    teller.add_bundle(bundle=bundle_one)
-    bundle_two = Bundle(
-        products=[toothbrush, dental_floss],
-        discount_percentage=10,
-    )
+    bundle = Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    teller.add_bundle(bundle=bundle)
     with pytest.raises(
         AlreadyHasBundleError,
-        match="Can't add Bundle for Product\(name=toothbrush\): Product already has a Bundle!",
+        match=r"Can't add Bundle for Product\(name=toothbrush\): Bundle has already been added!",
     ):
-        teller.add_bundle(bundle=bundle_two)
+        teller.add_bundle(bundle=bundle)
 
 
 def test_add_products_to_receipt(mocker):
@@ -138,7 +135,9 @@ def test_add_products_to_receipt(mocker):
 
     add_product_spy = mocker.spy(receipt, "add_product")
     teller._add_products_to_receipt(
-        receipt=receipt, product_quantities=cart.product_quantities
+        receipt=receipt,
+        product_quantities=cart.product_quantities,
+        unit_prices_cents={toothbrush: 100, apples: 200},
     )
     expected_calls = [
         call(
@@ -161,7 +160,7 @@ def test_check_out_articles_from_cart(mocker):
     mocked_add_products_to_receipt = mocker.patch(
         "teller.Teller._add_products_to_receipt"
     )
-    mocked_create_discounts = mocker.patch("teller.create_discounts")
+    mocked_create_best_discounts = mocker.patch("teller.create_best_discounts")
 
     catalog = FakeCatalog()
     toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
@@ -193,18 +192,531 @@ def test_check_out_articles_from_cart(mocker):
     teller.check_out_articles_from_cart(cart=cart)
 
     expected_product_quantities_map = {
-        apples: 3.5,
+        apples: 3500,
         toothbrush: 2,
         toothpaste: 3,
     }
+    expected_unit_prices_cents = {
+        apples: 200,
+        toothbrush: 100,
+        toothpaste: 80,
+    }
     mocked_add_products_to_receipt.assert_called_with(
         receipt=ANY,
         product_quantities=expected_product_quantities_map,
+        unit_prices_cents=expected_unit_prices_cents,
     )
-    expected_product_offers_map = {apples: offer}
-    mocked_create_discounts.assert_called_with(
+    expected_product_offers_map = {apples: (offer,)}
+    mocked_create_best_discounts.assert_called_with(
         product_quantities_map=expected_product_quantities_map,
         product_offers_map=expected_product_offers_map,
         bundles=[bundle],
-        catalog=catalog,
+        unit_prices_cents=expected_unit_prices_cents,
+        metrics_sink=NULL_METRICS_SINK,
+        offer_discount_cache=None,
+        offer_evaluators=teller.offer_evaluators,
+    )
+
+
+def test_get_candidate_bundles():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    oil_can = Product(name="oil can", unit=ProductUnit.EACH)
+    catalog.add_product(product=oil_can, price_cents=400)
+
+    wheel = Product(name="wheel", unit=ProductUnit.EACH)
+    catalog.add_product(product=wheel, price_cents=50000)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    teller = Teller(catalog=catalog)
+    dental_bundle = Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    teller.add_bundle(bundle=dental_bundle)
+    car_bundle = Bundle(products=[oil_can, wheel], discount_percentage=15)
+    teller.add_bundle(bundle=car_bundle)
+
+    assert [dental_bundle] == teller._get_candidate_bundles(
+        product_quantities={toothbrush: 2, toothpaste: 1, apples: 1500},
+        promotions=teller.promotions,
+    )
+    assert [car_bundle, dental_bundle] == teller._get_candidate_bundles(
+        product_quantities={wheel: 4, toothpaste: 1}, promotions=teller.promotions
+    )
+    assert [] == teller._get_candidate_bundles(
+        product_quantities={apples: 1500}, promotions=teller.promotions
+    )
+
+
+def test_check_out_articles_from_cart_looks_up_prices_once(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=10,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    )
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=apples, quantity=2)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cart.add_item_quantity(product=toothpaste, quantity=3)
+
+    get_unit_price_cents_spy = mocker.spy(catalog, "get_unit_price_cents")
+    get_unit_prices_cents_spy = mocker.spy(catalog, "get_unit_prices_cents")
+    receipt = teller.check_out_articles_from_cart(cart=cart)
+
+    assert 0 == get_unit_price_cents_spy.call_count
+    get_unit_prices_cents_spy.assert_called_once_with(
+        products=[apples, toothbrush, toothpaste]
     )
+    assert 3 == len(receipt.discounts)
+
+
+def test_check_out_articles_from_cart_with_single_price_catalog():
+    class SinglePriceCatalog(SupermarketCatalog):
+        # a catalog that doesn't know about the batched price lookup
+        def __init__(self):
+            self.prices_cents: dict[Product, int] = {}
+
+        def add_product(self, product: Product, price_cents: int) -> None:
+            self.prices_cents[product] = price_cents
+
+        def contains_product(self, product: Product) -> bool:
+            return product in self.prices_cents
+
+        def get_unit_price_cents(self, product: Product) -> int:
+            return self.prices_cents[product]
+
+    catalog = SinglePriceCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=10,
+        )
+    )
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cart.add_item_quantity(product=apples, quantity=1.5)
+
+    receipt = teller.check_out_articles_from_cart(cart=cart)
+    assert 200 + 300 - 30 == receipt.get_total_price_cents()
+
+
+def test_check_out_many(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=10,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    )
+
+    cart_one = ShoppingCart(catalog=catalog)
+    cart_one.add_item_quantity(product=apples, quantity=2.5)
+    cart_one.add_item_quantity(product=toothbrush, quantity=2)
+    cart_two = ShoppingCart(catalog=catalog)
+    cart_two.add_item_quantity(product=toothbrush, quantity=1)
+    cart_two.add_item_quantity(product=toothpaste, quantity=3)
+    cart_three = ShoppingCart(catalog=catalog)
+
+    get_unit_prices_cents_spy = mocker.spy(catalog, "get_unit_prices_cents")
+    receipts = teller.check_out_many(carts=[cart_one, cart_two, cart_three])
+
+    get_unit_prices_cents_spy.assert_called_once_with(
+        products=[apples, toothbrush, toothpaste]
+    )
+    assert [650, 304, 0] == [receipt.get_total_price_cents() for receipt in receipts]
+    for cart, receipt in zip([cart_one, cart_two, cart_three], receipts):
+        expected_receipt = teller.check_out_articles_from_cart(cart=cart)
+        assert [item.product for item in expected_receipt.items] == [
+            item.product for item in receipt.items
+        ]
+        assert [
+            discount.discount_amount_cents for discount in expected_receipt.discounts
+        ] == [discount.discount_amount_cents for discount in receipt.discounts]
+
+
+def test_check_out_articles_from_cart_async(mocker):
+    catalog = FakeAsyncCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.THREE_FOR_TWO,
+            product=toothbrush,
+            optional_argument=None,
+        )
+    )
+
+    carts = []
+    for quantity in range(1, 6):
+        cart = ShoppingCart(catalog=catalog)
+        cart.add_item_quantity(product=toothbrush, quantity=quantity)
+        cart.add_item_quantity(product=apples, quantity=0.5)
+        carts.append(cart)
+
+    async def check_out_all_carts():
+        return await asyncio.gather(
+            *(teller.check_out_articles_from_cart_async(cart=cart) for cart in carts)
+        )
+
+    get_unit_price_cents_spy = mocker.spy(catalog, "get_unit_price_cents")
+    receipts = asyncio.run(check_out_all_carts())
+
+    assert 10 == get_unit_price_cents_spy.call_count
+    assert [200, 300, 300, 400, 500] == [
+        receipt.get_total_price_cents() for receipt in receipts
+    ]
+
+
+def test_fail_check_out_articles_from_cart_async_with_blocking_catalog():
+    catalog = FakeCatalog()
+    teller = Teller(catalog=catalog)
+    cart = ShoppingCart(catalog=catalog)
+    with pytest.raises(
+        TypeError,
+        match="Async checkouts require an AsyncSupermarketCatalog, but the Teller has FakeCatalog!",
+    ):
+        asyncio.run(teller.check_out_articles_from_cart_async(cart=cart))
+
+
+def test_check_out_articles_from_cart_records_metrics():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothpaste, price_cents=80)
+
+    apples = Product(name="apples", unit=ProductUnit.KILO)
+    catalog.add_product(product=apples, price_cents=200)
+
+    metrics_sink = RecordingMetricsSink()
+    teller = Teller(catalog=catalog, metrics_sink=metrics_sink)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=apples,
+            optional_argument=10,
+        )
+    )
+    teller.add_bundle(
+        bundle=Bundle(products=[toothbrush, toothpaste], discount_percentage=20)
+    )
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=apples, quantity=2)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cart.add_item_quantity(product=toothpaste, quantity=3)
+    teller.check_out_articles_from_cart(cart=cart)
+    teller.check_out_articles_from_cart(cart=cart)
+
+    assert {
+        "catalog_calls": 2,
+        "catalog_products": 6,
+        "offer_evaluations": 2,
+        "bundle_evaluations": 2,
+    } == metrics_sink.counters
+    for stage in (
+        "checkout",
+        "catalog_lookup",
+        "receipt_items",
+        "offer_discounts",
+        "bundle_discounts",
+    ):
+        assert 2 == len(metrics_sink.timings[stage])
+    # every stage is part of the complete checkout
+    assert metrics_sink.get_total_seconds(
+        stage="checkout"
+    ) >= metrics_sink.get_total_seconds(stage="catalog_lookup")
+
+
+def test_check_out_many_records_metrics():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+
+    metrics_sink = RecordingMetricsSink()
+    teller = Teller(catalog=catalog, metrics_sink=metrics_sink)
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    teller.check_out_many(carts=[cart, cart, cart])
+
+    # the batch is measured once, like its single catalog lookup
+    assert 1 == len(metrics_sink.timings["checkout"])
+    assert 1 == len(metrics_sink.timings["catalog_lookup"])
+    assert 3 == len(metrics_sink.timings["receipt_items"])
+    assert metrics_sink.get_total_seconds(
+        stage="checkout"
+    ) >= metrics_sink.get_total_seconds(stage="receipt_items")
+
+
+def test_remove_offer_invalidates_offer_discount_cache():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    offer_discount_cache = OfferDiscountCache()
+    teller = Teller(catalog=catalog, offer_discount_cache=offer_discount_cache)
+    offer = Offer(
+        offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+        product=toothbrush,
+        optional_argument=10,
+    )
+    teller.add_offer(offer=offer)
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=10)
+    assert 891 == teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+    assert 1 == len(offer_discount_cache)
+
+    teller.remove_offer(offer=offer)
+    assert 0 == len(offer_discount_cache)
+    assert 990 == teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+
+    # an Offer that was changed while it was not used is re-evaluated when re-added
+    offer.optional_argument = 20
+    teller.add_offer(offer=offer)
+    assert 792 == teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+
+
+def test_add_new_offer_doesnt_scan_offer_discount_cache(mocker):
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    offer_discount_cache = OfferDiscountCache()
+    teller = Teller(catalog=catalog, offer_discount_cache=offer_discount_cache)
+    offer = Offer(
+        offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+        product=toothbrush,
+        optional_argument=10,
+    )
+    invalidate_matching = mocker.spy(offer_discount_cache._cache, "invalidate_matching")
+    teller.add_offer(offer=offer)
+    assert 0 == invalidate_matching.call_count
+
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=10)
+    teller.check_out_articles_from_cart(cart=cart)
+    teller.remove_offer(offer=offer)
+    assert 1 == invalidate_matching.call_count
+    # the Offer's Discounts have already been removed
+    teller.add_offer(offer=offer)
+    assert 1 == invalidate_matching.call_count
+
+
+def test_fail_remove_offer():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    teller = Teller(catalog=catalog)
+    with pytest.raises(
+        OfferNotFoundError,
+        match=r"Can't remove Offer for Product\(name=toothbrush\): Offer has not been added!",
+    ):
+        teller.remove_offer(
+            offer=Offer(
+                offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+                product=toothbrush,
+                optional_argument=10,
+            )
+        )
+
+
+def test_fail_add_offer_invalid_offer():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=99)
+
+    teller = Teller(catalog=catalog)
+    with pytest.raises(
+        ValueError,
+        match="Discount percentage must be between 0 and 100, but got 110!",
+    ):
+        teller.add_offer(
+            offer=Offer(
+                offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+                product=toothbrush,
+                optional_argument=110,
+            )
+        )
+    assert {} == teller.product_offers_map
+    assert {} == teller.offer_evaluators
+
+
+def test_promotion_state_is_not_changed_by_later_changes():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    teller = Teller(catalog=FakeCatalog())
+    offer_one = Offer(
+        offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+        product=toothbrush,
+        optional_argument=20,
+    )
+    teller.add_offer(offer=offer_one)
+    bundle = Bundle(products=[toothbrush, toothpaste], discount_percentage=10)
+    teller.add_bundle(bundle=bundle)
+    promotions = teller.promotions
+
+    offer_two = Offer(
+        offer_type=SpecialOfferType.THREE_FOR_TWO,
+        product=toothbrush,
+        optional_argument=None,
+    )
+    teller.add_offer(offer=offer_two)
+    teller.remove_offer(offer=offer_one)
+    teller.add_bundle(
+        bundle=Bundle(products=[toothpaste, toothbrush], discount_percentage=5)
+    )
+
+    assert {toothbrush: (offer_one,)} == promotions.product_offers_map
+    assert [offer_one] == list(promotions.offer_evaluators)
+    assert {
+        toothbrush: (bundle,),
+        toothpaste: (bundle,),
+    } == promotions.product_bundles_map
+    assert {toothbrush: (offer_two,)} == teller.product_offers_map
+    assert 2 == len(teller.product_bundles_map[toothpaste])
+
+
+def test_set_promotions_clears_offer_discount_cache():
+    catalog = FakeCatalog()
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog.add_product(product=toothbrush, price_cents=100)
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=toothbrush,
+            optional_argument=20,
+        )
+    )
+    cached_teller = Teller(catalog=catalog, offer_discount_cache=OfferDiscountCache())
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+    cached_teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=toothbrush,
+            optional_argument=10,
+        )
+    )
+    assert (
+        180
+        == cached_teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+    )
+
+    cached_teller.promotions = teller.promotions
+
+    assert teller.product_offers_map is cached_teller.product_offers_map
+    assert 0 == len(cached_teller.offer_discount_cache)
+    assert (
+        160
+        == cached_teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+    )
+
+
+def test_concurrent_checkouts_while_promotions_change():
+    catalog = FakeCatalog()
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(10)
+    ]
+    for product in products:
+        catalog.add_product(product=product, price_cents=100)
+    teller = Teller(catalog=catalog, offer_discount_cache=OfferDiscountCache())
+    cart = ShoppingCart(catalog=catalog)
+    for product in products:
+        cart.add_item_quantity(product=product, quantity=1)
+    offers = [
+        Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=product,
+            optional_argument=10,
+        )
+        for product in products
+    ]
+    bundles = [
+        Bundle(products=[product, products[0]], discount_percentage=10)
+        for product in products[1:]
+    ]
+    stop = threading.Event()
+
+    def change_promotions() -> None:
+        for _ in range(20):
+            # all Offers are added and removed, one by one
+            for offer in offers:
+                teller.add_offer(offer=offer)
+            for offer in offers:
+                teller.remove_offer(offer=offer)
+        for bundle in bundles:
+            teller.add_bundle(bundle=bundle)
+        stop.set()
+
+    def check_out() -> list[int]:
+        discount_counts = []
+        while not stop.is_set():
+            receipt = teller.check_out_articles_from_cart(cart=cart)
+            # every Product has one Discount of 10 cents, or none
+            assert {-10} >= {
+                discount.discount_amount_cents for discount in receipt.discounts
+            }
+            discount_counts.append(len(receipt.discounts))
+        return discount_counts
+
+    writer = threading.Thread(target=change_promotions)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(check_out) for _ in range(4)]
+        writer.start()
+        writer.join()
+        for future in futures:
+            assert all(0 <= count <= 10 for count in future.result())
+
+    receipt = teller.check_out_articles_from_cart(cart=cart)
+    # only the Bundle with the first Product is selected for it
+    assert 2 == len(receipt.discounts)
@@ -4,11 +4,14 @@ The tests in this module create files that are compared to the expected output f
 in the approved_files subdirectory.
 """
 
+import io
+
 import pytest
 from approvaltests import verify
 from model_objects import Discount, Product, ProductUnit
 from receipt import Receipt
-from receipt_printer import TextReceiptPrinter
+from receipt_printer import ReceiptPrinter, TextReceiptPrinter
+from tests.fake_receipts import create_whole_receipt
 
 
 def test_one_line_item():
@@ -90,3 +93,68 @@ def test_fail_invalid_columns_value():
         ValueError, match="columns must be positive integer, but got -10!"
     ):
         TextReceiptPrinter(columns=-10)
+
+
+def test_write_receipt():
+    receipt = create_whole_receipt()
+    stream = io.StringIO()
+    TextReceiptPrinter().write_receipt(receipt=receipt, stream=stream)
+    assert TextReceiptPrinter().print_receipt(receipt=receipt) == stream.getvalue()
+
+
+def test_iter_receipt_lines():
+    receipt = create_whole_receipt()
+    lines = list(TextReceiptPrinter(columns=30).iter_receipt_lines(receipt=receipt))
+    assert [
+        "toothbrush                2.97\n",
+        "  0.99 * 3\n",
+        "apples                    1.49\n",
+        "  1.99 * 0.750\n",
+        "3 for 2 (toothbrush)     -0.99\n",
+        "\n",
+        "Total:                    3.47\n",
+    ] == lines
+
+
+def test_iter_receipt_lines_name_longer_than_columns():
+    receipt = Receipt()
+    toothbrush = Product(name="electric toothbrush", unit=ProductUnit.EACH)
+    receipt.add_product(
+        product=toothbrush, quantity=1, price_cents=2999, total_price_cents=2999
+    )
+    lines = list(TextReceiptPrinter(columns=10).iter_receipt_lines(receipt=receipt))
+    # there is always at least one whitespace between name and value
+    assert "electric toothbrush 29.99\n" == lines[0]
+
+
+class UppercaseReceiptPrinter(ReceiptPrinter):
+    # a printer that only implements print_receipt, like the ones written before
+    # iter_receipt_lines existed
+    def print_receipt(self, receipt: Receipt) -> str:
+        return TextReceiptPrinter(columns=30).print_receipt(receipt=receipt).upper()
+
+
+def test_iter_receipt_lines_of_printer_that_only_implements_print_receipt():
+    receipt = create_whole_receipt()
+    printer = UppercaseReceiptPrinter()
+    stream = io.StringIO()
+    printer.write_receipt(receipt=receipt, stream=stream)
+
+    assert [
+        "TOOTHBRUSH                2.97\n",
+        "  0.99 * 3\n",
+        "APPLES                    1.49\n",
+        "  1.99 * 0.750\n",
+        "3 FOR 2 (TOOTHBRUSH)     -0.99\n",
+        "\n",
+        "TOTAL:                    3.47\n",
+    ] == list(printer.iter_receipt_lines(receipt=receipt))
+    assert printer.print_receipt(receipt=receipt) == stream.getvalue()
+
+
+def test_fail_print_receipt_with_printer_that_implements_nothing():
+    with pytest.raises(
+        NotImplementedError,
+        match="ReceiptPrinter must implement iter_receipt_lines or print_receipt!",
+    ):
+        ReceiptPrinter().print_receipt(receipt=create_whole_receipt())
@@ -0,0 +1,171 @@
+"""This module contains the tests for the versioned_catalog module."""
+
+import threading
+
+import pytest
+from caching_catalog import CachingCatalog
+from model_objects import Offer, Product, ProductUnit, SpecialOfferType
+from parallel_checkout import check_out_in_parallel
+from pricing_session import PricingSession
+from shopping_cart import ShoppingCart
+from teller import Teller
+from versioned_catalog import VersionedCatalog
+
+
+def test_snapshots_are_immutable():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    toothpaste = Product(name="toothpaste", unit=ProductUnit.EACH)
+    catalog = VersionedCatalog(prices_cents={toothbrush: 99})
+    snapshot = catalog.get_price_snapshot()
+    assert 0 == snapshot.version
+
+    catalog.add_product(product=toothbrush, price_cents=129)
+    catalog.add_product(product=toothpaste, price_cents=179)
+
+    assert 99 == snapshot.get_unit_price_cents(product=toothbrush)
+    assert not snapshot.contains_product(product=toothpaste)
+    assert 1 == len(snapshot)
+    assert 2 == catalog.version
+    assert 129 == catalog.get_unit_price_cents(product=toothbrush)
+    assert {toothpaste: 179, toothbrush: 129} == catalog.get_unit_prices_cents(
+        products=[toothpaste, toothbrush]
+    )
+    assert 2 == len(catalog.get_price_snapshot())
+
+
+def test_add_products_creates_one_version():
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(3)
+    ]
+    catalog = VersionedCatalog()
+    catalog.add_products(
+        products_prices_cents={
+            product: 100 + index for index, product in enumerate(products)
+        }
+    )
+
+    assert 1 == catalog.version
+    assert all(catalog.contains_product(product=product) for product in products)
+
+
+def test_changed_prices_are_merged_into_new_base():
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(10)
+    ]
+    catalog = VersionedCatalog(
+        prices_cents={product: 100 for product in products}, max_changed_products=3
+    )
+    snapshots = [catalog.get_price_snapshot()]
+    for index, product in enumerate(products):
+        catalog.add_product(product=product, price_cents=200 + index)
+        snapshots.append(catalog.get_price_snapshot())
+
+    for version, snapshot in enumerate(snapshots):
+        assert version == snapshot.version
+        assert 10 == len(snapshot)
+        assert [200 + index if index < version else 100 for index in range(10)] == list(
+            snapshot.get_unit_prices_cents(products=products).values()
+        )
+
+
+def test_fail_get_unit_price_of_missing_product():
+    catalog = VersionedCatalog()
+    with pytest.raises(KeyError):
+        catalog.get_unit_price_cents(
+            product=Product(name="toothbrush", unit=ProductUnit.EACH)
+        )
+
+
+def test_fail_create_catalog_with_invalid_max_changed_products():
+    with pytest.raises(
+        ValueError, match="max_changed_products must be positive integer, but got 0!"
+    ):
+        VersionedCatalog(max_changed_products=0)
+
+
+def test_checkout_pins_price_snapshot(mocker):
+    rice = Product(name="rice", unit=ProductUnit.EACH)
+    catalog = VersionedCatalog(prices_cents={rice: 100})
+    teller = Teller(catalog=catalog)
+    teller.add_offer(
+        offer=Offer(
+            offer_type=SpecialOfferType.PERCENT_DISCOUNT,
+            product=rice,
+            optional_argument=10,
+        )
+    )
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=rice, quantity=3)
+
+    # the price changes while the Receipt items are created
+    add_products_to_receipt = teller._add_products_to_receipt
+
+    def add_products_to_receipt_and_change_price(**kwargs) -> None:
+        add_products_to_receipt(**kwargs)
+        catalog.add_product(product=rice, price_cents=500)
+
+    mocker.patch.object(
+        teller,
+        "_add_products_to_receipt",
+        side_effect=add_products_to_receipt_and_change_price,
+    )
+    receipt = teller.check_out_articles_from_cart(cart=cart)
+
+    assert 0 == receipt.price_version
+    assert 300 == receipt.items[0].total_price_cents
+    assert -30 == receipt.discounts[0].discount_amount_cents
+    assert 1 == teller.check_out_articles_from_cart(cart=cart).price_version
+
+
+def test_receipts_record_price_version():
+    toothbrush = Product(name="toothbrush", unit=ProductUnit.EACH)
+    catalog = VersionedCatalog(prices_cents={toothbrush: 99})
+    catalog.add_product(product=toothbrush, price_cents=129)
+    teller = Teller(catalog=CachingCatalog(catalog=catalog))
+    cart = ShoppingCart(catalog=catalog)
+    cart.add_item_quantity(product=toothbrush, quantity=2)
+
+    session = PricingSession(teller=teller, cart=cart)
+    catalog.add_product(product=toothbrush, price_cents=149)
+
+    assert [2] == [
+        receipt.price_version for receipt in teller.check_out_many(carts=[cart])
+    ]
+    assert 298 == teller.check_out_articles_from_cart(cart=cart).get_total_price_cents()
+    receipt = session.create_receipt()
+    assert 1 == receipt.price_version
+    assert 258 == receipt.get_total_price_cents()
+    assert [2] == [
+        receipt.price_version
+        for receipt in check_out_in_parallel(teller=teller, carts=[cart], max_workers=1)
+    ]
+
+
+def test_readers_see_complete_snapshots_while_prices_change():
+    products = [
+        Product(name=f"product {index}", unit=ProductUnit.EACH) for index in range(20)
+    ]
+    catalog = VersionedCatalog(
+        prices_cents={product: 0 for product in products}, max_changed_products=8
+    )
+    stop = threading.Event()
+
+    def change_prices() -> None:
+        for price_cents in range(1, 200):
+            catalog.add_products(
+                products_prices_cents={product: price_cents for product in products}
+            )
+        stop.set()
+
+    writer = threading.Thread(target=change_prices)
+    writer.start()
+    try:
+        while not stop.is_set():
+            snapshot = catalog.get_price_snapshot()
+            # every product has the same price in every version
+            assert {snapshot.version} == set(
+                snapshot.get_unit_prices_cents(products=products).values()
+            )
+    finally:
+        writer.join()
+    assert 199 == catalog.version
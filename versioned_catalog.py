@@ -0,0 +1,76 @@
+"""Module that contains a SupermarketCatalog that publishes versioned price snapshots.
+
+Every change of the prices creates a new, immutable PriceSnapshot with the next
+version number, which replaces the current one with a single assignment. Readers
+only take the current snapshot and never lock, and a checkout that pins a
+snapshot sees the same prices from start to end, even if prices are changed in
+the meantime.
+"""
+
+import threading
+from typing import Optional
+
+from catalog import PriceSnapshot, SupermarketCatalog
+from model_objects import Product
+
+
+class VersionedCatalog(SupermarketCatalog):
+    """Class that represents an in-memory SupermarketCatalog with versioned prices.
+
+    Changes are copy-on-write: a new snapshot shares the base prices of the
+    previous one and only copies the prices that changed since the base was
+    created. When there are more than max_changed_products of them, they are
+    merged into a new base, so that an update doesn't have to copy the whole
+    catalog. Writers are serialized by a lock, which readers never take.
+    """
+
+    def __init__(
+        self,
+        prices_cents: Optional[dict[Product, int]] = None,
+        max_changed_products: int = 1024,
+    ):
+        if max_changed_products < 1:
+            raise ValueError(
+                f"max_changed_products must be positive integer, but got {max_changed_products}!"
+            )
+        self.max_changed_products = max_changed_products
+        self._snapshot = PriceSnapshot(
+            version=0,
+            base_prices_cents=dict(prices_cents or {}),
+            changed_prices_cents={},
+        )
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def get_price_snapshot(self) -> PriceSnapshot:
+        return self._snapshot
+
+    def add_product(self, product: Product, price_cents: int) -> None:
+        self.add_products(products_prices_cents={product: price_cents})
+
+    def add_products(self, products_prices_cents: dict[Product, int]) -> None:
+        """Adds or updates many Products at once, creating a single new version.
+
+        Args:
+            products_prices_cents (dict[Product, int]): A dict that contains the
+            unit price in cents for every Product that is to be added or updated.
+        """
+
+        with self._write_lock:
+            # publishing the new snapshot is a single, atomic assignment
+            self._snapshot = self._snapshot.with_prices(
+                products_prices_cents=products_prices_cents,
+                max_changed_products=self.max_changed_products,
+            )
+
+    def contains_product(self, product: Product) -> bool:
+        return self._snapshot.contains_product(product=product)
+
+    def get_unit_price_cents(self, product: Product) -> int:
+        return self._snapshot.get_unit_price_cents(product=product)
+
+    def get_unit_prices_cents(self, products: list[Product]) -> dict[Product, int]:
+        return self._snapshot.get_unit_prices_cents(products=products)